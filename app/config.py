@@ -3,13 +3,19 @@ from pydantic_settings import BaseSettings
 import os
 import warnings
 
+from app.runtime import is_serverless
+
 
 def _is_testing() -> bool:
     return os.getenv("TESTING") == "1"
 
 
+def _explicit_environment_name() -> str | None:
+    return os.getenv("APP_ENV") or os.getenv("ENVIRONMENT") or ("testing" if _is_testing() else None)
+
+
 def _environment_name() -> str:
-    return os.getenv("APP_ENV") or os.getenv("ENVIRONMENT") or ("testing" if _is_testing() else "development")
+    return _explicit_environment_name() or "development"
 
 
 def _normalize_database_url(url: str) -> str:
@@ -30,6 +36,150 @@ class Settings(BaseSettings):
     db_password: str = Field(default="change-me", description="Database password")
     db_name: str = Field(default="apitool1", description="Database name")
 
+    # Read replica (opcional)
+    database_replica_url: str | None = Field(
+        default=None,
+        description="Replica connection URL; read-only service methods query it when set"
+    )
+    db_read_your_writes_seconds: int = Field(
+        default=5,
+        description="Seconds a user's reads stay on the primary after one of their writes"
+    )
+
+    # Connection pool
+    db_pool_mode: str = Field(
+        default_factory=lambda: "null" if is_serverless() else "queue",
+        description="'queue' keeps a QueuePool per process; 'null' opens a connection per checkout (serverless or behind PgBouncer)"
+    )
+    db_pool_size: int = Field(default=5, description="Persistent connections kept by each process")
+    db_max_overflow: int = Field(default=10, description="Extra connections allowed during bursts")
+    db_pool_timeout: float = Field(default=30.0, description="Seconds to wait for a free connection before failing")
+    db_pool_recycle: int = Field(default=3600, description="Recycle connections older than this many seconds")
+    db_pool_use_lifo: bool = Field(
+        default=True,
+        description="Reuse the most recently returned connection so idle extras can time out server-side"
+    )
+
+    # Statement caching
+    db_query_cache_size: int = Field(
+        default=1200,
+        description="Entries in SQLAlchemy's compiled statement cache per engine (SQLAlchemy default: 500)"
+    )
+    db_prepared_statements: bool = Field(
+        default=True,
+        description="Server-side prepared statements with psycopg 3 (postgresql+psycopg://); disable behind PgBouncer in transaction mode"
+    )
+
+    # Query instrumentation
+    db_slow_query_threshold_ms: int = Field(
+        default=500,
+        description="Log queries slower than this many milliseconds (0 disables the slow-query log)"
+    )
+
+    # Solo si el entorno está declarado: sin APP_ENV/ENVIRONMENT queda apagado
+    query_tracking_enabled: bool = Field(
+        default_factory=lambda: _explicit_environment_name() in {"development", "testing"},
+        description="Count queries per request (X-Query-Count header) and warn about N+1 patterns"
+    )
+    query_repeat_threshold: int = Field(
+        default=5,
+        description="Repetitions of the same statement shape in one request that count as N+1"
+    )
+
+    # Scheduler: con varios procesos solo el que toma el advisory lock corre los jobs
+    scheduler_lock_retry_seconds: int = Field(
+        default=60,
+        description="Seconds between attempts of a non-leader process to take the scheduler lock, and between health checks of the leader's lock connection (PostgreSQL only)"
+    )
+
+    # Business metrics collector (job en background, fuera del request path)
+    business_metrics_interval_seconds: int = Field(
+        default=300,
+        description="Seconds between business gauge refreshes"
+    )
+    business_metrics_exact_count_threshold: int = Field(
+        default=100_000,
+        description="Tables estimated above this many rows use approximate counts (PostgreSQL only)"
+    )
+    business_metrics_sample_percent: float = Field(
+        default=1.0,
+        description="TABLESAMPLE SYSTEM percentage used for approximate filtered counts and sums"
+    )
+    business_metrics_statement_timeout_ms: int = Field(
+        default=5000,
+        description="statement_timeout for collector queries (PostgreSQL only)"
+    )
+    business_metrics_max_pool_usage: float = Field(
+        default=0.5,
+        description="Skip a refresh when more than this fraction of the connection pool is checked out"
+    )
+
+    # Archivo y retención del historial de apiarios (job history_archive)
+    history_hot_days: int = Field(
+        default=400,
+        description="Apiary history newer than this stays in apiary_history; older rows move to apiary_history_archive"
+    )
+    history_retention_purge_enabled: bool = Field(
+        default=False,
+        description="Delete history past the tier retention; when off the archive job only counts those rows"
+    )
+    history_retention_grace_days: int = Field(
+        default=30,
+        description="Days after a subscription expires or lapses before its history falls under the aprendiz retention"
+    )
+    history_stream_batch_size: int = Field(
+        default=500,
+        description="Rows fetched per round trip when streaming history (NDJSON) and CSV/XLSX exports"
+    )
+    history_archive_batch_size: int = Field(
+        default=5000,
+        description="Rows moved or purged per transaction by the history archive job"
+    )
+    history_series_cache_size: int = Field(
+        default=1024,
+        description="Apiaries/hives whose chart series are kept in the in-process LRU"
+    )
+    history_series_cache_ttl_seconds: int = Field(
+        default=300,
+        description="TTL of cached chart series; other workers' writes are seen after at most this long"
+    )
+
+    # Resumen por usuario (user_stats): lote del job de reconciliación nocturno
+    user_stats_reconcile_batch_size: int = Field(
+        default=1000,
+        description="Users recomputed per transaction by the user_stats reconciliation job"
+    )
+
+    # Totales de tambores por usuario (drum_totals): /drums/stats lee una fila
+    # en lugar de sumar los tambores. Apagado, se calcula en cada request
+    drum_totals_enabled: bool = Field(
+        default=True,
+        description="Maintain the per-user drum_totals row on drum writes and serve /drums/stats from it"
+    )
+    drum_totals_reconcile_batch_size: int = Field(
+        default=1000,
+        description="Users recomputed per transaction by the drum_totals reconciliation job"
+    )
+
+    # Alta masiva de tambores (POST /drums/bulk)
+    drum_bulk_max_items: int = Field(
+        default=500,
+        ge=1,
+        description="Maximum drums accepted by one POST /drums/bulk request"
+    )
+
+    # Temporadas de cosecha (libro de cosecha): la temporada N va del día 1 de
+    # este mes del año N al anterior del año N+1
+    harvest_season_start_month: int = Field(
+        default=7,
+        ge=1,
+        le=12,
+        description="Month (1-12) in which a harvest season starts; seasons are named after their start year"
+    )
+
+    # Zona horaria para "hoy" cuando el cliente no envía tz
+    default_timezone: str = Field(default="UTC", description="IANA timezone used for day boundaries when the client sends none")
+
     # Weather API
     weather_api_key: str | None = Field(default=None, description="Weather API key")
 
@@ -51,8 +201,22 @@ class Settings(BaseSettings):
         description="Password reset token expiration in minutes"
     )
 
+    # Auth caches
+    auth_token_cache_size: int = Field(default=4096, description="Max verified JWTs kept in the in-process LRU")
+    auth_user_cache_size: int = Field(default=4096, description="Max user rows kept for get_current_user")
+    auth_user_cache_ttl_seconds: int = Field(default=30, description="TTL of cached user rows in seconds")
+
     # Bcrypt
     bcrypt_salt_rounds: int = Field(default=10, description="Bcrypt salt rounds")
+    password_hash_schemes: str = Field(
+        default="bcrypt",
+        description="Comma-separated passlib schemes; the first hashes new passwords, the rest are rehashed on login"
+    )
+    password_hash_workers: int = Field(default=2, description="Threads dedicated to bcrypt hash/verify")
+    password_hash_max_pending: int = Field(
+        default=64,
+        description="Max password tasks queued or running before answering 503"
+    )
 
     # CORS
     cors_origins: str = Field(
@@ -92,6 +256,7 @@ class Settings(BaseSettings):
         "environment",
         "app_version",
         "database_url",
+        "database_replica_url",
         "db_host",
         "db_user",
         "db_password",
@@ -102,6 +267,9 @@ class Settings(BaseSettings):
         "cors_origins",
         "base_url",
         "openai_api_key",
+        "password_hash_schemes",
+        "db_pool_mode",
+        "default_timezone",
         mode="before",
     )
     @classmethod
@@ -110,12 +278,28 @@ class Settings(BaseSettings):
             return value.strip()
         return value
 
+    @field_validator("db_pool_mode")
+    @classmethod
+    def validate_db_pool_mode(cls, value):
+        value = value.lower()
+        if value not in {"queue", "null"}:
+            raise ValueError("DB_POOL_MODE must be 'queue' or 'null'")
+        return value
+
     @property
     def cors_origins_list(self) -> list[str]:
         if self.cors_origins == "*":
             return ["*"]
         return [origin.strip() for origin in self.cors_origins.split(",") if origin.strip()]
 
+    @property
+    def password_hash_scheme_list(self) -> list[str]:
+        schemes = [scheme.strip() for scheme in self.password_hash_schemes.split(",") if scheme.strip()]
+        # bcrypt siempre se acepta para poder verificar (y migrar) hashes existentes
+        if "bcrypt" not in schemes:
+            schemes.append("bcrypt")
+        return schemes
+
     @property
     def is_testing(self) -> bool:
         return self.environment == "testing" or _is_testing()
@@ -144,6 +328,12 @@ class Settings(BaseSettings):
             return _normalize_database_url(postgres_url.strip())
         return f"postgresql://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}"
 
+    @property
+    def effective_database_replica_url(self) -> str | None:
+        if self.database_replica_url:
+            return _normalize_database_url(self.database_replica_url)
+        return None
+
     @property
     def effective_jwt_secret(self) -> str:
         if self.jwt_secret:
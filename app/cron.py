@@ -1,9 +1,16 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy.orm import Session
 from app.database import SessionLocal
 from app.services.apiary_service import ApiaryService
 from app.services.notification_service import NotificationService
+from app.services.auth_service import AuthService
+from app.services.business_metrics_service import BusinessMetricsService
+from app.services.history_archive_service import HistoryArchiveService
+from app.services.user_stats_service import UserStatsService
+from app.services.drum_service import DrumService
+from app.config import settings
 try:
     from app.utils.business_metrics import (
         cron_jobs_executed_total,
@@ -80,3 +87,191 @@ scheduler.add_job(
     max_instances=1
 )
 
+
+def handle_password_hash_metrics():
+    job_name = "password_hash_metrics"
+    start_time = time.time()
+    
+    db: Session = SessionLocal()
+    try:
+        counts = AuthService(db).refresh_password_hash_metrics()
+        logger.info(
+            f"Hashes de contraseña: {counts['current']} con parámetros actuales, "
+            f"{counts['outdated']} pendientes de rehash."
+        )
+        
+        duration = time.time() - start_time
+        cron_jobs_executed_total.labels(job_name=job_name, status="success").inc()
+        cron_job_duration_seconds.labels(job_name=job_name).observe(duration)
+        
+    except Exception as error:
+        duration = time.time() - start_time
+        cron_jobs_executed_total.labels(job_name=job_name, status="failed").inc()
+        cron_job_duration_seconds.labels(job_name=job_name).observe(duration)
+        
+        logger.error(f"Error al calcular métricas de hashes de contraseña: {error}", exc_info=True)
+    finally:
+        db.close()
+
+# Refresh password hash rotation metrics every hour
+scheduler.add_job(
+    handle_password_hash_metrics,
+    trigger=CronTrigger(minute=15),
+    id="password_hash_metrics",
+    name="Refresh password hash rotation metrics",
+    replace_existing=True,
+    max_instances=1
+)
+
+
+def handle_business_metrics():
+    job_name = "business_metrics"
+    start_time = time.time()
+    
+    db: Session = SessionLocal()
+    try:
+        values = BusinessMetricsService(db).collect()
+        if values is not None:
+            logger.debug(f"Métricas de negocio actualizadas: {values}")
+        
+        duration = time.time() - start_time
+        status = "success" if values is not None else "skipped"
+        cron_jobs_executed_total.labels(job_name=job_name, status=status).inc()
+        cron_job_duration_seconds.labels(job_name=job_name).observe(duration)
+        
+    except Exception as error:
+        duration = time.time() - start_time
+        cron_jobs_executed_total.labels(job_name=job_name, status="failed").inc()
+        cron_job_duration_seconds.labels(job_name=job_name).observe(duration)
+        
+        logger.error(f"Error al calcular métricas de negocio: {error}", exc_info=True)
+    finally:
+        db.close()
+
+# Refresh business gauges periodically; a slow run never overlaps the next one
+scheduler.add_job(
+    handle_business_metrics,
+    trigger=IntervalTrigger(seconds=settings.business_metrics_interval_seconds, jitter=30),
+    id="business_metrics",
+    name="Refresh business metric gauges",
+    replace_existing=True,
+    max_instances=1,
+    coalesce=True
+)
+
+
+def handle_history_archive():
+    job_name = "history_archive"
+    start_time = time.time()
+    
+    db: Session = SessionLocal()
+    try:
+        counts = HistoryArchiveService(db).run()
+        logger.info(
+            f"Historial de apiarios: {counts['archived']} filas archivadas, "
+            f"{counts['purged']} purgadas por retención, "
+            f"{counts['purgeable']} purgables con la purga apagada."
+        )
+        
+        duration = time.time() - start_time
+        cron_jobs_executed_total.labels(job_name=job_name, status="success").inc()
+        cron_job_duration_seconds.labels(job_name=job_name).observe(duration)
+        
+    except Exception as error:
+        db.rollback()
+        duration = time.time() - start_time
+        cron_jobs_executed_total.labels(job_name=job_name, status="failed").inc()
+        cron_job_duration_seconds.labels(job_name=job_name).observe(duration)
+        
+        logger.error(f"Error al archivar el historial de apiarios: {error}", exc_info=True)
+    finally:
+        db.close()
+
+# Move old apiary history to the archive and apply tier retention, off-peak
+scheduler.add_job(
+    handle_history_archive,
+    trigger=CronTrigger(hour=3, minute=30),
+    id="history_archive",
+    name="Archive and prune apiary history",
+    replace_existing=True,
+    max_instances=1,
+    coalesce=True
+)
+
+
+def handle_user_stats_reconcile():
+    job_name = "user_stats_reconcile"
+    start_time = time.time()
+    
+    db: Session = SessionLocal()
+    try:
+        counts = UserStatsService(db).reconcile()
+        logger.info(
+            f"Resumen por usuario: {counts['checked']} usuarios revisados, "
+            f"{counts['created']} filas creadas, {counts['fixed']} corregidas."
+        )
+        
+        duration = time.time() - start_time
+        cron_jobs_executed_total.labels(job_name=job_name, status="success").inc()
+        cron_job_duration_seconds.labels(job_name=job_name).observe(duration)
+        
+    except Exception as error:
+        db.rollback()
+        duration = time.time() - start_time
+        cron_jobs_executed_total.labels(job_name=job_name, status="failed").inc()
+        cron_job_duration_seconds.labels(job_name=job_name).observe(duration)
+        
+        logger.error(f"Error al reconciliar user_stats: {error}", exc_info=True)
+    finally:
+        db.close()
+
+# Recompute per-user summaries and fix drift, after the midnight apiary update
+scheduler.add_job(
+    handle_user_stats_reconcile,
+    trigger=CronTrigger(hour=4, minute=0),
+    id="user_stats_reconcile",
+    name="Reconcile user_stats summary rows",
+    replace_existing=True,
+    max_instances=1,
+    coalesce=True
+)
+
+
+def handle_drum_totals_reconcile():
+    job_name = "drum_totals_reconcile"
+    if not settings.drum_totals_enabled:
+        return
+    start_time = time.time()
+    
+    db: Session = SessionLocal()
+    try:
+        counts = DrumService(db).reconcile_totals()
+        logger.info(
+            f"Totales de tambores: {counts['checked']} usuarios revisados, "
+            f"{counts['created']} filas creadas, {counts['fixed']} corregidas."
+        )
+        
+        duration = time.time() - start_time
+        cron_jobs_executed_total.labels(job_name=job_name, status="success").inc()
+        cron_job_duration_seconds.labels(job_name=job_name).observe(duration)
+        
+    except Exception as error:
+        db.rollback()
+        duration = time.time() - start_time
+        cron_jobs_executed_total.labels(job_name=job_name, status="failed").inc()
+        cron_job_duration_seconds.labels(job_name=job_name).observe(duration)
+        
+        logger.error(f"Error al reconciliar drum_totals: {error}", exc_info=True)
+    finally:
+        db.close()
+
+# Recompute per-user drum totals and fix drift
+scheduler.add_job(
+    handle_drum_totals_reconcile,
+    trigger=CronTrigger(hour=4, minute=15),
+    id="drum_totals_reconcile",
+    name="Reconcile drum_totals summary rows",
+    replace_existing=True,
+    max_instances=1,
+    coalesce=True
+)
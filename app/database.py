@@ -1,38 +1,101 @@
+from fastapi import Request
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.config import settings
+from app.utils.db_instrumentation import InstrumentedQueuePool, instrument_engine
+from app.utils.db_routing import RoutingSession
 
 import os
 
 
 DATABASE_URL = settings.effective_database_url
+DATABASE_REPLICA_URL = settings.effective_database_replica_url
 
 # Configurar timezone UTC para la conexion
 timezone = os.getenv("TZ", "UTC")
-connect_args = {}
 
-if DATABASE_URL.startswith("postgresql"):
-    connect_args = {
-        "connect_timeout": 10,
-        "options": f"-c statement_timeout=30000 -c timezone={timezone}",
+
+def build_connect_args(url: str) -> dict:
+    if url.startswith("postgresql"):
+        connect_args = {
+            "connect_timeout": 10,
+            "options": f"-c statement_timeout=30000 -c timezone={timezone}",
+        }
+        # psycopg 3 prepara server-side las queries repetidas (psycopg2 no soporta
+        # prepared statements); prepare_threshold=None lo desactiva
+        if url.startswith("postgresql+psycopg:") and not settings.db_prepared_statements:
+            connect_args["prepare_threshold"] = None
+        return connect_args
+    return {}
+
+
+connect_args = build_connect_args(DATABASE_URL)
+
+
+def build_pool_options(pool_mode: str = None) -> dict:
+    """
+    Opciones de pool para create_engine según DB_POOL_MODE.
+
+    - queue: pool acotado por proceso (pool_size + max_overflow conexiones como máximo).
+    - null: una conexión por checkout, sin pool local. Para serverless (cada
+      instancia fría abriría su propio pool) o detrás de un pooler externo
+      como PgBouncer.
+    """
+    pool_mode = pool_mode or settings.db_pool_mode
+    if pool_mode == "null":
+        return {"poolclass": NullPool}
+
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_use_lifo": settings.db_pool_use_lifo,
     }
 
+
 # Configurar el engine con timeouts y pool settings para mejor manejo de errores
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,
-    pool_recycle=3600,
+    query_cache_size=settings.db_query_cache_size,
     connect_args=connect_args,
+    **build_pool_options(),
+)
+instrument_engine(engine)
+
+# Réplica de lectura opcional: solo la usan los métodos marcados con @read_only
+replica_engine = None
+if DATABASE_REPLICA_URL:
+    replica_engine = create_engine(
+        DATABASE_REPLICA_URL,
+        pool_pre_ping=True,
+        query_cache_size=settings.db_query_cache_size,
+        connect_args=build_connect_args(DATABASE_REPLICA_URL),
+        **build_pool_options(),
+    )
+    instrument_engine(replica_engine)
+
+SessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    replica_bind=replica_engine,
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
-def get_db():
+def get_db(request: Request = None):
     db = SessionLocal()
+    if request is not None:
+        # Para read-your-writes: el usuario se conoce recién al autenticar
+        db.info["request_state"] = request.state
     try:
         yield db
     finally:
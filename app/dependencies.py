@@ -1,11 +1,15 @@
-from fastapi import Depends, HTTPException, status, Request
+from fastapi import Depends, HTTPException, Query, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
+from jose import JWTError
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User
-from app.constants import JWT_SECRET, JWT_ALGORITHM
-from typing import Optional
+from app.services.user_service import UserService
+from app.utils.auth_tokens import decode_access_token, verify_request_token, get_subject_id
+from app.utils.helpers import resolve_timezone, to_naive_utc
+from app.utils.pagination import decode_cursor
+from datetime import datetime
+from typing import List, Literal, Optional
 
 security = HTTPBearer()
 
@@ -21,23 +25,18 @@ async def get_current_user(
     )
     
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user_id_str = payload.get("sub")
-        if user_id_str is None:
-            raise credentials_exception
-        user_id: int = int(user_id_str)
-    except (JWTError, ValueError, TypeError):
+        payload = _verify_credentials(credentials, request)
+    except JWTError:
+        raise credentials_exception
+
+    user_id = get_subject_id(payload)
+    if user_id is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = UserService(db).get_cached_user(user_id)
     if user is None:
         raise credentials_exception
     
-    # Agregar user_id al request state para rate limiting
-    if request:
-        request.state.user_id = user_id
-    
     return user
 
 async def get_current_user_payload(
@@ -51,22 +50,18 @@ async def get_current_user_payload(
     )
     
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        
-        # Agregar user_id al request state para rate limiting
-        if request:
-            user_id_str = payload.get("sub")
-            if user_id_str:
-                try:
-                    request.state.user_id = int(user_id_str)
-                except (ValueError, TypeError):
-                    pass
-        
-        return payload
+        return _verify_credentials(credentials, request)
     except JWTError:
         raise credentials_exception
 
+def _verify_credentials(credentials: HTTPAuthorizationCredentials, request: Optional[Request]) -> dict:
+    # Reutiliza el payload verificado por RateLimitMiddleware si existe;
+    # verify_request_token también deja user_id en request.state
+    if request is not None:
+        return verify_request_token(request, credentials.credentials)
+
+    return decode_access_token(credentials.credentials)
+
 def require_role(required_role: Optional[str] = None):
     async def role_checker(
         payload: dict = Depends(get_current_user_payload)
@@ -97,3 +92,43 @@ def require_roles(allowed_roles: list[str]):
     
     return role_checker
 
+
+def history_filters(
+    limit: int = Query(100, ge=1, le=500, description="History entries (creations/edits) per page"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    field: Optional[List[str]] = Query(None, description="Only changes to these fields"),
+    since: Optional[datetime] = Query(None, description="Changes at or after this instant (UTC if no offset)"),
+    until: Optional[datetime] = Query(None, description="Changes before this instant (UTC if no offset)"),
+    format: str = Query(
+        "json", pattern="^(json|ndjson|csv|xlsx)$",
+        description="ndjson: whole history streamed, one item per line; csv/xlsx: whole history as a spreadsheet download"
+    ),
+) -> dict:
+    """Paginación por cursor y filtros comunes de los endpoints de historial."""
+    return {
+        "limit": limit,
+        "after": decode_cursor(cursor, (datetime, int)) if cursor else None,
+        "fields": field,
+        "since": to_naive_utc(since),
+        "until": to_naive_utc(until),
+        "format": format,
+    }
+
+
+def series_filters(
+    field: List[str] = Query(..., description="Numeric fields to chart (repeatable)"),
+    bucket: Literal["day", "week", "month"] = Query("day", description="Period of each point; weeks start on Monday"),
+    agg: Optional[List[Literal["last", "sum", "min", "max"]]] = Query(None, description="Aggregates per period (default: last)"),
+    since: Optional[datetime] = Query(None, description="Changes at or after this instant (UTC if no offset)"),
+    until: Optional[datetime] = Query(None, description="Changes before this instant (UTC if no offset)"),
+    tz: Optional[str] = Query(None, description="IANA timezone for period boundaries (default: DEFAULT_TIMEZONE)"),
+) -> dict:
+    """Parámetros de los endpoints de series de historial para gráficos."""
+    return {
+        "fields": field,
+        "bucket": bucket,
+        "aggregates": list(dict.fromkeys(agg)) if agg else ["last"],
+        "since": to_naive_utc(since),
+        "until": to_naive_utc(until),
+        "tz": resolve_timezone(tz),
+    }
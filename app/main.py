@@ -14,11 +14,15 @@ from app.middleware.request_id import RequestIDMiddleware
 from app.middleware.rate_limit import RateLimitMiddleware
 from app.middleware.security_headers import SecurityHeadersMiddleware
 from app.middleware.request_size import RequestSizeMiddleware
+from app.middleware.query_budget import QueryBudgetMiddleware
 from app.database import engine, Base
 from app.cron import scheduler
 from app.config import settings
 from app.runtime import should_run_scheduler
 from app.utils.logging_config import setup_logging
+from app.utils.metrics_registry import cleanup_dead_workers
+from app.utils.scheduler_lock import SchedulerLock
+import asyncio
 import os
 import logging
 import time
@@ -38,8 +42,19 @@ setup_logging(log_level=log_level, use_json=use_json_logging)
 
 logger = logging.getLogger(__name__)
 
+scheduler_lock = SchedulerLock(engine)
+
+
+def _start_scheduler():
+    # Si este proceso ya fue líder, el scheduler quedó pausado al perder el lock
+    if scheduler.running:
+        scheduler.resume()
+    else:
+        scheduler.start()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    leader_task = None
     # Startup
     if os.getenv("TESTING") != "1":
         # Intentar crear las tablas, pero no fallar si la BD no está disponible
@@ -52,13 +67,24 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"Unexpected error creating database tables: {e}")
         
+        # Modo multi-proceso de Prometheus: limpiar gauges de workers reemplazados
+        cleanup_dead_workers()
+        
+        # Con varios workers/réplicas solo el que toma el lock corre los jobs
         if should_run_scheduler() and not scheduler.running:
-            scheduler.start()
+            leader_task = asyncio.create_task(
+                scheduler_lock.run_when_leader(
+                    _start_scheduler, scheduler.pause, settings.scheduler_lock_retry_seconds
+                )
+            )
     yield
     # Shutdown
     if os.getenv("TESTING") != "1":
+        if leader_task is not None:
+            leader_task.cancel()
         if scheduler.running:
             scheduler.shutdown()
+        scheduler_lock.release()
 
 app = FastAPI(
     title="API Tool",
@@ -77,6 +103,10 @@ app.add_middleware(RequestSizeMiddleware)
 if os.getenv("TESTING") != "1" and settings.rate_limit_enabled:
     app.add_middleware(RateLimitMiddleware)
 
+# Query budget middleware (solo desarrollo/testing: X-Query-Count y aviso de N+1)
+if settings.query_tracking_enabled:
+    app.add_middleware(QueryBudgetMiddleware)
+
 # Metrics middleware
 app.add_middleware(MetricsMiddleware)
 
@@ -90,6 +120,7 @@ app.add_middleware(
     allow_credentials=settings.cors_origins_list != ["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -59,10 +59,12 @@ if PROMETHEUS_AVAILABLE:
         buckets=(100, 500, 1000, 5000, 10000, 50000, 100000, 500000, 1000000)
     )
 
+    # Solo por método: la ruta recién se conoce después del routing
     active_requests = Gauge(
         'http_active_requests',
         'Number of active HTTP requests',
-        ['method', 'endpoint']
+        ['method'],
+        multiprocess_mode='livesum'
     )
 
     http_errors_total = Counter(
@@ -81,44 +83,33 @@ else:
     
     logger.warning("Prometheus client not available. Metrics will be disabled. Install with: pip install prometheus-client")
 
-def normalize_path(path: str) -> str:
+# Label para requests que no llegaron a matchear una ruta (404, 429, etc.)
+UNMATCHED_ENDPOINT = "<unmatched>"
+
+EXCLUDED_PATHS = frozenset({'/health', '/health/ready', '/health/live', '/metrics'})
+
+def get_endpoint_label(request: Request) -> str:
     """
-    Normaliza el path para métricas (reemplaza IDs con placeholders).
-    Ejemplo: /apiarys/123 -> /apiarys/{id}
+    Devuelve el template de la ruta que atendió la request (ej: /apiarys/{id}).
+    El router de FastAPI deja la ruta en scope["route"] al matchear, así que
+    la cardinalidad queda acotada a las rutas definidas.
     """
-    # Lista de patrones a normalizar
-    import re
-    patterns = [
-        (r'/apiarys/\d+', '/apiarys/{id}'),
-        (r'/users/\d+', '/users/{id}'),
-        (r'/drums/\d+', '/drums/{id}'),
-        (r'/news/\d+', '/news/{id}'),
-        (r'/notifications/\d+', '/notifications/{id}'),
-        (r'/apiarys/\d+/history', '/apiarys/{id}/history'),
-        (r'/apiarys/\d+/harvested', '/apiarys/{id}/harvested'),
-        (r'/profile/image/.+', '/profile/image/{id}'),
-    ]
-    
-    normalized = path
-    for pattern, replacement in patterns:
-        normalized = re.sub(pattern, replacement, normalized)
-    
-    return normalized
+    route = request.scope.get("route")
+    path = getattr(route, "path", None)
+    return path or UNMATCHED_ENDPOINT
 
 class MetricsMiddleware(BaseHTTPMiddleware):
     """Middleware para tracking de métricas HTTP."""
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Normalizar path para métricas
-        endpoint = normalize_path(request.url.path)
         method = request.method
         
         # Excluir health checks y métricas del tracking
-        if endpoint in ['/health', '/health/ready', '/health/live', '/metrics']:
+        if request.url.path in EXCLUDED_PATHS:
             return await call_next(request)
         
         # Incrementar requests activos
-        active_requests.labels(method=method, endpoint=endpoint).inc()
+        active_requests.labels(method=method).inc()
         
         # Medir tamaño de request
         request_size = 0
@@ -133,6 +124,7 @@ class MetricsMiddleware(BaseHTTPMiddleware):
             
             # Calcular duración
             duration = time.time() - start_time
+            endpoint = get_endpoint_label(request)
             
             # Medir tamaño de response
             response_size = 0
@@ -178,6 +170,7 @@ class MetricsMiddleware(BaseHTTPMiddleware):
         except Exception as e:
             # Registrar excepciones
             duration = time.time() - start_time
+            endpoint = get_endpoint_label(request)
             http_errors_total.labels(
                 method=method,
                 endpoint=endpoint,
@@ -194,6 +187,6 @@ class MetricsMiddleware(BaseHTTPMiddleware):
             
         finally:
             # Decrementar requests activos
-            active_requests.labels(method=method, endpoint=endpoint).dec()
+            active_requests.labels(method=method).dec()
 
 
@@ -0,0 +1,32 @@
+"""
+Middleware de conteo de queries por request (desarrollo/testing).
+Agrega X-Query-Count a la respuesta y avisa cuando la misma query se
+repite muchas veces en una request (patrón N+1).
+"""
+from typing import Callable
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+import logging
+
+from app.config import settings
+from app.utils.db_instrumentation import track_queries
+
+logger = logging.getLogger(__name__)
+
+class QueryBudgetMiddleware(BaseHTTPMiddleware):
+    """Middleware que cuenta los statements SQL de cada request."""
+    
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        with track_queries() as tracker:
+            response = await call_next(request)
+        
+        response.headers["X-Query-Count"] = str(tracker.count)
+        
+        for statement, times in tracker.repeated(settings.query_repeat_threshold):
+            logger.warning(
+                f"Possible N+1 in {request.method} {request.url.path}: "
+                f"statement executed {times} times: {statement}"
+            )
+        
+        return response
@@ -7,11 +7,13 @@ from collections import defaultdict
 from typing import Callable
 
 from fastapi import status
+from jose import JWTError
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import JSONResponse, Response
 
 from app.config import settings
+from app.utils.auth_tokens import get_bearer_token, verify_request_token
 import logging
 
 logger = logging.getLogger(__name__)
@@ -68,8 +70,24 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
 
         return "unknown"
 
-    def _get_client_id(self, request: Request) -> str:
+    def _get_user_id(self, request: Request):
         user_id = getattr(request.state, "user_id", None)
+        if user_id:
+            return user_id
+
+        token = get_bearer_token(request)
+        if not token:
+            return None
+
+        # El payload queda en request.state y get_current_user_payload lo reutiliza
+        try:
+            verify_request_token(request, token)
+        except JWTError:
+            return None
+        return getattr(request.state, "user_id", None)
+
+    def _get_client_id(self, request: Request) -> str:
+        user_id = self._get_user_id(request)
         if user_id:
             return f"user:{user_id}"
 
@@ -3,14 +3,22 @@ Middleware para tracking de Request ID.
 Genera un ID único para cada request y lo incluye en logs y respuestas.
 """
 import uuid
+from contextvars import ContextVar
+from typing import Callable, Optional
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import Response
-from typing import Callable
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Request ID accesible fuera de la request (ej: hooks de SQLAlchemy)
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+def get_request_id() -> Optional[str]:
+    """Request ID de la request en curso, o None fuera de una request."""
+    return request_id_var.get()
+
 class RequestIDMiddleware(BaseHTTPMiddleware):
     """Middleware que agrega un Request ID único a cada request."""
     
@@ -22,6 +30,7 @@ class RequestIDMiddleware(BaseHTTPMiddleware):
         
         # Agregar al estado de la request para acceso en la app
         request.state.request_id = request_id
+        request_id_token = request_id_var.set(request_id)
         
         # Agregar contexto al logger
         old_factory = logging.getLogRecordFactory()
@@ -43,5 +52,6 @@ class RequestIDMiddleware(BaseHTTPMiddleware):
         finally:
             # Restaurar factory original
             logging.setLogRecordFactory(old_factory)
+            request_id_var.reset(request_id_token)
 
 
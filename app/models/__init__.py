@@ -1,12 +1,14 @@
 from .user import User
 from .apiary import Apiary
 from .settings import Settings
-from .history import History
+from .history import History, HistoryArchive
 from .news import News
 from .device import Device
-from .drum import Drum
+from .drum import Drum, DrumTotals
 from .hive import Hive
 from .hive_history import HiveHistory
 from .task import Task
+from .user_stats import UserStats
+from .harvest import HarvestLedger, HarvestSeasonTotal
 
-__all__ = ["User", "Apiary", "Settings", "History", "News", "Device", "Drum", "Hive", "HiveHistory", "Task"]
+__all__ = ["User", "Apiary", "Settings", "History", "HistoryArchive", "News", "Device", "Drum", "DrumTotals", "Hive", "HiveHistory", "Task", "UserStats", "HarvestLedger", "HarvestSeasonTotal"]
@@ -34,3 +34,8 @@ class Apiary(Base):
     settings = relationship("Settings", back_populates="apiary", uselist=False, cascade="all, delete-orphan")
     tasks = relationship("Task", back_populates="apiary")
     hives_rel = relationship("Hive", back_populates="apiary", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Apiarios del usuario (listado, conteos, estadísticas)
+        Index('idx_apiary_user_updated', 'userId', 'updatedAt'),
+    )
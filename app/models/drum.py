@@ -22,33 +22,22 @@ class Drum(Base):
         Index('idx_drums_code', 'code'),
         Index('idx_drums_sold', 'sold'),
         Index('idx_drums_created_at', 'createdAt'),
+        # Listado del usuario paginado por (createdAt, id)
+        Index('idx_drums_user_created', 'userId', 'createdAt', 'id'),
     )
 
 
+class DrumTotals(Base):
+    """
+    Totales de los tambores de un usuario, una fila por usuario, para
+    /drums/stats. DrumService la actualiza con deltas en la misma transacción
+    que cada alta, edición, venta y baja de tambores.
+    """
+    __tablename__ = "drum_totals"
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+    userId = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    drumCount = Column(Integer, nullable=False, default=0)
+    soldCount = Column(Integer, nullable=False, default=0)
+    totalTare = Column(Numeric(14, 2), nullable=False, default=0)
+    totalWeight = Column(Numeric(14, 2), nullable=False, default=0)
+    updatedAt = Column(DateTime, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
@@ -0,0 +1,51 @@
+from sqlalchemy import Column, Integer, DateTime, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class HarvestLedger(Base):
+    """
+    Libro de cosecha: una fila, que nunca se modifica, por cada escritura que
+    cambia las alzas de un apiario. Sin FK al apiario: la cosecha queda
+    registrada aunque después se borre.
+
+    ``box*`` es el cambio del contador; ``harvested*`` lo que ese cambio sumó
+    (o restó) al total de la temporada, que nunca baja de cero (ver
+    HarvestService.record).
+    """
+    __tablename__ = "harvest_ledger"
+
+    id = Column(Integer, primary_key=True)
+    userId = Column(Integer, nullable=False)
+    apiaryId = Column(Integer, nullable=False)
+    season = Column(Integer, nullable=False)
+    box = Column(Integer, nullable=False, default=0)
+    boxMedium = Column(Integer, nullable=False, default=0)
+    boxSmall = Column(Integer, nullable=False, default=0)
+    harvestedBox = Column(Integer, nullable=False, default=0)
+    harvestedBoxMedium = Column(Integer, nullable=False, default=0)
+    harvestedBoxSmall = Column(Integer, nullable=False, default=0)
+    createdAt = Column(DateTime, nullable=False, server_default=func.current_timestamp())
+
+    __table_args__ = (
+        # Reconstruir o auditar los totales de una temporada
+        Index('idx_harvest_ledger_user_season', 'userId', 'season'),
+        Index('idx_harvest_ledger_apiary_season', 'apiaryId', 'season'),
+    )
+
+
+class HarvestSeasonTotal(Base):
+    """
+    Alzas cosechadas por temporada, sumadas a medida que se escribe el libro.
+    Una fila por (usuario, temporada, apiario) y una con apiaryId = 0 con el
+    total del usuario.
+    """
+    __tablename__ = "harvest_season_total"
+
+    userId = Column(Integer, primary_key=True)
+    season = Column(Integer, primary_key=True)
+    apiaryId = Column(Integer, primary_key=True)
+    box = Column(Integer, nullable=False, default=0)
+    boxMedium = Column(Integer, nullable=False, default=0)
+    boxSmall = Column(Integer, nullable=False, default=0)
+    updatedAt = Column(DateTime, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index, JSON
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -11,5 +11,38 @@ class History(Base):
     field = Column(String, nullable=False)
     previousValue = Column(String, nullable=True)
     newValue = Column(String, nullable=True)
+    # Conjunto de cambios tipado {campo: [anterior, nuevo]}; NULL en filas por campo
+    changes = Column(JSON(none_as_null=True), nullable=True)
     changeDate = Column(DateTime, server_default=func.current_timestamp())
 
+    __table_args__ = (
+        # Cambios del usuario por campo y fecha (cosecha del día, estadísticas)
+        Index('idx_apiary_history_user_field_date', 'userId', 'field', 'changeDate'),
+        # Historial de un apiario ordenado por fecha
+        Index('idx_apiary_history_apiary_date', 'apiaryId', 'changeDate'),
+        # Archivo y retención (job history_archive)
+        Index('idx_apiary_history_change_date', 'changeDate'),
+    )
+
+
+class HistoryArchive(Base):
+    """
+    Cambios de apiario más viejos que HISTORY_HOT_DAYS. Los mueve el job
+    history_archive desde apiary_history; en PostgreSQL la tabla está
+    particionada por mes sobre changeDate (migrations/create_history_archive.sql).
+    """
+    __tablename__ = "apiary_history_archive"
+
+    id = Column(Integer, primary_key=True)
+    userId = Column(Integer, nullable=False)
+    apiaryId = Column(Integer, nullable=False)
+    field = Column(String, nullable=False)
+    previousValue = Column(String, nullable=True)
+    newValue = Column(String, nullable=True)
+    changes = Column(JSON(none_as_null=True), nullable=True)
+    changeDate = Column(DateTime, nullable=False, primary_key=True)
+
+    __table_args__ = (
+        Index('idx_apiary_history_archive_apiary_date', 'apiaryId', 'changeDate'),
+        Index('idx_apiary_history_archive_user_date', 'userId', 'changeDate'),
+    )
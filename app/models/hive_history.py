@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, String, JSON
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, String, JSON, Index
 from sqlalchemy.sql import func
 
 from app.database import Base
@@ -15,3 +15,8 @@ class HiveHistory(Base):
     changes = Column(JSON, nullable=False, default=dict)
     comment = Column(String, nullable=True)
     date = Column(DateTime, server_default=func.current_timestamp())
+
+    __table_args__ = (
+        # Historial de una colmena paginado por (date, id)
+        Index('idx_hive_history_hive_date', 'hiveId', 'date'),
+    )
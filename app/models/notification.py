@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -13,4 +13,7 @@ class Notification(Base):
     isRead = Column(Boolean, default=False)
     createdAt = Column(DateTime, server_default=func.current_timestamp())
 
-
+    __table_args__ = (
+        # Notificaciones del usuario (todas o no leídas) ordenadas por fecha
+        Index('idx_notifications_user_read_created', 'userId', 'isRead', 'createdAt'),
+    )
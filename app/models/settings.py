@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Boolean, ForeignKey, Text
+from sqlalchemy import Column, Integer, Boolean, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -34,3 +34,10 @@ class Settings(Base):
     tasks = Column(Text, nullable=True)
     
     apiary = relationship("Apiary", back_populates="settings")
+
+    __table_args__ = (
+        # Cambios masivos por usuario (set_harvesting_for_all_apiaries)
+        Index('idx_apiary_setting_user', 'apiaryUserId'),
+        # Join apiary -> settings (joinedload); PostgreSQL no indexa FKs solo
+        Index('idx_apiary_setting_apiary', 'apiaryId'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -18,3 +18,11 @@ class Task(Base):
 
     user = relationship("User", back_populates="tasks")
     apiary = relationship("Apiary", back_populates="tasks")
+
+    __table_args__ = (
+        # Listado de tareas del usuario filtrado por estado y ordenado por vencimiento
+        Index('idx_tasks_user_completed_due', 'user_id', 'completed', 'due_date'),
+        # Listado sin filtro de estado paginado por (due_date, id)
+        Index('idx_tasks_user_due', 'user_id', 'due_date', 'id'),
+        Index('idx_tasks_apiary_id', 'apiary_id'),
+    )
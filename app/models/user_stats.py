@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class UserStats(Base):
+    """
+    Totales de los apiarios de un usuario, una fila por usuario. Se actualiza
+    con deltas en la misma transacción que las escrituras de apiarios, colmenas
+    y settings (UserStatsService); el job user_stats_reconcile corrige desvíos.
+    """
+    __tablename__ = "user_stats"
+
+    userId = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    apiaryCount = Column(Integer, nullable=False, default=0)
+    hiveCount = Column(Integer, nullable=False, default=0)
+    box = Column(Integer, nullable=False, default=0)
+    boxMedium = Column(Integer, nullable=False, default=0)
+    boxSmall = Column(Integer, nullable=False, default=0)
+    # Apiarios con settings.harvesting
+    harvestingApiaries = Column(Integer, nullable=False, default=0)
+    # Apiarios con alguna alza cosechada (box, boxMedium o boxSmall > 0) y sus colmenas
+    harvestedApiaries = Column(Integer, nullable=False, default=0)
+    harvestedHives = Column(Integer, nullable=False, default=0)
+    updatedAt = Column(DateTime, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
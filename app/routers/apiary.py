@@ -1,20 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request, Query, Response
 from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.dependencies import get_current_user_payload
+from app.dependencies import get_current_user_payload, history_filters, series_filters
 from app.services.apiary_service import ApiaryService
+from app.services.history_series_service import HistorySeriesService
 from app.services.user_service import UserService
 from app.services.settings_service import SettingsService
 from app.services.subscription_service import SubscriptionService
-from app.schemas.apiary import CreateApiary, UpdateApiary, ApiaryResponse, ApiaryDetail, BoxStats, HarvestedCounts, HarvestedTodayCounts
+from app.schemas.apiary import CreateApiary, UpdateApiary, ApiaryResponse, ApiaryDetail, BoxStats, HarvestedCounts, HarvestedTodayCounts, SeasonHarvest
 from app.schemas.settings import UpdateSettings
-from app.schemas.history import HistoryResponse
+from app.schemas.history import HistoryResponse, ApiaryChangeSetResponse, HistorySeriesResponse
 from app.models.apiary import Apiary
 from app.runtime import get_upload_dir
 from app.services.blob_storage_service import BlobStorageService, is_blob_path
-from app.utils.helpers import verify_apiary_ownership, build_apiary_detail, safe_int_convert, safe_float_convert
-from typing import List
+from app.utils.helpers import verify_apiary_ownership, build_apiary_detail, safe_int_convert, safe_float_convert, resolve_timezone
+from app.utils.export import EXPORT_FORMATS, fields, export_response
+from app.utils.pagination import encode_cursor, ndjson_response, set_next_cursor
+from typing import List, Optional
 import uuid
 import os
 from pathlib import Path
@@ -26,6 +29,26 @@ UPLOAD_DIR = get_upload_dir()
 UPLOAD_DIR.mkdir(exist_ok=True)
 IMAGE_REF_RE = re.compile(r"^(?!/)(?!.*//)(?!.*\.\.)[A-Za-z0-9/_-]{1,255}\.(jpg|jpeg|png|gif|webp)$")
 
+EXPORT_COLUMNS = fields(
+    "id", "name", "status", "hives", "box", "boxMedium", "boxSmall", "honey", "levudex", "sugar",
+    "tOxalic", "tAmitraz", "tFlumetrine", "tFence", "tComment", "transhumance", "managementType",
+    "latitude", "longitude", "createdAt", "updatedAt",
+)
+HISTORY_EXPORT_COLUMNS = fields("changeDate", "field", "previousValue", "newValue", "userName")
+CHANGE_SET_EXPORT_COLUMNS = fields("changeDate", "kind", "userName", "changes")
+
+@router.get("/export")
+async def export_apiaries(
+    format: str = Query("csv", pattern="^(csv|xlsx)$", description="csv o xlsx"),
+    payload: dict = Depends(get_current_user_payload),
+    db: Session = Depends(get_db)
+):
+    """Descarga todos los apiarios del usuario en CSV o XLSX, generado en streaming."""
+    apiary_service = ApiaryService(db)
+    user_id = int(payload.get("sub"))
+
+    return export_response(apiary_service.iter_apiaries(user_id), EXPORT_COLUMNS, format, "apiaries")
+
 @router.get("/{id}", response_model=ApiaryDetail)
 async def get_apiary(
     id: int,
@@ -55,6 +78,22 @@ async def get_apiary_harvested_totals(
 
     return apiary_service.get_harvested_totals_by_apiary(id)
 
+@router.get("/{id}/harvest/season", response_model=SeasonHarvest)
+async def get_apiary_season_harvest(
+    id: int,
+    season: Optional[int] = Query(None, description="Año en que empieza la temporada (default: la actual)"),
+    payload: dict = Depends(get_current_user_payload),
+    db: Session = Depends(get_db)
+):
+    """Obtiene las alzas cosechadas por el apiario en la temporada."""
+    apiary_service = ApiaryService(db)
+    apiary = apiary_service.get_apiary(id)
+    user_id = int(payload.get("sub"))
+
+    verify_apiary_ownership(apiary, user_id)
+
+    return apiary_service.get_season_harvest(user_id, season, apiary_id=id)
+
 @router.get("/all/count")
 async def get_apiary_and_hive_counts(
     payload: dict = Depends(get_current_user_payload),
@@ -63,12 +102,11 @@ async def get_apiary_and_hive_counts(
     apiary_service = ApiaryService(db)
     user_id = int(payload.get("sub"))
     
-    apiary_count = apiary_service.count_apiaries_by_user_id(user_id)
-    hive_count = apiary_service.count_hives_by_user_id(user_id)
+    stats = apiary_service.get_user_stats(user_id)
     
     return {
-        "apiaryCount": apiary_count,
-        "hiveCount": hive_count
+        "apiaryCount": stats["apiaryCount"],
+        "hiveCount": stats["hiveCount"]
     }
 
 @router.get("/stats/boxes", response_model=BoxStats)
@@ -131,16 +169,16 @@ async def get_harvested_counts(
     apiary_service = ApiaryService(db)
     user_id = int(payload.get("sub"))
 
-    apiary_count = apiary_service.count_harvested_apiaries(user_id)
-    hive_count = apiary_service.count_hives_in_harvested_apiaries(user_id)
+    stats = apiary_service.get_user_stats(user_id)
 
     return {
-        "apiaryCount": apiary_count,
-        "hiveCount": hive_count
+        "apiaryCount": stats["harvestedApiaries"],
+        "hiveCount": stats["harvestedHives"]
     }
 
 @router.get("/harvested/today/counts", response_model=HarvestedTodayCounts)
 async def get_harvested_today_counts(
+    tz: Optional[str] = Query(None, description="IANA timezone for 'today' (default: DEFAULT_TIMEZONE)"),
     payload: dict = Depends(get_current_user_payload),
     db: Session = Depends(get_db)
 ):
@@ -148,10 +186,11 @@ async def get_harvested_today_counts(
     apiary_service = ApiaryService(db)
     user_id = int(payload.get("sub"))
 
-    return apiary_service.count_harvested_today_apiaries_and_hives(user_id)
+    return apiary_service.count_harvested_today_apiaries_and_hives(user_id, resolve_timezone(tz))
 
 @router.get("/harvested/today/boxes", response_model=BoxStats)
 async def get_harvested_today_boxes(
+    tz: Optional[str] = Query(None, description="IANA timezone for 'today' (default: DEFAULT_TIMEZONE)"),
     payload: dict = Depends(get_current_user_payload),
     db: Session = Depends(get_db)
 ):
@@ -159,7 +198,30 @@ async def get_harvested_today_boxes(
     apiary_service = ApiaryService(db)
     user_id = int(payload.get("sub"))
 
-    return apiary_service.get_harvested_today_box_stats(user_id)
+    return apiary_service.get_harvested_today_box_stats(user_id, resolve_timezone(tz))
+
+@router.get("/harvest/season", response_model=SeasonHarvest)
+async def get_season_harvest(
+    season: Optional[int] = Query(None, description="Año en que empieza la temporada (default: la actual)"),
+    payload: dict = Depends(get_current_user_payload),
+    db: Session = Depends(get_db)
+):
+    """Obtiene las alzas cosechadas por el usuario en la temporada."""
+    apiary_service = ApiaryService(db)
+    user_id = int(payload.get("sub"))
+
+    return apiary_service.get_season_harvest(user_id, season)
+
+@router.get("/harvest/seasons", response_model=List[SeasonHarvest])
+async def list_harvest_seasons(
+    payload: dict = Depends(get_current_user_payload),
+    db: Session = Depends(get_db)
+):
+    """Obtiene las alzas cosechadas por el usuario en cada temporada, de la más reciente a la más vieja."""
+    apiary_service = ApiaryService(db)
+    user_id = int(payload.get("sub"))
+
+    return apiary_service.list_harvest_seasons(user_id)
 
 @router.post("", response_model=ApiaryDetail)
 async def create_apiary(
@@ -343,22 +405,83 @@ async def get_apiarys(
     # Esto es más consistente con el comportamiento esperado
     return apiary_array
 
+def _apiary_history_response(
+    db: Session, payload: dict, id: int, filters: dict, include_archived: bool, response: Response, change_sets: bool
+):
+    apiary_service = ApiaryService(db)
+    apiary = apiary_service.get_apiary(id)
+    user_id = int(payload.get("sub"))
+    
+    verify_apiary_ownership(apiary, user_id)
+    
+    if filters["format"] == "ndjson":
+        items = apiary_service.iter_history(
+            id, filters["fields"], filters["since"], filters["until"], include_archived, change_sets
+        )
+        schema = ApiaryChangeSetResponse if change_sets else HistoryResponse
+        return ndjson_response(items, schema, filename=f"apiary-{id}-history.ndjson")
+    if filters["format"] in EXPORT_FORMATS:
+        items = apiary_service.iter_history(
+            id, filters["fields"], filters["since"], filters["until"], include_archived, change_sets
+        )
+        columns = CHANGE_SET_EXPORT_COLUMNS if change_sets else HISTORY_EXPORT_COLUMNS
+        return export_response(items, columns, filters["format"], f"apiary-{id}-history")
+    
+    items, next_key = apiary_service.get_history_page(
+        id, filters["limit"], filters["after"], filters["fields"], filters["since"], filters["until"],
+        include_archived, change_sets
+    )
+    set_next_cursor(response, encode_cursor(*next_key) if next_key else None)
+    
+    # Return empty list if no history exists - this is a valid response
+    return items
+
 @router.get("/history/{id}", response_model=List[HistoryResponse])
 async def get_apiary_history(
     id: int,
+    response: Response,
+    filters: dict = Depends(history_filters),
+    include_archived: bool = Query(False, description="Include changes older than HISTORY_HOT_DAYS"),
     payload: dict = Depends(get_current_user_payload),
     db: Session = Depends(get_db)
 ):
-    apiary_service = ApiaryService(db)
-    apiary = apiary_service.get_apiary(id)
+    """
+    Historial del apiario por campo, del más reciente al más viejo, paginado
+    por cursor (header X-Next-Cursor). Con format=ndjson, csv o xlsx devuelve
+    todo en streaming.
+    """
+    return _apiary_history_response(db, payload, id, filters, include_archived, response, change_sets=False)
+
+@router.get("/history/{id}/changes", response_model=List[ApiaryChangeSetResponse])
+async def get_apiary_change_sets(
+    id: int,
+    response: Response,
+    filters: dict = Depends(history_filters),
+    include_archived: bool = Query(False, description="Include changes older than HISTORY_HOT_DAYS"),
+    payload: dict = Depends(get_current_user_payload),
+    db: Session = Depends(get_db)
+):
+    """Historial del apiario: un conjunto de cambios tipado por alta o edición (mismos filtros)."""
+    return _apiary_history_response(db, payload, id, filters, include_archived, response, change_sets=True)
+
+@router.get("/history/{id}/series", response_model=HistorySeriesResponse)
+async def get_apiary_history_series(
+    id: int,
+    filters: dict = Depends(series_filters),
+    include_archived: bool = Query(False, description="Include changes older than HISTORY_HOT_DAYS"),
+    payload: dict = Depends(get_current_user_payload),
+    db: Session = Depends(get_db)
+):
+    """
+    Valores de campos numéricos del historial agrupados por día, semana o mes
+    (último, suma, mínimo, máximo), listos para graficar.
+    """
+    apiary = ApiaryService(db).get_apiary(id)
     user_id = int(payload.get("sub"))
     
     verify_apiary_ownership(apiary, user_id)
     
-    history = apiary_service.get_all_history(id)
-    
-    # Return empty list if no history exists - this is a valid response
-    return history
+    return HistorySeriesService(db).apiary_series(id, include_archived=include_archived, **filters)
 
 @router.put("/settings/{id}")
 async def update_apiary_settings(
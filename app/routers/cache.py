@@ -4,6 +4,9 @@ Endpoints para gestión y estadísticas del caché.
 from fastapi import APIRouter, Depends, HTTPException, status
 from app.dependencies import get_current_user_payload
 from app.utils.cache import cache
+from app.utils.auth_tokens import verified_token_cache
+from app.services.user_service import user_cache
+from app.services.history_series_service import series_cache
 from typing import Dict, Any
 
 router = APIRouter(prefix="/cache", tags=["cache"])
@@ -19,6 +22,9 @@ async def get_cache_stats(
     stats = cache.get_stats()
     return {
         "cache": stats,
+        "auth_tokens": verified_token_cache.get_stats(),
+        "auth_users": user_cache.get_stats(),
+        "history_series": series_cache.get_stats(),
         "message": "Cache statistics"
     }
 
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.dependencies import get_current_user
@@ -6,12 +6,17 @@ from app.models.user import User
 from app.services.drum_service import DrumService
 from app.schemas.drum import (
     DrumCreate, DrumUpdate, DrumResponse, 
-    DrumsListResponse, DrumStats, DrumSoldUpdate
+    DrumsListResponse, DrumStats, DrumSoldUpdate, DrumBulkCreate, DrumBulkResponse
 )
+from app.utils.export import fields, export_response
+from app.utils.pagination import decode_cursor, encode_cursor, set_next_cursor
 from typing import Optional
+from datetime import datetime
 
 router = APIRouter(prefix="/drums", tags=["drums"])
 
+EXPORT_COLUMNS = fields("id", "code", "tare", "weight", "sold", "createdAt", "updatedAt")
+
 @router.post("", response_model=DrumResponse, status_code=status.HTTP_201_CREATED)
 async def create_drum(
     drum_data: DrumCreate,
@@ -22,17 +27,44 @@ async def create_drum(
     service = DrumService(db)
     return service.create_drum(current_user.id, drum_data)
 
+@router.post("/bulk", response_model=DrumBulkResponse)
+async def create_drums_bulk(
+    payload: DrumBulkCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Crea un lote de tambores escaneados en una sola transacción. Los códigos
+    repetidos (en el lote o ya registrados) y los valores inválidos se
+    informan por tambor sin frenar al resto.
+    """
+    service = DrumService(db)
+    return service.create_drums_bulk(current_user.id, payload.drums)
+
 @router.get("", response_model=DrumsListResponse)
 async def get_drums(
+    response: Response,
     sold: Optional[bool] = Query(None, description="Filtrar por tambores vendidos"),
-    page: int = Query(1, ge=1, description="Número de página"),
+    page: int = Query(1, ge=1, description="Número de página (obsoleto: usar cursor)"),
     limit: int = Query(50, ge=1, le=100, description="Resultados por página"),
+    cursor: Optional[str] = Query(None, description="nextCursor (o X-Next-Cursor) de la página anterior"),
+    exact_total: bool = Query(False, description="Total con COUNT en lugar del resumen por usuario"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Obtiene la lista de tambores del usuario autenticado con paginación."""
+    """
+    Obtiene la lista de tambores del usuario autenticado, del más nuevo al más
+    viejo, paginada por cursor. ``page`` > 1 sin cursor sigue usando OFFSET.
+    """
     service = DrumService(db)
-    drums, total = service.get_drums(current_user.id, sold, page, limit)
+    next_cursor = None
+    if page > 1 and cursor is None:
+        drums, total = service.get_drums(current_user.id, sold, page, limit)
+    else:
+        after = decode_cursor(cursor, (datetime, int)) if cursor else None
+        drums, next_key, total = service.get_drums_page(current_user.id, sold, limit, after, exact_total)
+        next_cursor = encode_cursor(*next_key) if next_key else None
+        set_next_cursor(response, next_cursor)
     
     return {
         "data": drums,
@@ -40,10 +72,22 @@ async def get_drums(
             "page": page,
             "limit": limit,
             "total": total,
-            "totalPages": (total + limit - 1) // limit if total > 0 else 0
+            "totalPages": (total + limit - 1) // limit if total > 0 else 0,
+            "nextCursor": next_cursor
         }
     }
 
+@router.get("/export")
+async def export_drums(
+    format: str = Query("csv", pattern="^(csv|xlsx)$", description="csv o xlsx"),
+    sold: Optional[bool] = Query(None, description="Filtrar por tambores vendidos"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Descarga todos los tambores del usuario en CSV o XLSX, generado en streaming."""
+    service = DrumService(db)
+    return export_response(service.iter_drums(current_user.id, sold), EXPORT_COLUMNS, format, "drums")
+
 @router.get("/stats", response_model=DrumStats)
 async def get_stats(
     current_user: User = Depends(get_current_user),
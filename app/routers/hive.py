@@ -1,17 +1,23 @@
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user, history_filters, series_filters
 from app.models.user import User
 from app.schemas.hive import HiveCreate, HiveResponse, HiveUpdate, HivesListResponse
+from app.schemas.history import HistorySeriesResponse
 from app.schemas.hive_history import HiveHistoryResponse
 from app.services.hive_service import HiveService
+from app.services.history_series_service import HistorySeriesService
+from app.utils.export import EXPORT_FORMATS, fields, export_response
+from app.utils.pagination import encode_cursor, ndjson_response, set_next_cursor
 
 router = APIRouter(prefix="/hives", tags=["hives"])
 
+HISTORY_EXPORT_COLUMNS = fields("date", "createdBy", "changes", "comment")
+
 
 @router.post("", response_model=HiveResponse, status_code=status.HTTP_201_CREATED)
 async def create_hive(
@@ -58,9 +64,16 @@ async def get_hive(
 @router.get("/{id}/history", response_model=list[HiveHistoryResponse])
 async def get_hive_history(
     id: int,
+    response: Response,
+    filters: dict = Depends(history_filters),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
+    """
+    Historial de la colmena, del más reciente al más viejo, paginado por cursor
+    (header X-Next-Cursor). Con format=ndjson, csv o xlsx devuelve todo en
+    streaming.
+    """
     service = HiveService(db)
     hive = service.get_hive_by_id(id, current_user.id)
     if not hive:
@@ -68,7 +81,47 @@ async def get_hive_history(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Hive not found",
         )
-    return service.get_hive_history(id, current_user.id)
+
+    if filters["format"] == "ndjson":
+        entries = service.iter_hive_history(
+            id, current_user.id, fields=filters["fields"], since=filters["since"], until=filters["until"]
+        )
+        return ndjson_response(entries, HiveHistoryResponse, filename=f"hive-{id}-history.ndjson")
+    if filters["format"] in EXPORT_FORMATS:
+        entries = service.iter_hive_history(
+            id, current_user.id, fields=filters["fields"], since=filters["since"], until=filters["until"]
+        )
+        return export_response(entries, HISTORY_EXPORT_COLUMNS, filters["format"], f"hive-{id}-history")
+
+    entries, next_key = service.get_hive_history_page(
+        id,
+        current_user.id,
+        filters["limit"],
+        after=filters["after"],
+        fields=filters["fields"],
+        since=filters["since"],
+        until=filters["until"],
+    )
+    set_next_cursor(response, encode_cursor(*next_key) if next_key else None)
+    return entries
+
+
+@router.get("/{id}/history/series", response_model=HistorySeriesResponse)
+async def get_hive_history_series(
+    id: int,
+    filters: dict = Depends(series_filters),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Campos numéricos del historial de la colmena por día, semana o mes, para graficar."""
+    hive = HiveService(db).get_hive_by_id(id, current_user.id)
+    if not hive:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Hive not found",
+        )
+
+    return HistorySeriesService(db).hive_series(id, current_user.id, **filters)
 
 
 @router.put("/{id}", response_model=HiveResponse)
@@ -2,6 +2,7 @@
 Endpoint de métricas Prometheus.
 """
 from fastapi import APIRouter, Response, HTTPException, status
+from app.utils.metrics_registry import build_registry
 
 try:
     from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
@@ -16,6 +17,7 @@ async def get_metrics():
     """
     Endpoint de métricas Prometheus.
     Expone todas las métricas en formato Prometheus.
+    Con PROMETHEUS_MULTIPROC_DIR agrega las de todos los workers.
     """
     if not PROMETHEUS_AVAILABLE:
         raise HTTPException(
@@ -24,7 +26,7 @@ async def get_metrics():
         )
     
     return Response(
-        content=generate_latest(),
+        content=generate_latest(build_registry()),
         media_type=CONTENT_TYPE_LATEST
     )
 
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.dependencies import get_current_user
@@ -7,7 +7,9 @@ from app.services.task_service import TaskService
 from app.schemas.task import (
     TaskCreate, TaskUpdate, TaskResponse, TasksListResponse
 )
+from app.utils.pagination import decode_cursor, encode_cursor, set_next_cursor
 from typing import Optional
+from datetime import datetime
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
@@ -23,16 +25,31 @@ async def create_task(
 
 @router.get("", response_model=TasksListResponse)
 async def get_tasks(
+    response: Response,
     apiary_id: Optional[int] = Query(None, description="Filtrar por ID de apiario"),
     completed: Optional[bool] = Query(None, description="Filtrar por estado completado"),
-    page: int = Query(1, ge=1, description="Número de página"),
+    page: int = Query(1, ge=1, description="Número de página (obsoleto: usar cursor)"),
     limit: int = Query(50, ge=1, le=100, description="Resultados por página"),
+    cursor: Optional[str] = Query(None, description="nextCursor (o X-Next-Cursor) de la página anterior"),
+    exact_total: bool = Query(False, description="Contar el total de tareas (COUNT); si no, total es null"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Obtiene la lista de tareas del usuario autenticado con paginación."""
+    """
+    Obtiene la lista de tareas del usuario autenticado por vencimiento,
+    paginada por cursor. ``page`` > 1 sin cursor sigue usando OFFSET.
+    """
     service = TaskService(db)
-    tasks, total = service.get_tasks(current_user.id, apiary_id, completed, page, limit)
+    next_cursor = None
+    if page > 1 and cursor is None:
+        tasks, total = service.get_tasks(current_user.id, apiary_id, completed, page, limit)
+    else:
+        after = decode_cursor(cursor, (datetime, int)) if cursor else None
+        tasks, next_key, total = service.get_tasks_page(
+            current_user.id, apiary_id, completed, limit, after, exact_total
+        )
+        next_cursor = encode_cursor(*next_key) if next_key else None
+        set_next_cursor(response, next_cursor)
     
     return {
         "data": tasks,
@@ -40,7 +57,8 @@ async def get_tasks(
             "page": page,
             "limit": limit,
             "total": total,
-            "totalPages": (total + limit - 1) // limit if total > 0 else 0
+            "totalPages": None if total is None else (total + limit - 1) // limit if total > 0 else 0,
+            "nextCursor": next_cursor
         }
     }
 
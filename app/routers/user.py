@@ -152,7 +152,7 @@ async def change_password(
     user_service = UserService(db)
     auth_service = AuthService(db)
     
-    success = user_service.change_password(current_user.id, password_data, auth_service)
+    success = await user_service.change_password(current_user.id, password_data, auth_service)
     
     if not success:
         raise HTTPException(
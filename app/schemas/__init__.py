@@ -2,7 +2,7 @@ from .user import CreateUser, LoginUser, UserResponse
 from .auth import AuthData
 from .apiary import CreateApiary, UpdateApiary, ApiaryResponse, ApiaryDetail
 from .settings import CreateSettings, UpdateSettings, SettingsResponse
-from .history import HistoryResponse
+from .history import HistoryResponse, ApiaryChangeSetResponse, HistorySeriesResponse
 from .hive_history import HiveHistoryResponse
 from .news import NewsCreate, NewsUpdate, NewsResponse
 
@@ -18,6 +18,6 @@ __all__ = [
     "AuthData",
     "CreateApiary", "UpdateApiary", "ApiaryResponse",
     "CreateSettings", "UpdateSettings", "SettingsResponse",
-    "HistoryResponse", "HiveHistoryResponse",
+    "HistoryResponse", "ApiaryChangeSetResponse", "HistorySeriesResponse", "HiveHistoryResponse",
     "NewsCreate", "NewsUpdate", "NewsResponse"
 ]
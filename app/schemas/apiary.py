@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from pydantic import BaseModel, Field, ConfigDict, model_serializer
 from typing import Optional, TYPE_CHECKING, Any
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 
 # Importar SettingsResponse directamente para Pydantic v2
@@ -121,6 +121,12 @@ class BoxStats(BaseModel):
     boxSmall: int
     total: Optional[int] = None
 
+class SeasonHarvest(BoxStats):
+    """Alzas cosechadas en una temporada [start, end)."""
+    season: int
+    start: date
+    end: date
+
 class HarvestedCounts(BaseModel):
     """Cantidad de apiarios cosechados y total de colmenas."""
     apiaryCount: int
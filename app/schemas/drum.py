@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Literal, Optional, List
 from datetime import datetime
 from decimal import Decimal
 
@@ -41,3 +41,19 @@ class DrumStats(BaseModel):
 class DrumsListResponse(BaseModel):
     data: List[DrumResponse]
     pagination: dict
+
+class DrumBulkCreate(BaseModel):
+    drums: List[DrumCreate]
+
+class DrumBulkResult(BaseModel):
+    """Resultado de cada tambor del lote, en el orden recibido."""
+    index: int
+    code: str
+    status: Literal["created", "duplicate", "invalid"]
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class DrumBulkResponse(BaseModel):
+    created: int
+    rejected: int
+    results: List[DrumBulkResult]
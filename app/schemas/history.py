@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Any, Dict, List, Optional, Union
 from datetime import datetime
 
 class HistoryResponse(BaseModel):
@@ -14,3 +14,19 @@ class HistoryResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
+
+class ApiaryChangeSetResponse(BaseModel):
+    id: int
+    userId: int
+    apiaryId: int
+    userName: Optional[str] = None
+    kind: str  # create | update
+    changes: Dict[str, List[Any]]  # campo -> [anterior, nuevo]
+    changeDate: datetime
+
+
+class HistorySeriesResponse(BaseModel):
+    bucket: str  # day | week | month
+    buckets: List[str]  # inicio de cada período con datos (YYYY-MM-DD)
+    series: Dict[str, Dict[str, List[Optional[Union[int, float]]]]]  # campo -> agregado -> un valor por período
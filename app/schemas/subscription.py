@@ -21,6 +21,13 @@ TIER_AI_MONTHLY_LIMIT = {
     "maestro": None,  # ilimitado
 }
 
+# Meses de historial de apiarios que se conservan (apiary_history + archivo)
+TIER_HISTORY_RETENTION_MONTHS = {
+    "aprendiz": 12,
+    "apicultor": 36,
+    "maestro": None,  # ilimitado
+}
+
 
 class SubscriptionResponse(BaseModel):
     id: int
@@ -32,6 +39,7 @@ class SubscriptionResponse(BaseModel):
     apiaryLimit: Optional[int]
     aiAccess: bool
     aiMonthlyLimit: Optional[int]
+    historyRetentionMonths: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -31,8 +31,10 @@ class TaskResponse(TaskBase):
 class TasksPagination(BaseModel):
     page: int
     limit: int
-    total: int
-    totalPages: int
+    # Solo con exact_total=true (o con page > 1 sin cursor)
+    total: Optional[int] = None
+    totalPages: Optional[int] = None
+    nextCursor: Optional[str] = None
 
 class TasksListResponse(BaseModel):
     data: List[TaskResponse]
@@ -1,12 +1,21 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import lambda_stmt, or_, select
+from sqlalchemy.orm import Session, joinedload
 from app.models.apiary import Apiary
 from app.models.settings import Settings
-from app.models.history import History
+from app.models.history import History, HistoryArchive
 from app.schemas.apiary import CreateApiary, UpdateApiary, ApiaryResponse
 from app.schemas.settings import CreateSettings
 from app.services.settings_service import SettingsService
-from app.services.history_service import HistoryService
-from typing import Optional, List
+from app.services.history_service import HistoryService, CREATION_FIELD, CHANGESET_FIELDS
+from app.services.user_stats_service import UserStatsService, apiary_contribution
+from app.services.harvest_service import HarvestService, box_counts
+from app.config import settings as app_settings
+from app.utils.db_routing import read_only, read_only_scope
+from app.utils.pagination import keyset_condition
+from app.utils.helpers import local_day_bounds_utc, resolve_timezone
+from typing import Iterator, Optional, List, Tuple
+from datetime import datetime
+from zoneinfo import ZoneInfo
 import json
 from decimal import Decimal
 from fastapi import UploadFile, HTTPException, status
@@ -14,7 +23,6 @@ import uuid
 import magic
 from PIL import Image
 import io
-from types import SimpleNamespace
 from app.services.blob_storage_service import BlobStorageService, DEFAULT_APIARY_IMAGE
 
 class ApiaryService:
@@ -22,6 +30,8 @@ class ApiaryService:
         self.db = db
         self.settings_service = SettingsService(db)
         self.history_service = HistoryService(db)
+        self.user_stats = UserStatsService(db)
+        self.harvest = HarvestService(db)
         self.blob_storage = BlobStorageService()
     
     def get_all_by_user_id(self, user_id: int) -> List[ApiaryResponse]:
@@ -51,6 +61,7 @@ class ApiaryService:
                     tAmitraz=apiary.settings.tAmitraz,
                     tFlumetrine=apiary.settings.tFlumetrine,
                     tFence=apiary.settings.tFence,
+                    tComment=apiary.settings.tComment,
                     transhumance=apiary.settings.transhumance,
                     harvesting=apiary.settings.harvesting,
                     queenStatus=apiary.settings.queenStatus,
@@ -82,6 +93,7 @@ class ApiaryService:
                 _tAmitraz=apiary.tAmitraz,
                 _tFlumetrine=apiary.tFlumetrine,
                 _tFence=apiary.tFence,
+                _tComment=apiary.tComment or "",
                 _transhumance=apiary.transhumance,
                 _managementType=apiary.managementType or "apiary",
                 _settings=settings_response,
@@ -92,10 +104,13 @@ class ApiaryService:
         return result
     
     def get_apiary(self, apiary_id: int) -> Optional[Apiary]:
-        from sqlalchemy.orm import joinedload
-        return self.db.query(Apiary).options(
-            joinedload(Apiary.settings)
-        ).filter(Apiary.id == apiary_id).first()
+        # lambda_stmt: la construcción y compilación del SELECT se cachean
+        stmt = lambda_stmt(
+            lambda: select(Apiary)
+            .options(joinedload(Apiary.settings))
+            .where(Apiary.id == apiary_id)
+        )
+        return self.db.execute(stmt).scalars().first()
     
     async def _process_image(self, file: UploadFile) -> str:
         """
@@ -209,6 +224,13 @@ class ApiaryService:
             from app.services.task_service import TaskService
             TaskService(self.db).create_fast_tasks_for_apiary(user_id, new_apiary.id, commit=False)
 
+            # Log initial creation in history, in the same transaction
+            self.db.flush()
+            self.db.refresh(new_apiary)
+            self.history_service.log_creation(new_apiary)
+            self.user_stats.apply(user_id, after=apiary_contribution(new_apiary, settings.harvesting))
+            self.harvest.record(user_id, new_apiary.id, {}, box_counts(new_apiary))
+
             self.db.commit()
             self.db.refresh(new_apiary)
         except Exception:
@@ -216,30 +238,6 @@ class ApiaryService:
             if uploaded_image:
                 self.blob_storage.delete_image(uploaded_image)
             raise
-            
-        # Log initial creation in history
-        # Create a "dummy" old apiary with empty values to trigger history log for all fields
-        old_apiary = SimpleNamespace(
-            id=new_apiary.id,
-            userId=new_apiary.userId,
-            name=None,
-            hives=None,
-            status=None,
-            image=None,
-            honey=None,
-            levudex=None,
-            sugar=None,
-            box=None,
-            boxMedium=None,
-            boxSmall=None,
-            tOxalic=None,
-            tAmitraz=None,
-            tFlumetrine=None,
-            tFence=None,
-            transhumance=None,
-            managementType=None,
-        )
-        self.history_service.log_changes(old_apiary, new_apiary)
         
         return new_apiary
     
@@ -249,8 +247,10 @@ class ApiaryService:
             return False
 
         image_to_delete = apiary.image
+        before = apiary_contribution(apiary, apiary.settings.harvesting if apiary.settings else False)
         self.db.delete(apiary)
         try:
+            self.user_stats.apply(apiary.userId, before=before)
             self.db.commit()
         except Exception:
             self.db.rollback()
@@ -270,31 +270,25 @@ class ApiaryService:
             uploaded_image = await self._process_image(file)
             apiary_data.image = uploaded_image
 
-        # Create a copy of the old values for history
-        old_values = {
-            'name': apiary.name,
-            'hives': apiary.hives,
-            'status': apiary.status,
-            'image': apiary.image,
-            'honey': apiary.honey,
-            'levudex': apiary.levudex,
-            'sugar': apiary.sugar,
-            'box': apiary.box,
-            'boxMedium': apiary.boxMedium,
-            'boxSmall': apiary.boxSmall,
-            'tOxalic': apiary.tOxalic,
-            'tAmitraz': apiary.tAmitraz,
-            'tFlumetrine': apiary.tFlumetrine,
-            'tFence': apiary.tFence,
-            'transhumance': apiary.transhumance,
-            'managementType': apiary.managementType,
-        }
+        # Copy of the old values for history
+        old_values = self.history_service.snapshot(apiary)
+        # settings.harvesting no cambia acá: se omite en los dos aportes
+        stats_before = apiary_contribution(apiary)
+        boxes_before = box_counts(apiary)
         
         update_data = apiary_data.dict(exclude_unset=True, exclude_none=True)
         for key, value in update_data.items():
             setattr(apiary, key, value)
         
         try:
+            # Los valores se releen de la base (Numeric normalizado) antes de
+            # comparar; el historial se escribe en la misma transacción
+            self.db.flush()
+            self.db.refresh(apiary)
+            self.history_service.log_changes(old_values, apiary)
+            self.user_stats.apply(apiary.userId, stats_before, apiary_contribution(apiary))
+            self.harvest.record(apiary.userId, apiary.id, boxes_before, box_counts(apiary))
+
             self.db.commit()
             self.db.refresh(apiary)
         except Exception:
@@ -306,86 +300,218 @@ class ApiaryService:
         if uploaded_image and old_image != uploaded_image:
             self.blob_storage.delete_image(old_image)
         
-        # Create a temporary old_apiary object for history logging
-        old_apiary = SimpleNamespace(**old_values, id=apiary.id, userId=apiary.userId)
-        
-        self.history_service.log_changes(old_apiary, apiary)
-        
         return apiary
     
-    def get_all_history(self, apiary_id: int) -> List[History]:
+    @read_only
+    def get_all_history(self, apiary_id: int, include_archived: bool = False) -> List[History]:
+        """
+        Historial completo del apiario como lista de cambios por campo, del más
+        reciente al más viejo. Por defecto solo la tabla caliente (últimos
+        HISTORY_HOT_DAYS días); con include_archived agrega apiary_history_archive.
+        """
+        return [
+            entry
+            for row in self._history_rows(apiary_id, include_archived)
+            for entry in self._history_entries(*row)
+        ]
+
+    @read_only
+    def get_change_sets(self, apiary_id: int, include_archived: bool = False) -> List[dict]:
+        """Historial del apiario como un conjunto de cambios tipado por alta o edición."""
+        return [self._change_set_item(*row) for row in self._history_rows(apiary_id, include_archived)]
+
+    @read_only
+    def get_history_page(
+        self,
+        apiary_id: int,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        fields: Optional[List[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        include_archived: bool = False,
+        change_sets: bool = False
+    ) -> Tuple[list, Optional[Tuple[datetime, int]]]:
+        """
+        Una página de historial ordenada por (changeDate, id) descendente.
+        ``limit`` cuenta altas/ediciones; en formato por campo cada una puede
+        dar varias entradas.
+
+        Returns:
+            (items, clave (changeDate, id) de la última fila si hay más páginas)
+        """
+        rows = list(self._history_rows(
+            apiary_id, include_archived, fields, since, until, after, limit=limit + 1
+        ))
+        next_key = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1][1]
+            next_key = (last.changeDate, last.id)
+        return self._history_items(rows, fields, change_sets), next_key
+
+    def iter_history(
+        self,
+        apiary_id: int,
+        fields: Optional[List[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        include_archived: bool = False,
+        change_sets: bool = False
+    ) -> Iterator:
+        """Historial completo leído de a lotes (yield_per), para exportar en streaming."""
+        rows = self._history_rows(
+            apiary_id, include_archived, fields, since, until, yield_per=app_settings.history_stream_batch_size
+        )
+        for row in rows:
+            yield from self._history_items([row], fields, change_sets)
+
+    def _history_items(self, rows, fields: Optional[List[str]], change_sets: bool) -> list:
+        if change_sets:
+            return [self._change_set_item(*row) for row in rows]
+        return [entry for row in rows for entry in self._history_entries(*row, fields=fields)]
+
+    def _history_entries(self, model, history, user_full_name, fields: Optional[List[str]] = None) -> list:
+        """Entradas por campo (formato de GET /apiarys/history/{id}) de una fila."""
+        if history.changes is None:
+            history.userName = user_full_name
+            return [history]
+
+        entries = []
+        for change in HistoryService.expand(history):
+            if fields and change["field"] not in fields:
+                continue
+            entry = model(
+                id=history.id,
+                userId=history.userId,
+                apiaryId=history.apiaryId,
+                changeDate=history.changeDate,
+                **change
+            )
+            entry.userName = user_full_name
+            entries.append(entry)
+        return entries
+
+    def _change_set_item(self, model, history, user_full_name) -> dict:
+        return {
+            "id": history.id,
+            "userId": history.userId,
+            "apiaryId": history.apiaryId,
+            "userName": user_full_name,
+            "kind": "create" if history.field == CREATION_FIELD else "update",
+            "changes": HistoryService.change_set_of(history),
+            "changeDate": history.changeDate,
+        }
+
+    def _history_rows(
+        self,
+        apiary_id: int,
+        include_archived: bool = False,
+        fields: Optional[List[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: Optional[int] = None,
+        yield_per: Optional[int] = None
+    ) -> Iterator[tuple]:
+        """
+        (modelo, fila, nombre del usuario) del más reciente al más viejo. El
+        archivo solo tiene filas más viejas que la tabla caliente, así que se
+        lee después y con el mismo cursor.
+        """
         from app.models.user import User
-        results = (
-            self.db.query(History, User.name, User.surname)
-            .join(User, History.userId == User.id, isouter=True)
-            .filter(History.apiaryId == apiary_id)
-            .all()
+        remaining = limit
+        for model in ([History, HistoryArchive] if include_archived else [History]):
+            stmt = (
+                select(model, User.name, User.surname)
+                .join(User, model.userId == User.id, isouter=True)
+                .where(model.apiaryId == apiary_id)
+            )
+            if fields:
+                # Filas por campo, o conjuntos de cambios que tocan alguno de los campos
+                stmt = stmt.where(or_(
+                    model.field.in_(fields),
+                    *[model.changes[field].as_string().isnot(None) for field in fields]
+                ))
+            if since is not None:
+                stmt = stmt.where(model.changeDate >= since)
+            if until is not None:
+                stmt = stmt.where(model.changeDate < until)
+            if after is not None:
+                stmt = stmt.where(keyset_condition((model.changeDate, model.id), after, dialect=self.db.get_bind().dialect.name))
+            stmt = stmt.order_by(model.changeDate.desc(), model.id.desc())
+            if remaining is not None:
+                stmt = stmt.limit(remaining)
+            if yield_per:
+                stmt = stmt.execution_options(yield_per=yield_per)
+
+            # El scope cubre solo el execute: en streaming las filas se leen
+            # después, fuera del método que llamó el router
+            with read_only_scope():
+                result = self.db.execute(stmt)
+
+            for history, user_name, user_surname in result:
+                user_full_name = f"{user_name} {user_surname}".strip() if user_name else None
+                yield model, history, user_full_name
+                if remaining is not None:
+                    remaining -= 1
+
+            if remaining == 0:
+                return
+    
+    def iter_apiaries(self, user_id: int) -> Iterator[Apiary]:
+        """Apiarios del usuario leídos de a lotes (yield_per), para exportar en streaming."""
+        stmt = (
+            select(Apiary)
+            .where(Apiary.userId == user_id)
+            .order_by(Apiary.id)
+            .execution_options(yield_per=app_settings.history_stream_batch_size)
         )
-        history_list = []
-        for history, user_name, user_surname in results:
-            history.userName = f"{user_name} {user_surname}".strip() if user_name else None
-            history_list.append(history)
-        return history_list
+        # El scope cubre solo el execute: las filas se leen después, al enviar la respuesta
+        with read_only_scope():
+            result = self.db.execute(stmt).scalars()
+        yield from result
+
+    def get_user_stats(self, user_id: int) -> dict:
+        """Totales del usuario desde user_stats (una fila por clave primaria)."""
+        return self.user_stats.get_stats(user_id)
     
     def count_apiaries_by_user_id(self, user_id: int) -> int:
-        return self.db.query(Apiary).filter(Apiary.userId == user_id).count()
+        return self.get_user_stats(user_id)["apiaryCount"]
     
     def count_hives_by_user_id(self, user_id: int) -> int:
-        from sqlalchemy import func
-        return self.db.query(func.sum(Apiary.hives)).filter(Apiary.userId == user_id).scalar() or 0
+        return self.get_user_stats(user_id)["hiveCount"]
     
     def get_box_stats(self, user_id: int) -> dict:
         """Obtiene estadísticas de alzas cosechadas para un usuario."""
-        from sqlalchemy import func
-        result = self.db.query(
-            func.sum(Apiary.box).label('total_box'),
-            func.sum(Apiary.boxMedium).label('total_boxMedium'),
-            func.sum(Apiary.boxSmall).label('total_boxSmall')
-        ).filter(Apiary.userId == user_id).first()
-        
-        total_box = int(result.total_box or 0)
-        total_boxMedium = int(result.total_boxMedium or 0)
-        total_boxSmall = int(result.total_boxSmall or 0)
-        total_alzas = total_box + total_boxMedium + total_boxSmall
-        
+        stats = self.get_user_stats(user_id)
         return {
-            "box": total_box,
-            "boxMedium": total_boxMedium,
-            "boxSmall": total_boxSmall,
-            "total": total_alzas
+            "box": stats["box"],
+            "boxMedium": stats["boxMedium"],
+            "boxSmall": stats["boxSmall"],
+            "total": stats["box"] + stats["boxMedium"] + stats["boxSmall"]
         }
     
+    def get_season_harvest(self, user_id: int, season: Optional[int] = None, apiary_id: Optional[int] = None) -> dict:
+        """Alzas cosechadas en la temporada, del usuario o de un apiario (una fila de harvest_season_total)."""
+        if apiary_id is None:
+            return self.harvest.get_season(user_id, season)
+        return self.harvest.get_season(user_id, season, apiary_id)
+
+    def list_harvest_seasons(self, user_id: int) -> List[dict]:
+        return self.harvest.list_seasons(user_id)
+    
     def count_harvesting_apiaries(self, user_id: int) -> int:
         """Cuenta apiarios que están en modo cosecha (harvesting = True)."""
-        from app.models.settings import Settings
-        return self.db.query(Apiary).join(Settings).filter(
-            Apiary.userId == user_id,
-            Settings.harvesting == True
-        ).count()
+        return self.get_user_stats(user_id)["harvestingApiaries"]
     
     def count_harvested_apiaries(self, user_id: int) -> int:
         """Cuenta apiarios que tienen alzas cosechadas (box > 0 OR boxMedium > 0 OR boxSmall > 0)."""
-        from sqlalchemy import or_
-        return self.db.query(Apiary).filter(
-            Apiary.userId == user_id,
-            or_(
-                Apiary.box > 0,
-                Apiary.boxMedium > 0,
-                Apiary.boxSmall > 0
-            )
-        ).count()
+        return self.get_user_stats(user_id)["harvestedApiaries"]
 
     def count_hives_in_harvested_apiaries(self, user_id: int) -> int:
         """Suma colmenas (hives) solo en apiarios con alzas cosechadas."""
-        from sqlalchemy import func, or_
-        return self.db.query(func.sum(Apiary.hives)).filter(
-            Apiary.userId == user_id,
-            or_(
-                Apiary.box > 0,
-                Apiary.boxMedium > 0,
-                Apiary.boxSmall > 0
-            )
-        ).scalar() or 0
+        return self.get_user_stats(user_id)["harvestedHives"]
 
     def get_harvested_totals_by_apiary(self, apiary_id: int) -> dict:
         apiary = self.db.query(Apiary).filter(Apiary.id == apiary_id).first()
@@ -409,26 +535,63 @@ class ApiaryService:
         except (TypeError, ValueError):
             return 0
 
-    def _get_harvested_today_changes(self, user_id: int) -> dict:
-        from sqlalchemy import func
+    def _get_harvested_today_changes(
+        self,
+        user_id: int,
+        tz: Optional[ZoneInfo] = None,
+        now: Optional[datetime] = None
+    ) -> dict:
+        """
+        Último valor de hoy (en la zona horaria del usuario) de cada alza por apiario.
+        El rango [inicio, fin) sobre changeDate usa idx_apiary_history_user_field_date
+        y row_number() deja solo el cambio más reciente por (apiaryId, field).
+        Lee tanto conjuntos de cambios (valor en changes) como filas por campo
+        todavía sin convertir.
+        """
+        from sqlalchemy import func, literal, union_all
         fields = ["box", "boxMedium", "boxSmall"]
-        history_rows = self.db.query(History).filter(
+        start, end = local_day_bounds_utc(tz or resolve_timezone(), now)
+        today = (
             History.userId == user_id,
-            History.field.in_(fields),
-            func.date(History.changeDate) == func.current_date()
-        ).order_by(History.changeDate.desc()).all()
+            History.changeDate >= start,
+            History.changeDate < end
+        )
+
+        per_field = select(
+            History.id, History.apiaryId, History.field, History.newValue.label("value"), History.changeDate
+        ).where(*today, History.field.in_(fields))
+        change_sets = [
+            select(
+                History.id,
+                History.apiaryId,
+                literal(field).label("field"),
+                History.changes[(field, 1)].as_string().label("value"),
+                History.changeDate
+            ).where(*today, History.field.in_(CHANGESET_FIELDS), History.changes[(field, 1)].as_string().isnot(None))
+            for field in fields
+        ]
+        changes = union_all(per_field, *change_sets).subquery()
+
+        ranked = select(
+            changes.c.apiaryId,
+            changes.c.field,
+            changes.c.value.label("newValue"),
+            func.row_number().over(
+                partition_by=(changes.c.apiaryId, changes.c.field),
+                order_by=(changes.c.changeDate.desc(), changes.c.id.desc())
+            ).label("position")
+        ).subquery()
+
+        latest_rows = self.db.execute(
+            select(ranked.c.apiaryId, ranked.c.field, ranked.c.newValue).where(ranked.c.position == 1)
+        ).all()
 
         apiary_ids = set()
         box = 0
         box_medium = 0
         box_small = 0
-        seen = set()
-
-        for row in history_rows:
-            key = (row.apiaryId, row.field)
-            if key in seen:
-                continue
 
+        for row in latest_rows:
             value = self._parse_history_int(row.newValue)
             if row.field == "box":
                 box += value
@@ -438,7 +601,6 @@ class ApiaryService:
                 box_small += value
 
             apiary_ids.add(row.apiaryId)
-            seen.add(key)
 
         return {
             "apiaryIds": apiary_ids,
@@ -448,9 +610,10 @@ class ApiaryService:
             "total": box + box_medium + box_small
         }
 
-    def count_harvested_today_apiaries_and_hives(self, user_id: int) -> dict:
+    @read_only
+    def count_harvested_today_apiaries_and_hives(self, user_id: int, tz: Optional[ZoneInfo] = None) -> dict:
         from sqlalchemy import func
-        data = self._get_harvested_today_changes(user_id)
+        data = self._get_harvested_today_changes(user_id, tz)
         apiary_ids = data["apiaryIds"]
         apiary_count = len(apiary_ids)
 
@@ -467,8 +630,9 @@ class ApiaryService:
             "hiveCount": hive_count
         }
 
-    def get_harvested_today_box_stats(self, user_id: int) -> dict:
-        data = self._get_harvested_today_changes(user_id)
+    @read_only
+    def get_harvested_today_box_stats(self, user_id: int, tz: Optional[ZoneInfo] = None) -> dict:
+        data = self._get_harvested_today_changes(user_id, tz)
         return {
             "box": data["box"],
             "boxMedium": data["boxMedium"],
@@ -5,20 +5,28 @@ from uuid import uuid4
 from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only
 
 from app.config import settings
 from app.constants import JWT_SECRET, JWT_ALGORITHM, BCRYPT_SALT_ROUNDS, JWT_EXPIRATION_DAYS
 from app.schemas.auth import AuthData, ForgotPasswordRequest, ResetPasswordRequest
 from app.schemas.user import CreateUser, LoginUser
-from app.services.user_service import UserService
+from app.models.user import User
+from app.services.user_service import UserService, invalidate_cached_user
+from app.utils.business_metrics import password_rehash_total, password_hashes_by_status
+from app.utils.password_hashing import run_password_task
 
 logger = logging.getLogger(__name__)
 
+# min/max fijos en el costo actual: needs_update() marca como desactualizado
+# cualquier hash bcrypt con otro costo (mayor o menor) y cualquier esquema
+# que no sea el primero de PASSWORD_HASH_SCHEMES
 pwd_context = CryptContext(
-    schemes=["bcrypt"],
+    schemes=settings.password_hash_scheme_list,
     deprecated="auto",
     bcrypt__rounds=BCRYPT_SALT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_SALT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_SALT_ROUNDS,
 )
 
 
@@ -33,6 +41,54 @@ class AuthService:
     def hash_password(self, password: str) -> str:
         return pwd_context.hash(password)
 
+    async def verify_password_async(self, plain_password: str, hashed_password: str) -> bool:
+        return await run_password_task("verify", pwd_context.verify, plain_password, hashed_password)
+
+    async def hash_password_async(self, password: str) -> str:
+        return await run_password_task("hash", pwd_context.hash, password)
+
+    async def verify_and_update_password(self, user: User, plain_password: str) -> bool:
+        """
+        Verifica la contraseña y, si el hash usa parámetros anteriores,
+        lo reemplaza por uno con los actuales. Un fallo al guardar el nuevo
+        hash no impide el login.
+        """
+        valid, new_hash = await run_password_task(
+            "verify", pwd_context.verify_and_update, plain_password, user.password
+        )
+        if not valid or new_hash is None:
+            return valid
+
+        try:
+            self.db.query(User).filter(User.id == user.id).update(
+                {"password": new_hash}, synchronize_session=False
+            )
+            self.db.commit()
+            invalidate_cached_user(user.id)
+            password_rehash_total.labels(status="success").inc()
+            logger.info(f"Password hash upgraded for user {user.id}")
+        except Exception as e:
+            self.db.rollback()
+            password_rehash_total.labels(status="failed").inc()
+            logger.warning(f"Could not upgrade password hash for user {user.id}: {e}")
+
+        return True
+
+    def refresh_password_hash_metrics(self) -> dict:
+        """
+        Cuenta cuántos hashes guardados usan los parámetros actuales.
+        needs_update() solo parsea el hash, no ejecuta bcrypt.
+        """
+        counts = {"current": 0, "outdated": 0}
+        users = self.db.query(User).options(load_only(User.password)).yield_per(1000)
+        for user in users:
+            status_key = "outdated" if pwd_context.needs_update(user.password) else "current"
+            counts[status_key] += 1
+
+        for status_key, count in counts.items():
+            password_hashes_by_status.labels(status=status_key).set(count)
+        return counts
+
     def create_access_token(self, data: dict) -> str:
         to_encode = data.copy()
         expire = datetime.now(timezone.utc) + timedelta(days=JWT_EXPIRATION_DAYS)
@@ -48,7 +104,7 @@ class AuthService:
                 detail="Invalid credentials",
             )
 
-        if not self.verify_password(login_data.password, user.password):
+        if not await self.verify_and_update_password(user, login_data.password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credentials",
@@ -66,30 +122,15 @@ class AuthService:
         )
 
     async def sign_up(self, signup_data: CreateUser) -> AuthData:
-        original_password = signup_data.password
-        encrypted_password = self.hash_password(signup_data.password)
-        signup_data.password = encrypted_password
+        signup_data.password = await self.hash_password_async(signup_data.password)
 
-        created_user = self.user_service.create_user(signup_data)
-        if not created_user:
+        user = self.user_service.create_user(signup_data)
+        if not user:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="User already exists",
             )
 
-        user = self.user_service.get_user_by_email(signup_data.email)
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="User creation failed",
-            )
-
-        if not self.verify_password(original_password, user.password):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid credentials",
-            )
-
         payload = {
             "username": user.email,
             "sub": str(user.id),
@@ -162,12 +203,13 @@ class AuthService:
                     detail="User not found",
                 )
 
-            hashed_password = self.hash_password(request.newPassword)
+            hashed_password = await self.hash_password_async(request.newPassword)
             user.password = hashed_password
 
             try:
                 self.db.commit()
                 self.db.refresh(user)
+                invalidate_cached_user(user.id)
                 logger.info(f"Password reset successful for user: {user.email}")
                 return {"message": "Contrasena restablecida exitosamente"}
             except Exception:
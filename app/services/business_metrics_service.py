@@ -0,0 +1,187 @@
+"""
+Cálculo de los gauges de negocio (usuarios, apiarios, colmenas,
+dispositivos, notificaciones pendientes).
+
+Lo ejecuta un job del scheduler, nunca una request. Para no competir con el
+tráfico de usuarios:
+
+- Tablas chicas se cuentan exacto. Por encima de
+  ``business_metrics_exact_count_threshold`` filas (en PostgreSQL) los totales
+  salen de ``pg_class.reltuples`` y los conteos filtrados / sumas de una
+  muestra ``TABLESAMPLE SYSTEM`` escalada al total estimado.
+- Cada query corre con ``statement_timeout`` acotado y un advisory lock
+  asegura que un solo worker calcule por ciclo.
+- Si el pool de conexiones está ocupado, el ciclo se saltea.
+"""
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy import case, func, select, tablesample, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.apiary import Apiary
+from app.models.device import Device
+from app.models.notification import Notification
+from app.models.user import User
+from app.utils.business_metrics import (
+    users_total,
+    apiaries_total,
+    hives_total,
+    devices_total,
+    devices_by_platform,
+    notifications_pending,
+)
+
+logger = logging.getLogger(__name__)
+
+# Clave del advisory lock compartida por todos los workers
+_COLLECTOR_LOCK_KEY = 0x6170695F6D6574  # "api_met"
+
+
+class BusinessMetricsService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.is_postgres = db.get_bind().dialect.name == "postgresql"
+
+    def is_database_busy(self) -> bool:
+        """True si el pool tiene más conexiones en uso que las toleradas."""
+        pool = self.db.get_bind().pool
+        checked_out = getattr(pool, "checkedout", None)
+        size = getattr(pool, "size", None)
+        if checked_out is None or size is None:
+            return False
+
+        if size() <= 0:
+            return False
+        return checked_out() / size() > settings.business_metrics_max_pool_usage
+
+    def collect(self) -> Optional[Dict[str, object]]:
+        """
+        Recalcula y publica los gauges de negocio.
+
+        Returns:
+            Valores publicados, o None si el ciclo se salteó (pool ocupado u
+            otro worker calculando)
+        """
+        if self.is_database_busy():
+            logger.info("Business metrics refresh skipped: connection pool busy")
+            return None
+
+        try:
+            if self.is_postgres:
+                self.db.execute(text(
+                    f"SET LOCAL statement_timeout = {int(settings.business_metrics_statement_timeout_ms)}"
+                ))
+                locked = self.db.execute(
+                    text("SELECT pg_try_advisory_xact_lock(:key)"),
+                    {"key": _COLLECTOR_LOCK_KEY},
+                ).scalar()
+                if not locked:
+                    logger.info("Business metrics refresh skipped: another worker holds the lock")
+                    return None
+
+            values = {
+                "users_total": self._count_users(),
+                "apiaries_total": self._count_apiaries(),
+                "hives_total": self._count_hives(),
+                "notifications_pending": self._count_pending_notifications(),
+                "devices_by_platform": self._count_devices_by_platform(),
+            }
+        finally:
+            # Solo lecturas: rollback libera el lock y el SET LOCAL
+            self.db.rollback()
+
+        values["devices_total"] = sum(values["devices_by_platform"].values())
+
+        users_total.set(values["users_total"])
+        apiaries_total.set(values["apiaries_total"])
+        hives_total.set(values["hives_total"])
+        notifications_pending.set(values["notifications_pending"])
+        devices_total.set(values["devices_total"])
+        for platform, count in values["devices_by_platform"].items():
+            devices_by_platform.labels(platform=platform).set(count)
+
+        return values
+
+    def _estimated_rows(self, model) -> Optional[int]:
+        """
+        Filas estimadas por el planner (pg_class.reltuples).
+        None fuera de PostgreSQL o si la tabla nunca se analizó.
+        """
+        if not self.is_postgres:
+            return None
+
+        reltuples = self.db.execute(
+            text(
+                "SELECT c.reltuples FROM pg_class c "
+                "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                "WHERE c.relname = :name AND n.nspname = current_schema()"
+            ),
+            {"name": model.__tablename__},
+        ).scalar()
+        if reltuples is None or reltuples < 0:
+            return None
+        return int(reltuples)
+
+    def _is_large(self, estimate: Optional[int]) -> bool:
+        return estimate is not None and estimate >= settings.business_metrics_exact_count_threshold
+
+    def _sample(self, model):
+        return tablesample(
+            model.__table__,
+            func.system(settings.business_metrics_sample_percent),
+        )
+
+    def _count_users(self) -> int:
+        estimate = self._estimated_rows(User)
+        if self._is_large(estimate):
+            return estimate
+        return self.db.query(func.count(User.id)).scalar() or 0
+
+    def _count_apiaries(self) -> int:
+        estimate = self._estimated_rows(Apiary)
+        if self._is_large(estimate):
+            return estimate
+        return self.db.query(func.count(Apiary.id)).scalar() or 0
+
+    def _count_hives(self) -> int:
+        estimate = self._estimated_rows(Apiary)
+        if self._is_large(estimate):
+            sample = self._sample(Apiary)
+            average = self.db.execute(
+                select(func.avg(func.coalesce(sample.c.hives, 0)))
+            ).scalar()
+            if average is not None:
+                return int(round(float(average) * estimate))
+        return int(self.db.query(func.coalesce(func.sum(Apiary.hives), 0)).scalar() or 0)
+
+    def _count_pending_notifications(self) -> int:
+        estimate = self._estimated_rows(Notification)
+        if self._is_large(estimate):
+            sample = self._sample(Notification)
+            ratio = self.db.execute(
+                select(func.avg(case((sample.c.isRead == False, 1), else_=0)))
+            ).scalar()
+            if ratio is not None:
+                return int(round(float(ratio) * estimate))
+        return self.db.query(func.count(Notification.id)).filter(
+            Notification.isRead == False
+        ).scalar() or 0
+
+    def _count_devices_by_platform(self) -> Dict[str, int]:
+        estimate = self._estimated_rows(Device)
+        if self._is_large(estimate):
+            sample = self._sample(Device)
+            rows = self.db.execute(
+                select(sample.c.platform, func.count()).group_by(sample.c.platform)
+            ).all()
+            sampled = sum(count for _, count in rows)
+            if sampled:
+                return {
+                    platform: int(round(count / sampled * estimate))
+                    for platform, count in rows
+                }
+
+        rows = self.db.query(Device.platform, func.count(Device.id)).group_by(Device.platform).all()
+        return {platform: count for platform, count in rows}
@@ -1,9 +1,37 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, Integer as SQLInteger, case
-from app.models.drum import Drum
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, and_, insert, lambda_stmt, select, update
+from app.config import settings
+from app.models.drum import Drum, DrumTotals
+from app.models.user import User
 from app.schemas.drum import DrumCreate, DrumUpdate
-from typing import List, Optional
+from app.utils.business_metrics import drum_totals_reconciled_total
+from app.utils.db import insert_on_conflict
+from app.utils.db_routing import read_only, read_only_scope
+from app.utils.pagination import keyset_condition
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime
 from decimal import Decimal
+import logging
+
+logger = logging.getLogger(__name__)
+
+TOTAL_COLUMNS = ("drumCount", "soldCount", "totalTare", "totalWeight")
+
+CODE_MAX_LENGTH = Drum.__table__.c.code.type.length
+# Mayor valor de Numeric(10, 2)
+MAX_AMOUNT = Decimal("99999999.99")
+
+
+def drum_contribution(drum: Any) -> Dict[str, Any]:
+    """Lo que suma un tambor a las columnas de drum_totals."""
+    return {
+        "drumCount": 1,
+        "soldCount": int(bool(drum.sold)),
+        "totalTare": Decimal(drum.tare or 0),
+        "totalWeight": Decimal(drum.weight or 0),
+    }
+
 
 class DrumService:
     def __init__(self, db: Session):
@@ -17,10 +45,93 @@ class DrumService:
             weight=drum_data.weight
         )
         self.db.add(drum)
-        self.db.commit()
+        try:
+            self.db.flush()
+            self._apply_totals(user_id, after=drum_contribution(drum))
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
         self.db.refresh(drum)
         return drum
     
+    def create_drums_bulk(self, user_id: int, drums: List[DrumCreate]) -> dict:
+        """
+        Alta de un lote de tambores escaneados. Valida todo el lote antes de
+        escribir, descarta códigos repetidos en el lote o ya registrados por el
+        usuario (una consulta) e inserta el resto en un solo INSERT, con un
+        commit. Los rechazos no frenan al resto del lote.
+
+        Returns:
+            {"created", "rejected", "results"}: un resultado por tambor, en el orden recibido
+        """
+        if len(drums) > settings.drum_bulk_max_items:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Se aceptan hasta {settings.drum_bulk_max_items} tambores por lote"
+            )
+
+        results = []
+        accepted = {}
+        for index, item in enumerate(drums):
+            code = item.code.strip()
+            error = self._bulk_item_error(code, item)
+            if error is not None:
+                result = {"index": index, "code": code, "status": "invalid", "error": error}
+            elif code in accepted:
+                result = {"index": index, "code": code, "status": "duplicate", "error": "Código repetido en el lote"}
+            else:
+                result = accepted[code] = {"index": index, "code": code, "status": "created"}
+            results.append(result)
+
+        if accepted:
+            existing = set(self.db.execute(
+                select(Drum.code).where(Drum.userId == user_id, Drum.code.in_(list(accepted)))
+            ).scalars())
+            for code in existing:
+                accepted.pop(code).update(status="duplicate", error="Código ya registrado")
+
+        new_drums = [drums[result["index"]] for result in accepted.values()]
+        if new_drums:
+            rows = [
+                {"userId": user_id, "code": result["code"], "tare": item.tare, "weight": item.weight, "sold": False}
+                for result, item in zip(accepted.values(), new_drums)
+            ]
+            try:
+                # Un INSERT ... VALUES (...), (...) RETURNING; los códigos del lote son únicos
+                ids = dict(self.db.execute(
+                    insert(Drum).values(rows).returning(Drum.code, Drum.id)
+                ).all())
+                self._apply_totals(user_id, after={
+                    "drumCount": len(rows),
+                    "totalTare": sum((row["tare"] for row in rows), Decimal(0)),
+                    "totalWeight": sum((row["weight"] for row in rows), Decimal(0)),
+                })
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+            for code, result in accepted.items():
+                result["id"] = ids[code]
+
+        return {
+            "created": len(accepted),
+            "rejected": len(results) - len(accepted),
+            "results": results,
+        }
+
+    @staticmethod
+    def _bulk_item_error(code: str, item: DrumCreate) -> Optional[str]:
+        if not code:
+            return "Código vacío"
+        if len(code) > CODE_MAX_LENGTH:
+            return f"Código de más de {CODE_MAX_LENGTH} caracteres"
+        for name, value in (("tara", item.tare), ("peso", item.weight)):
+            if not value.is_finite() or value < 0 or value > MAX_AMOUNT:
+                return f"El valor de {name} debe estar entre 0 y {MAX_AMOUNT}"
+        return None
+    
+    @read_only
     def get_drums(
         self, 
         user_id: int, 
@@ -36,24 +147,78 @@ class DrumService:
         total = query.count()
         offset = (page - 1) * limit
         
-        drums = query.order_by(Drum.createdAt.desc()).offset(offset).limit(limit).all()
+        drums = query.order_by(Drum.createdAt.desc(), Drum.id.desc()).offset(offset).limit(limit).all()
         return drums, total
     
+    @read_only
+    def get_drums_page(
+        self,
+        user_id: int,
+        sold: Optional[bool] = None,
+        limit: int = 50,
+        after: Optional[Tuple[datetime, int]] = None,
+        exact_total: bool = False
+    ) -> Tuple[List[Drum], Optional[Tuple[datetime, int]], int]:
+        """
+        Una página de tambores del más nuevo al más viejo, por (createdAt, id):
+        el costo no depende de cuántas páginas haya antes (sin OFFSET).
+
+        El total sale de drum_totals sin recorrer los tambores; con
+        ``exact_total``, o si el usuario no tiene fila, es un COUNT.
+
+        Returns:
+            (tambores, clave (createdAt, id) de la última fila si hay más páginas, total)
+        """
+        stmt = select(Drum).where(Drum.userId == user_id)
+        if sold is not None:
+            stmt = stmt.where(Drum.sold == sold)
+        if after is not None:
+            stmt = stmt.where(keyset_condition((Drum.createdAt, Drum.id), after, dialect=self.db.get_bind().dialect.name))
+        drums = self.db.execute(
+            stmt.order_by(Drum.createdAt.desc(), Drum.id.desc()).limit(limit + 1)
+        ).scalars().all()
+
+        next_key = None
+        if len(drums) > limit:
+            drums = drums[:limit]
+            next_key = (drums[-1].createdAt, drums[-1].id)
+        return drums, next_key, self._count_drums(user_id, sold, exact_total)
+    
+    def iter_drums(self, user_id: int, sold: Optional[bool] = None) -> Iterator[Drum]:
+        """Tambores del usuario, del más nuevo al más viejo, leídos de a lotes (yield_per) para exportar."""
+        stmt = select(Drum).where(Drum.userId == user_id)
+        if sold is not None:
+            stmt = stmt.where(Drum.sold == sold)
+        stmt = stmt.order_by(Drum.createdAt.desc(), Drum.id.desc()).execution_options(
+            yield_per=settings.history_stream_batch_size
+        )
+        # El scope cubre solo el execute: las filas se leen después, al enviar la respuesta
+        with read_only_scope():
+            result = self.db.execute(stmt).scalars()
+        yield from result
+    
     def get_drum_by_id(self, drum_id: int, user_id: int) -> Optional[Drum]:
-        return self.db.query(Drum).filter(
-            and_(Drum.id == drum_id, Drum.userId == user_id)
-        ).first()
+        stmt = lambda_stmt(
+            lambda: select(Drum).where(and_(Drum.id == drum_id, Drum.userId == user_id))
+        )
+        return self.db.execute(stmt).scalars().first()
     
     def update_drum(self, drum_id: int, user_id: int, updates: DrumUpdate) -> Optional[Drum]:
         drum = self.get_drum_by_id(drum_id, user_id)
         if not drum:
             return None
         
+        before = drum_contribution(drum)
         update_data = updates.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(drum, key, value)
         
-        self.db.commit()
+        try:
+            self._apply_totals(user_id, before, drum_contribution(drum))
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
         self.db.refresh(drum)
         return drum
     
@@ -65,8 +230,14 @@ class DrumService:
         if not drum:
             return False
         
+        before = drum_contribution(drum)
         self.db.delete(drum)
-        self.db.commit()
+        try:
+            self._apply_totals(user_id, before=before)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
         return True
     
     def delete_all_drums(self, user_id: int, sold: Optional[bool] = None) -> int:
@@ -75,68 +246,203 @@ class DrumService:
         if sold is not None:
             query = query.filter(Drum.sold == sold)
         
-        count = query.count()
-        query.delete(synchronize_session=False)
-        self.db.commit()
+        count = query.delete(synchronize_session=False)
+        try:
+            if count and settings.drum_totals_enabled:
+                self._store_totals([self._totals_row(user_id, self.compute_stats(user_id))])
+            elif count:
+                self._drop_totals(user_id)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
         return count
-    
-    def get_stats(self, user_id: int) -> dict:
-        # Contar totales
-        total = self.db.query(func.count(Drum.id)).filter(Drum.userId == user_id).scalar()
-        
-        # Contar vendidos y no vendidos
-        sold_count = self.db.query(func.count(Drum.id)).filter(
-            and_(Drum.userId == user_id, Drum.sold == True)
-        ).scalar()
-        
-        not_sold_count = self.db.query(func.count(Drum.id)).filter(
-            and_(Drum.userId == user_id, Drum.sold == False)
-        ).scalar()
-        
-        # Sumar taras y pesos
-        result = self.db.query(
-            func.sum(Drum.tare).label('total_tare'),
-            func.sum(Drum.weight).label('total_weight')
-        ).filter(Drum.userId == user_id).first()
-        
-        total_tare = float(result.total_tare or 0)
-        total_weight = float(result.total_weight or 0)
-        net_weight = total_weight - total_tare
-        
-        return {
-            "total": total or 0,
-            "sold": sold_count or 0,
-            "not_sold": not_sold_count or 0,
-            "total_tare": Decimal(str(total_tare)),
-            "total_weight": Decimal(str(total_weight)),
-            "net_weight": Decimal(str(net_weight))
-        }
-
-
-
-
-
-
-
-
-
-
-
-
-
 
+    @read_only
+    def get_stats(self, user_id: int) -> dict:
+        """
+        Estadísticas de los tambores del usuario: la fila de drum_totals (una
+        lectura por clave primaria) o, sin fila o con drum_totals apagado, el
+        cálculo completo (sin guardarlo).
+        """
+        if settings.drum_totals_enabled:
+            row = self.db.execute(
+                select(*[getattr(DrumTotals, column) for column in TOTAL_COLUMNS]).where(DrumTotals.userId == user_id)
+            ).first()
+            if row is not None:
+                return self._stats(row.drumCount, row.soldCount, row.totalTare, row.totalWeight)
+        return self.compute_stats(user_id)
 
+    def compute_stats(self, user_id: int) -> dict:
+        """Estadísticas calculadas desde drums en una sola consulta, con Decimal exacto."""
+        row = self.db.execute(
+            select(
+                func.count(Drum.id).label("total"),
+                func.count(Drum.id).filter(Drum.sold == True).label("sold"),
+                func.sum(Drum.tare).label("total_tare"),
+                func.sum(Drum.weight).label("total_weight"),
+            ).where(Drum.userId == user_id)
+        ).one()
+        return self._stats(row.total, row.sold, row.total_tare, row.total_weight)
 
+    def reconcile_totals(self, batch_size: Optional[int] = None) -> Dict[str, int]:
+        """
+        Recalcula drum_totals de todos los usuarios por lotes, con un commit por
+        lote, y reescribe las filas que faltan (usuarios con tambores) o no
+        coinciden. Corrige lo que cambió por fuera de la aplicación o mientras
+        drum_totals estuvo apagado.
 
+        Las filas del lote se bloquean (FOR UPDATE) antes de calcular: una
+        escritura concurrente espera y aplica su delta sobre el valor corregido.
+        """
+        batch_size = batch_size or settings.drum_totals_reconcile_batch_size
+        counts = {"checked": 0, "created": 0, "fixed": 0}
+        last_id = 0
 
+        while True:
+            user_ids = self.db.execute(
+                select(User.id).where(User.id > last_id).order_by(User.id).limit(batch_size)
+            ).scalars().all()
+            if not user_ids:
+                break
 
+            stored = {
+                row.userId: row
+                for row in self.db.execute(
+                    select(DrumTotals.userId, *[getattr(DrumTotals, column) for column in TOTAL_COLUMNS])
+                    .where(DrumTotals.userId.in_(user_ids))
+                    .with_for_update()
+                )
+            }
+            computed = self._compute_totals(user_ids)
+            rows = []
+            for user_id in user_ids:
+                current = stored.get(user_id)
+                values = computed.get(user_id)
+                if current is None:
+                    if values is None:
+                        continue
+                    counts["created"] += 1
+                else:
+                    values = values or dict.fromkeys(TOTAL_COLUMNS, 0)
+                    if all(getattr(current, column) == values[column] for column in TOTAL_COLUMNS):
+                        continue
+                    counts["fixed"] += 1
+                    logger.info(f"drum_totals de {user_id} corregido: {dict(current._mapping)} -> {values}")
+                rows.append({"userId": user_id, **values})
 
+            if rows:
+                self._store_totals(rows)
+            self.db.commit()
+            counts["checked"] += len(user_ids)
+            last_id = user_ids[-1]
 
+        drum_totals_reconciled_total.labels(result="created").inc(counts["created"])
+        drum_totals_reconciled_total.labels(result="fixed").inc(counts["fixed"])
+        return counts
 
+    def _compute_totals(self, user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Columnas de drum_totals calculadas desde drums, para los usuarios con tambores."""
+        rows = self.db.execute(
+            select(
+                Drum.userId,
+                func.count(Drum.id).label("drumCount"),
+                func.count(Drum.id).filter(Drum.sold == True).label("soldCount"),
+                func.sum(Drum.tare).label("totalTare"),
+                func.sum(Drum.weight).label("totalWeight"),
+            )
+            .where(Drum.userId.in_(user_ids))
+            .group_by(Drum.userId)
+        )
+        return {
+            row.userId: {
+                "drumCount": row.drumCount,
+                "soldCount": row.soldCount,
+                "totalTare": Decimal(row.totalTare or 0),
+                "totalWeight": Decimal(row.totalWeight or 0),
+            }
+            for row in rows
+        }
 
+    def _count_drums(self, user_id: int, sold: Optional[bool], exact: bool) -> int:
+        stmt = select(func.count(Drum.id)).where(Drum.userId == user_id)
+        if sold is not None:
+            stmt = stmt.where(Drum.sold == sold)
+        if settings.drum_totals_enabled and not exact:
+            # Una sola consulta: el COUNT solo se evalúa si el usuario no tiene fila
+            if sold is None:
+                stored = DrumTotals.drumCount
+            else:
+                stored = DrumTotals.soldCount if sold else DrumTotals.drumCount - DrumTotals.soldCount
+            stmt = select(func.coalesce(
+                select(stored).where(DrumTotals.userId == user_id).scalar_subquery(),
+                stmt.scalar_subquery(),
+            ))
+        return self.db.execute(stmt).scalar_one()
 
+    def _apply_totals(self, user_id: int, before: Optional[Dict[str, Any]] = None, after: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Suma ``after - before`` a la fila del usuario. No hace commit. Con
+        drum_totals apagado borra la fila, que dejaría de estar al día.
+        """
+        if not settings.drum_totals_enabled:
+            self._drop_totals(user_id)
+            return
+        before = before or {}
+        after = after or {}
+        delta = {column: after.get(column, 0) - before.get(column, 0) for column in TOTAL_COLUMNS}
+        delta = {column: value for column, value in delta.items() if value}
+        if not delta:
+            return
 
+        result = self.db.execute(
+            update(DrumTotals)
+            .where(DrumTotals.userId == user_id)
+            .values({getattr(DrumTotals, column): getattr(DrumTotals, column) + value for column, value in delta.items()})
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            # Usuario sin fila todavía: se calcula con la escritura en curso incluida
+            self.db.flush()
+            self._store_totals([self._totals_row(user_id, self.compute_stats(user_id))])
 
+    def _drop_totals(self, user_id: int) -> None:
+        # Al reactivar drum_totals, get_stats calcula hasta que una escritura o el job recrean la fila
+        self.db.execute(
+            delete(DrumTotals).where(DrumTotals.userId == user_id).execution_options(synchronize_session=False)
+        )
 
+    @staticmethod
+    def _totals_row(user_id: int, stats: dict) -> Dict[str, Any]:
+        return {
+            "userId": user_id,
+            "drumCount": stats["total"],
+            "soldCount": stats["sold"],
+            "totalTare": stats["total_tare"],
+            "totalWeight": stats["total_weight"],
+        }
 
+    def _store_totals(self, rows: List[Dict[str, Any]]) -> None:
+        """INSERT ... ON CONFLICT (userId) DO UPDATE de las filas dadas."""
+        stmt = insert_on_conflict(self.db, DrumTotals).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DrumTotals.userId],
+            set_={
+                **{column: stmt.excluded[column] for column in TOTAL_COLUMNS},
+                "updatedAt": func.current_timestamp(),
+            },
+        )
+        self.db.execute(stmt)
 
+    @staticmethod
+    def _stats(total, sold, total_tare, total_weight) -> dict:
+        total_tare = Decimal(total_tare or 0)
+        total_weight = Decimal(total_weight or 0)
+        return {
+            "total": total or 0,
+            "sold": sold or 0,
+            "not_sold": (total or 0) - (sold or 0),
+            "total_tare": total_tare,
+            "total_weight": total_weight,
+            "net_weight": total_weight - total_tare,
+        }
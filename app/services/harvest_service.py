@@ -0,0 +1,178 @@
+"""
+Libro de cosecha por temporada.
+
+Cada escritura que cambia las alzas de un apiario (box, boxMedium, boxSmall)
+agrega una fila a ``harvest_ledger`` y suma lo cosechado a
+``harvest_season_total`` (por apiario y por usuario, apiaryId = 0), en la
+misma transacción. Los reportes de temporada leen una fila por clave primaria
+en lugar de recorrer el historial.
+
+Lo cosechado en una temporada nunca baja de cero: si el contador baja (una
+corrección, o el apicultor lo vuelve a cero al empezar la temporada) se resta
+solo hasta lo ya cosechado en esa temporada.
+"""
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.harvest import HarvestLedger, HarvestSeasonTotal
+from app.models.history import History
+from app.utils.db import insert_on_conflict
+from app.utils.db_routing import read_only
+
+BOX_FIELDS = ("box", "boxMedium", "boxSmall")
+_HARVESTED_COLUMNS = {"box": "harvestedBox", "boxMedium": "harvestedBoxMedium", "boxSmall": "harvestedBoxSmall"}
+
+# apiaryId de la fila con el total del usuario
+USER_TOTAL = 0
+
+
+def season_of(value: datetime) -> int:
+    """Temporada (año en que empezó) de una fecha UTC."""
+    return value.year if value.month >= settings.harvest_season_start_month else value.year - 1
+
+
+def season_bounds(season: int) -> Tuple[date, date]:
+    """Intervalo semiabierto [inicio, fin) de la temporada."""
+    start = date(season, settings.harvest_season_start_month, 1)
+    return start, date(season + 1, settings.harvest_season_start_month, 1)
+
+
+def box_counts(apiary: Any) -> Dict[str, int]:
+    return {field: int(getattr(apiary, field) or 0) for field in BOX_FIELDS}
+
+
+class HarvestService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record(
+        self,
+        user_id: int,
+        apiary_id: int,
+        before: Mapping[str, Optional[int]],
+        after: Mapping[str, Optional[int]],
+        at: Optional[datetime] = None,
+    ) -> bool:
+        """
+        Registra el cambio de alzas de ``before`` a ``after``. No hace commit:
+        queda en la transacción de la escritura.
+
+        Returns:
+            True si las alzas cambiaron (y se agregó una fila al libro)
+        """
+        deltas = {field: int(after.get(field) or 0) - int(before.get(field) or 0) for field in BOX_FIELDS}
+        if not any(deltas.values()):
+            return False
+
+        season = season_of(at or datetime.utcnow())
+        current = self.db.execute(
+            select(*[getattr(HarvestSeasonTotal, field) for field in BOX_FIELDS])
+            .where(
+                HarvestSeasonTotal.userId == user_id,
+                HarvestSeasonTotal.season == season,
+                HarvestSeasonTotal.apiaryId == apiary_id,
+            )
+            .with_for_update()
+        ).first()
+        totals = dict(current._mapping) if current is not None else dict.fromkeys(BOX_FIELDS, 0)
+        harvested = {field: max(0, totals[field] + deltas[field]) - totals[field] for field in BOX_FIELDS}
+
+        self.db.execute(insert(HarvestLedger).values(
+            userId=user_id,
+            apiaryId=apiary_id,
+            season=season,
+            **deltas,
+            **{_HARVESTED_COLUMNS[field]: value for field, value in harvested.items()},
+            **({"createdAt": at} if at is not None else {}),
+        ))
+        if any(harvested.values()):
+            self._add_to_totals(user_id, season, apiary_id, harvested)
+        return True
+
+    @read_only
+    def get_season(self, user_id: int, season: Optional[int] = None, apiary_id: int = USER_TOTAL) -> dict:
+        """Alzas cosechadas en la temporada (por defecto la actual), del usuario o de un apiario."""
+        season = season_of(datetime.utcnow()) if season is None else season
+        row = self.db.execute(
+            select(*[getattr(HarvestSeasonTotal, field) for field in BOX_FIELDS]).where(
+                HarvestSeasonTotal.userId == user_id,
+                HarvestSeasonTotal.season == season,
+                HarvestSeasonTotal.apiaryId == apiary_id,
+            )
+        ).first()
+        return self._season_item(season, dict(row._mapping) if row is not None else dict.fromkeys(BOX_FIELDS, 0))
+
+    @read_only
+    def list_seasons(self, user_id: int) -> List[dict]:
+        """Totales del usuario en cada temporada con cosecha, de la más reciente a la más vieja."""
+        rows = self.db.execute(
+            select(HarvestSeasonTotal.season, *[getattr(HarvestSeasonTotal, field) for field in BOX_FIELDS])
+            .where(HarvestSeasonTotal.userId == user_id, HarvestSeasonTotal.apiaryId == USER_TOTAL)
+            .order_by(HarvestSeasonTotal.season.desc())
+        ).all()
+        return [self._season_item(row.season, {field: getattr(row, field) for field in BOX_FIELDS}) for row in rows]
+
+    def backfill_from_history(self, after_id: int = 0, batch_size: int = 1000, model=History) -> Tuple[int, Optional[int]]:
+        """
+        Carga en el libro los cambios de alzas de un lote del historial de
+        apiarios, en orden de id (el de inserción, y por lo tanto de fecha).
+        No hace commit.
+
+        Returns:
+            (cambios registrados, último id procesado o None si no quedan filas)
+        """
+        from app.services.history_service import HistoryService
+
+        rows = self.db.execute(
+            select(model).where(model.id > after_id).order_by(model.id).limit(batch_size)
+        ).scalars().all()
+        if not rows:
+            return 0, None
+
+        recorded = 0
+        for entry, before, after in self._box_changes(rows, HistoryService.change_set_of):
+            if self.record(entry.userId, entry.apiaryId, before, after, at=entry.changeDate):
+                recorded += 1
+        for row in rows:
+            self.db.expunge(row)
+        return recorded, rows[-1].id
+
+    @staticmethod
+    def _box_changes(rows, change_set_of) -> Iterator[Tuple[Any, Dict[str, Any], Dict[str, Any]]]:
+        for entry in rows:
+            changes = change_set_of(entry)
+            if not any(field in changes for field in BOX_FIELDS):
+                continue
+            before = {field: changes[field][0] for field in BOX_FIELDS if field in changes}
+            after = {field: changes[field][1] for field in BOX_FIELDS if field in changes}
+            yield entry, before, after
+
+    def _add_to_totals(self, user_id: int, season: int, apiary_id: int, harvested: Dict[str, int]) -> None:
+        # Fila del apiario y del usuario en un solo INSERT ... ON CONFLICT DO UPDATE
+        stmt = insert_on_conflict(self.db, HarvestSeasonTotal).values([
+            {"userId": user_id, "season": season, "apiaryId": apiary_id, **harvested},
+            {"userId": user_id, "season": season, "apiaryId": USER_TOTAL, **harvested},
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[HarvestSeasonTotal.userId, HarvestSeasonTotal.season, HarvestSeasonTotal.apiaryId],
+            set_={
+                **{field: getattr(HarvestSeasonTotal, field) + stmt.excluded[field] for field in BOX_FIELDS},
+                "updatedAt": func.current_timestamp(),
+            },
+        )
+        self.db.execute(stmt)
+
+    @staticmethod
+    def _season_item(season: int, boxes: Dict[str, int]) -> dict:
+        start, end = season_bounds(season)
+        return {
+            "season": season,
+            "start": start,
+            "end": end,
+            **boxes,
+            "total": sum(boxes.values()),
+        }
@@ -0,0 +1,184 @@
+"""
+Archivo y retención del historial de apiarios.
+
+``apiary_history`` solo guarda los últimos ``history_hot_days`` días, que son
+los que leen los endpoints y las estadísticas. Un job diario:
+
+- mueve lo más viejo a ``apiary_history_archive`` (en PostgreSQL particionada
+  por mes sobre ``changeDate``; las particiones se crean al mover);
+- borra de ambas tablas lo que supera la retención del plan del usuario
+  (``TIER_HISTORY_RETENTION_MONTHS``). El borrado es opt-in
+  (``history_retention_purge_enabled``); apagado, el job solo cuenta las filas
+  que borraría. Un usuario que perdió el plan conserva su retención durante
+  ``history_retention_grace_days`` (p. ej. mientras llega el webhook de la
+  renovación).
+
+Todo se hace en lotes de ``history_archive_batch_size`` filas, con un commit
+por lote, para no retener locks largos sobre la tabla caliente.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, case, delete, func, insert, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.history import History, HistoryArchive
+from app.models.subscription import Subscription
+from app.schemas.subscription import TIER_HISTORY_RETENTION_MONTHS
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_TIER = "aprendiz"
+_ARCHIVE_COLUMNS = ("id", "userId", "apiaryId", "field", "previousValue", "newValue", "changes", "changeDate")
+
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    """Primer día del mes ``months`` meses después (o antes) del de ``value``."""
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+class HistoryArchiveService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.is_postgres = db.get_bind().dialect.name == "postgresql"
+
+    def run(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Archiva y purga (o, con la purga apagada, cuenta lo purgable).
+        Devuelve las filas afectadas por cada paso.
+        """
+        now = now or datetime.utcnow()
+        archived = self.archive_old_history(now)
+        dry_run = not settings.history_retention_purge_enabled
+        expired = self.purge_expired_history(now, dry_run=dry_run)
+        return {
+            "archived": archived,
+            "purged": 0 if dry_run else expired,
+            "purgeable": expired if dry_run else 0,
+        }
+
+    def archive_old_history(self, now: Optional[datetime] = None) -> int:
+        """Mueve a apiary_history_archive los cambios más viejos que history_hot_days."""
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(days=settings.history_hot_days)
+        columns = [getattr(History, name) for name in _ARCHIVE_COLUMNS]
+        moved = 0
+
+        while True:
+            ids = self._next_batch(History, History.changeDate < cutoff)
+            if not ids:
+                break
+
+            if self.is_postgres:
+                self._ensure_partitions(ids)
+
+            self.db.execute(
+                insert(HistoryArchive).from_select(
+                    list(_ARCHIVE_COLUMNS),
+                    select(*columns).where(History.id.in_(ids)),
+                )
+            )
+            self.db.execute(delete(History).where(History.id.in_(ids)))
+            self.db.commit()
+            moved += len(ids)
+
+            if len(ids) < settings.history_archive_batch_size:
+                break
+
+        if moved:
+            logger.info(f"Historial de apiarios: {moved} filas archivadas (anteriores a {cutoff:%Y-%m-%d})")
+        return moved
+
+    def purge_expired_history(self, now: Optional[datetime] = None, dry_run: bool = False) -> int:
+        """
+        Borra el historial que supera la retención del plan de cada usuario.
+        Con ``dry_run`` solo cuenta las filas que borraría.
+        """
+        now = now or datetime.utcnow()
+        purged = 0
+
+        for tier, months in TIER_HISTORY_RETENTION_MONTHS.items():
+            if months is None:
+                continue
+
+            cutoff = add_months(month_start(now), -months)
+            users = self._users_with_tier(tier, now)
+            for model in (History, HistoryArchive):
+                condition = and_(model.changeDate < cutoff, users(model.userId))
+                if dry_run:
+                    purged += self.db.execute(select(func.count(model.id)).where(condition)).scalar_one()
+                else:
+                    purged += self._delete_in_batches(model, condition)
+
+        if purged and dry_run:
+            logger.info(
+                f"Historial de apiarios: {purged} filas superan la retención "
+                f"(HISTORY_RETENTION_PURGE_ENABLED=false, no se borran)"
+            )
+        elif purged:
+            logger.info(f"Historial de apiarios: {purged} filas purgadas por retención")
+        return purged
+
+    def _users_with_tier(self, tier: str, now: datetime):
+        """
+        Condición "el usuario tiene este plan a efectos de retención". Misma
+        regla que SubscriptionService.get_tier (sin suscripción, inactiva o
+        vencida es aprendiz), pero el plan se conserva hasta
+        history_retention_grace_days después de expiresAt (o del cambio de
+        estado, si no tiene vencimiento).
+        """
+        grace_cutoff = now - timedelta(days=settings.history_retention_grace_days)
+        keeps_tier = or_(
+            and_(Subscription.status == "active", Subscription.expiresAt.is_(None)),
+            func.coalesce(Subscription.expiresAt, Subscription.updatedAt) >= grace_cutoff,
+        )
+        effective_tier = case((keeps_tier, Subscription.tier), else_=_DEFAULT_TIER)
+        with_tier = select(Subscription.userId).where(effective_tier == tier)
+
+        if tier != _DEFAULT_TIER:
+            return lambda user_id: user_id.in_(with_tier)
+
+        subscribed = select(Subscription.userId)
+        return lambda user_id: or_(user_id.in_(with_tier), user_id.not_in(subscribed))
+
+    def _next_batch(self, model, condition) -> List[int]:
+        return list(self.db.execute(
+            select(model.id).where(condition).order_by(model.id).limit(settings.history_archive_batch_size)
+        ).scalars())
+
+    def _delete_in_batches(self, model, condition) -> int:
+        deleted = 0
+        while True:
+            ids = self._next_batch(model, condition)
+            if not ids:
+                return deleted
+
+            self.db.execute(delete(model).where(model.id.in_(ids)))
+            self.db.commit()
+            deleted += len(ids)
+
+            if len(ids) < settings.history_archive_batch_size:
+                return deleted
+
+    def _ensure_partitions(self, ids: List[int]) -> None:
+        """Crea las particiones mensuales que necesita el lote (solo PostgreSQL)."""
+        first, last = self.db.execute(
+            select(func.min(History.changeDate), func.max(History.changeDate)).where(History.id.in_(ids))
+        ).one()
+
+        month = month_start(first)
+        while month <= last:
+            following = add_months(month, 1)
+            self.db.execute(text(
+                f'CREATE TABLE IF NOT EXISTS apiary_history_archive_{month:%Y_%m} '
+                f'PARTITION OF apiary_history_archive '
+                f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{following:%Y-%m-%d}')"
+            ))
+            month = following
@@ -0,0 +1,275 @@
+"""
+Series de tiempo del historial de apiarios y colmenas, para gráficos.
+
+Agrupa los valores registrados de campos numéricos por día, semana (lunes) o
+mes en la zona horaria del cliente, y devuelve por período el último valor,
+la suma, el mínimo y el máximo. Todo se calcula en la base (una consulta);
+la respuesta son arreglos alineados con la lista de períodos:
+
+    {"bucket": "day", "buckets": ["2024-05-01", "2024-05-03"],
+     "series": {"honey": {"last": [10.0, 12.5]}}}
+
+Los resultados se cachean por apiario/colmena y se descartan cuando se
+confirma (commit) una fila nueva de historial de ese apiario/colmena.
+"""
+from datetime import datetime
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+from fastapi import HTTPException, status
+from sqlalchemy import Float, Integer, Numeric, case, cast, event, func, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.apiary import Apiary
+from app.models.hive import Hive
+from app.models.history import History, HistoryArchive
+from app.models.hive_history import HiveHistory
+from app.utils.cache import LRUCache
+from app.utils.db_routing import read_only
+
+SERIES_BUCKETS = ("day", "week", "month")
+SERIES_AGGREGATES = ("last", "sum", "min", "max")
+
+# Campos numéricos registrados en cada historial
+APIARY_SERIES_FIELDS = (
+    'hives', 'honey', 'levudex', 'sugar', 'box', 'boxMedium', 'boxSmall',
+    'tOxalic', 'tAmitraz', 'tFlumetrine', 'tFence', 'transhumance',
+)
+HIVE_SERIES_FIELDS = (
+    'honey', 'levudex', 'sugar', 'tOxalic', 'tAmitraz', 'tFlumetrine',
+    'box', 'boxMedium', 'boxSmall', 'production', 'population',
+    'broodFrames', 'honeyFrames', 'pollenFrames',
+)
+
+# (tipo, id) -> {parámetros de la consulta: respuesta}
+series_cache = LRUCache(
+    "history_series",
+    max_size=settings.history_series_cache_size,
+    default_ttl=settings.history_series_cache_ttl_seconds,
+)
+# Variantes (campos, período, fechas...) guardadas por apiario/colmena
+_MAX_VARIANTS = 16
+_PENDING_KEY = "history_series_stale"
+
+
+def mark_series_stale(db: Session, kind: str, entity_id: int) -> None:
+    """
+    Descarta las series cacheadas de ``kind`` ("apiary" | "hive") cuando la
+    transacción de ``db`` haga commit. Antes no: otra request podría volver a
+    cachear los valores viejos mientras la fila nueva no es visible.
+    """
+    db.info.setdefault(_PENDING_KEY, set()).add((kind, entity_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _discard_stale_series(session):
+    for key in session.info.pop(_PENDING_KEY, ()):
+        series_cache.delete(key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_stale_series(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _converters(model, fields: Iterable[str]):
+    # Los valores salen de JSON como float: se devuelven con el tipo de la columna
+    converters = {}
+    for field in fields:
+        column_type = model.__table__.c[field].type
+        if isinstance(column_type, Integer):
+            converters[field] = lambda value: int(round(value))
+        elif isinstance(column_type, Numeric) and column_type.scale is not None:
+            converters[field] = lambda value, scale=column_type.scale: round(value, scale)
+        else:
+            converters[field] = float
+    return converters
+
+
+_APIARY_CONVERTERS = _converters(Apiary, APIARY_SERIES_FIELDS)
+_HIVE_CONVERTERS = _converters(Hive, HIVE_SERIES_FIELDS)
+
+
+class HistorySeriesService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    @read_only
+    def apiary_series(
+        self,
+        apiary_id: int,
+        fields: Sequence[str],
+        bucket: str = "day",
+        aggregates: Sequence[str] = ("last",),
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        tz: Optional[ZoneInfo] = None,
+        include_archived: bool = False,
+    ) -> dict:
+        """
+        Series del apiario. Lee los conjuntos de cambios (valor nuevo de cada
+        campo) y las filas viejas por campo; con include_archived también
+        apiary_history_archive.
+        """
+        fields = self._validate(fields, APIARY_SERIES_FIELDS)
+        params = (tuple(fields), bucket, tuple(aggregates), since, until, self._tz(tz).key, include_archived)
+
+        def selects(field, bucket_of):
+            models = (History, HistoryArchive) if include_archived else (History,)
+            for model in models:
+                # Los Numeric se guardan como texto ("12.50"): CAST explícito también en SQLite,
+                # donde as_float() es un JSON_EXTRACT sin conversión
+                value = cast(model.changes[(field, 1)].as_string(), Float)
+                yield self._source(field, bucket_of, value, model.changeDate, model.id, since, until).where(
+                    model.apiaryId == apiary_id,
+                    model.changes.isnot(None),
+                    value.isnot(None),
+                )
+                yield self._source(
+                    field, bucket_of, cast(model.newValue, Float), model.changeDate, model.id, since, until
+                ).where(
+                    model.apiaryId == apiary_id,
+                    model.changes.is_(None),
+                    model.field == field,
+                    model.newValue != '',
+                )
+
+        return self._cached(("apiary", apiary_id), params, lambda: self._series(
+            fields, bucket, aggregates, self._tz(tz), selects, _APIARY_CONVERTERS
+        ))
+
+    @read_only
+    def hive_series(
+        self,
+        hive_id: int,
+        user_id: int,
+        fields: Sequence[str],
+        bucket: str = "day",
+        aggregates: Sequence[str] = ("last",),
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        tz: Optional[ZoneInfo] = None,
+    ) -> dict:
+        """Series de la colmena a partir de hive_history.changes (valores nuevos)."""
+        fields = self._validate(fields, HIVE_SERIES_FIELDS)
+        params = (tuple(fields), bucket, tuple(aggregates), since, until, self._tz(tz).key)
+
+        def selects(field, bucket_of):
+            value = HiveHistory.changes[field].as_float()
+            yield self._source(field, bucket_of, value, HiveHistory.date, HiveHistory.id, since, until).where(
+                HiveHistory.hiveId == hive_id,
+                HiveHistory.userId == user_id,
+                value.isnot(None),
+            )
+
+        return self._cached(("hive", hive_id), params, lambda: self._series(
+            fields, bucket, aggregates, self._tz(tz), selects, _HIVE_CONVERTERS
+        ))
+
+    def _cached(self, key: Tuple[str, int], params: tuple, compute) -> dict:
+        variants = series_cache.get(key)
+        if variants is not None and params in variants:
+            return variants[params]
+
+        result = compute()
+        variants = dict(variants or {})
+        variants[params] = result
+        while len(variants) > _MAX_VARIANTS:
+            variants.pop(next(iter(variants)))
+        series_cache.set(key, variants)
+        return result
+
+    def _series(self, fields, bucket, aggregates, tz, selects, converters) -> dict:
+        bucket_of = self._bucket_expression(bucket, tz)
+        sources = [stmt for field in fields for stmt in selects(field, bucket_of)]
+        rows = (union_all(*sources) if len(sources) > 1 else sources[0]).subquery()
+
+        # El último valor de cada período: fila 1 por (campo, período) del más nuevo al más viejo
+        ranked = select(
+            rows.c.field,
+            rows.c.bucket,
+            rows.c.value,
+            func.row_number().over(
+                partition_by=(rows.c.field, rows.c.bucket),
+                order_by=(rows.c.date.desc(), rows.c.id.desc()),
+            ).label("position"),
+        ).subquery()
+        stmt = (
+            select(
+                ranked.c.field,
+                ranked.c.bucket,
+                func.max(case((ranked.c.position == 1, ranked.c.value))).label("last"),
+                func.sum(ranked.c.value).label("sum"),
+                func.min(ranked.c.value).label("min"),
+                func.max(ranked.c.value).label("max"),
+            )
+            .group_by(ranked.c.field, ranked.c.bucket)
+            .order_by(ranked.c.bucket)
+        )
+        result = self.db.execute(stmt).all()
+
+        buckets = sorted({self._bucket_label(row.bucket) for row in result})
+        position = {label: index for index, label in enumerate(buckets)}
+        series = {
+            field: {aggregate: [None] * len(buckets) for aggregate in aggregates}
+            for field in fields
+        }
+        for row in result:
+            index = position[self._bucket_label(row.bucket)]
+            convert = converters[row.field]
+            for aggregate in aggregates:
+                value = getattr(row, aggregate)
+                series[row.field][aggregate][index] = None if value is None else convert(value)
+
+        return {"bucket": bucket, "buckets": buckets, "series": series}
+
+    @staticmethod
+    def _source(field, bucket_of, value, date_column, id_column, since, until):
+        stmt = select(
+            literal(field).label("field"),
+            bucket_of(date_column).label("bucket"),
+            value.label("value"),
+            date_column.label("date"),
+            id_column.label("id"),
+        )
+        if since is not None:
+            stmt = stmt.where(date_column >= since)
+        if until is not None:
+            stmt = stmt.where(date_column < until)
+        return stmt
+
+    def _bucket_expression(self, bucket: str, tz: ZoneInfo):
+        """Inicio del período (día, lunes o día 1) de una fecha UTC naive, en ``tz``."""
+        if self.db.get_bind().dialect.name == "postgresql":
+            return lambda column: func.date_trunc(bucket, func.timezone(tz.key, func.timezone("UTC", column)))
+
+        # SQLite no conoce zonas horarias: se usa el desfase actual de tz
+        offset = datetime.now(tz).utcoffset()
+        modifiers = [f"{int(offset.total_seconds() // 60):+d} minutes"]
+        if bucket == "week":
+            modifiers += ["weekday 0", "-6 days"]
+        elif bucket == "month":
+            modifiers.append("start of month")
+        return lambda column: func.date(column, *modifiers)
+
+    @staticmethod
+    def _bucket_label(value: Any) -> str:
+        if isinstance(value, datetime):
+            return value.date().isoformat()
+        return str(value)[:10]
+
+    @staticmethod
+    def _tz(tz: Optional[ZoneInfo]) -> ZoneInfo:
+        return tz or ZoneInfo(settings.default_timezone)
+
+    @staticmethod
+    def _validate(fields: Sequence[str], allowed: Sequence[str]) -> List[str]:
+        unknown = [field for field in fields if field not in allowed]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown series field: {', '.join(unknown)}"
+            )
+        # Sin repetidos, en el orden pedido
+        return list(dict.fromkeys(fields))
@@ -1,75 +1,241 @@
+"""
+Historial de apiarios.
+
+Cada alta o edición es una sola fila de ``apiary_history`` con el conjunto de
+cambios en ``changes`` (JSON, valores tipados):
+
+    {"hives": [5, 15], "honey": ["0.00", "12.50"]}    # campo -> [anterior, nuevo]
+
+Los campos Numeric se guardan como texto con la escala de la columna (sin
+pasar por float) y se leen de vuelta como Decimal.
+
+``field`` marca el tipo de fila: ``__created__`` (alta, anteriores en null) o
+``__changes__`` (edición). Las filas viejas, una por campo con valores en
+texto (``changes`` NULL), se siguen leyendo hasta que
+``scripts/migrate_history_changesets.py`` las convierte.
+"""
+from sqlalchemy import Integer, Numeric, delete, insert, select
 from sqlalchemy.orm import Session
+from app.models.apiary import Apiary
 from app.models.history import History
-from typing import List, Any
+from app.services.history_series_service import mark_series_stale
+from decimal import Decimal, InvalidOperation
+from itertools import groupby
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Campos del apiario que se registran en el historial, en orden fijo
+TRACKED_FIELDS: Tuple[str, ...] = (
+    'name', 'hives', 'status', 'image', 'honey', 'levudex', 'sugar',
+    'box', 'boxMedium', 'boxSmall', 'tOxalic', 'tAmitraz', 'tFlumetrine',
+    'tFence', 'tComment', 'transhumance', 'managementType',
+)
+
+# Valores de field de las filas con conjunto de cambios
+CREATION_FIELD = "__created__"
+CHANGESET_FIELD = "__changes__"
+CHANGESET_FIELDS = (CREATION_FIELD, CHANGESET_FIELD)
+
+# Lee los 17 campos de una vez (un solo llamado en C en lugar de 17 getattr)
+_read_tracked = attrgetter(*TRACKED_FIELDS)
+
+
+def _parser_for(column_type) -> Callable[[str], Any]:
+    if isinstance(column_type, Integer):
+        return lambda text: int(float(text))
+    if isinstance(column_type, Numeric):
+        return Decimal
+    return str
+
+
+def _formatter_for(column_type) -> Callable[[Any], str]:
+    # Mismo texto que guardaba el formato por campo (str del valor leído de la base)
+    if isinstance(column_type, Numeric) and column_type.scale is not None:
+        return lambda value: f"{Decimal(str(value)):.{column_type.scale}f}"
+    return str
+
+
+_PARSERS = {field: _parser_for(Apiary.__table__.c[field].type) for field in TRACKED_FIELDS}
+_FORMATTERS = {field: _formatter_for(Apiary.__table__.c[field].type) for field in TRACKED_FIELDS}
+# Escala de los campos Numeric (honey, levudex, sugar)
+_SCALES = {
+    field: Apiary.__table__.c[field].type.scale
+    for field in TRACKED_FIELDS
+    if isinstance(Apiary.__table__.c[field].type, Numeric)
+}
+
+
+def encode_value(field: str, value: Any) -> Any:
+    """Valor para el JSON de changes: los Numeric como texto con la escala de la columna."""
+    scale = _SCALES.get(field)
+    if scale is None or value is None:
+        return value
+    return f"{Decimal(str(value)):.{scale}f}"
+
+
+def decode_value(field: str, value: Any) -> Any:
+    """Valor tipado de un valor de changes: los Numeric vuelven a Decimal (también los guardados como float)."""
+    scale = _SCALES.get(field)
+    if scale is None or value is None:
+        return value
+    try:
+        return Decimal(str(value)).quantize(Decimal(1).scaleb(-scale))
+    except InvalidOperation:
+        return value
+
+
+def _encode_change_set(changes: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+    return {field: [encode_value(field, old), encode_value(field, new)] for field, (old, new) in changes.items()}
+
+
+def parse_legacy_value(field: str, text: Optional[str]) -> Any:
+    """Valor tipado de un previousValue/newValue del formato por campo."""
+    if text in (None, ''):
+        return None
+    parser = _PARSERS.get(field, str)
+    try:
+        return parser(text)
+    except (TypeError, ValueError):
+        return text
+
+
+def format_value(field: str, value: Any) -> str:
+    """Texto de un valor tipado, como lo devolvía el formato por campo."""
+    if value is None:
+        return ''
+    return _FORMATTERS.get(field, str)(value)
+
 
 class HistoryService:
     def __init__(self, db: Session):
         self.db = db
-    
-    def log_changes(self, old_apiary: Any, new_apiary: Any):
-        changes = self._find_differences(old_apiary, new_apiary)
-        
-        for change in changes:
-            history_entry = History(
-                userId=old_apiary.userId,
-                apiaryId=old_apiary.id,
-                field=change['field'],
-                previousValue=change['previousValue'],
-                newValue=change['newValue']
-            )
-            self.db.add(history_entry)
-        
-        self.db.commit()
-    
-    def _find_differences(self, old_apiary: Any, new_apiary: Any) -> List[dict]:
-        changes = []
-        old_dict = {
-            'name': getattr(old_apiary, 'name', None),
-            'hives': getattr(old_apiary, 'hives', None),
-            'status': getattr(old_apiary, 'status', None),
-            'image': getattr(old_apiary, 'image', None),
-            'honey': getattr(old_apiary, 'honey', None),
-            'levudex': getattr(old_apiary, 'levudex', None),
-            'sugar': getattr(old_apiary, 'sugar', None),
-            'box': getattr(old_apiary, 'box', None),
-            'boxMedium': getattr(old_apiary, 'boxMedium', None),
-            'boxSmall': getattr(old_apiary, 'boxSmall', None),
-            'tOxalic': getattr(old_apiary, 'tOxalic', None),
-            'tAmitraz': getattr(old_apiary, 'tAmitraz', None),
-            'tFlumetrine': getattr(old_apiary, 'tFlumetrine', None),
-            'tFence': getattr(old_apiary, 'tFence', None),
-            'tComment': getattr(old_apiary, 'tComment', None),
-            'transhumance': getattr(old_apiary, 'transhumance', None),
-            'managementType': getattr(old_apiary, 'managementType', None)
+
+    @staticmethod
+    def snapshot(apiary: Any) -> Tuple[Any, ...]:
+        """Valores actuales de TRACKED_FIELDS, para comparar después de editar."""
+        return _read_tracked(apiary)
+
+    def log_changes(self, old_values: Sequence[Any], new_apiary: Any) -> int:
+        """
+        Registra los campos que cambiaron respecto de ``old_values`` (ver snapshot)
+        como una fila. No hace commit: queda en la transacción del llamador.
+
+        Returns:
+            Cantidad de campos que cambiaron
+        """
+        changes = self.build_change_set(old_values, self.snapshot(new_apiary))
+        return self._insert(new_apiary, CHANGESET_FIELD, changes)
+
+    def log_creation(self, apiary: Any) -> int:
+        """Registra el alta de un apiario: una fila con los valores iniciales."""
+        changes = self.build_change_set((None,) * len(TRACKED_FIELDS), self.snapshot(apiary))
+        return self._insert(apiary, CREATION_FIELD, changes)
+
+    @staticmethod
+    def build_change_set(old_values: Sequence[Any], new_values: Sequence[Any]) -> Dict[str, List[Any]]:
+        return {
+            field: [encode_value(field, old), encode_value(field, new)]
+            for field, old, new in zip(TRACKED_FIELDS, old_values, new_values)
+            if old != new
         }
-        
-        new_dict = {
-            'name': getattr(new_apiary, 'name', None),
-            'hives': getattr(new_apiary, 'hives', None),
-            'status': getattr(new_apiary, 'status', None),
-            'image': getattr(new_apiary, 'image', None),
-            'honey': getattr(new_apiary, 'honey', None),
-            'levudex': getattr(new_apiary, 'levudex', None),
-            'sugar': getattr(new_apiary, 'sugar', None),
-            'box': getattr(new_apiary, 'box', None),
-            'boxMedium': getattr(new_apiary, 'boxMedium', None),
-            'boxSmall': getattr(new_apiary, 'boxSmall', None),
-            'tOxalic': getattr(new_apiary, 'tOxalic', None),
-            'tAmitraz': getattr(new_apiary, 'tAmitraz', None),
-            'tFlumetrine': getattr(new_apiary, 'tFlumetrine', None),
-            'tFence': getattr(new_apiary, 'tFence', None),
-            'tComment': getattr(new_apiary, 'tComment', None),
-            'transhumance': getattr(new_apiary, 'transhumance', None),
-            'managementType': getattr(new_apiary, 'managementType', None)
+
+    @staticmethod
+    def change_set_of(entry: Any) -> Dict[str, List[Any]]:
+        """Conjunto de cambios tipado de una fila, en cualquiera de los formatos."""
+        if entry.changes is not None:
+            return {
+                field: [decode_value(field, old), decode_value(field, new)]
+                for field, (old, new) in entry.changes.items()
+            }
+        return {
+            entry.field: [
+                parse_legacy_value(entry.field, entry.previousValue),
+                parse_legacy_value(entry.field, entry.newValue),
+            ]
         }
-        
-        for key in old_dict:
-            if old_dict[key] != new_dict[key]:
-                changes.append({
-                    'field': key,
-                    'previousValue': str(old_dict[key]) if old_dict[key] is not None else '',
-                    'newValue': str(new_dict[key]) if new_dict[key] is not None else ''
-                })
-        
-        return changes
 
+    @classmethod
+    def expand(cls, entry: Any) -> List[dict]:
+        """Cambios por campo (field, previousValue, newValue en texto) de una fila."""
+        if entry.changes is None:
+            return [{
+                'field': entry.field,
+                'previousValue': entry.previousValue,
+                'newValue': entry.newValue,
+            }]
+
+        changes = cls.change_set_of(entry)
+        return [
+            {
+                'field': field,
+                'previousValue': format_value(field, changes[field][0]),
+                'newValue': format_value(field, changes[field][1]),
+            }
+            for field in TRACKED_FIELDS
+            if field in changes
+        ]
+
+    def convert_legacy_batch(self, model=History, after_id: int = 0, batch_size: int = 1000) -> Tuple[int, Optional[int]]:
+        """
+        Convierte filas del formato por campo a conjuntos de cambios, en orden de id.
+        Las filas de una misma edición (mismo apiario, usuario y changeDate) se
+        unen en una. No hace commit.
+
+        Returns:
+            (filas convertidas, último id procesado o None si no quedan filas)
+        """
+        rows = self.db.execute(
+            select(model)
+            .where(model.id > after_id, model.changes.is_(None))
+            .order_by(model.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not rows:
+            return 0, None
+
+        groups = [
+            list(group)
+            for _, group in groupby(rows, key=lambda row: (row.apiaryId, row.userId, row.changeDate))
+        ]
+        # La última edición puede seguir en el próximo lote
+        if len(rows) == batch_size and len(groups) > 1:
+            groups.pop()
+
+        converted = 0
+        for group in groups:
+            changes: Dict[str, List[Any]] = {}
+            for row in group:
+                changes.update(self.change_set_of(row))
+            first = group[0]
+            is_creation = any(row.field == 'managementType' and row.previousValue == '' for row in group)
+
+            ids = [row.id for row in group]
+            self.db.execute(delete(model).where(model.id.in_(ids)))
+            # Reusa el id más chico: el archivo no tiene secuencia propia
+            self.db.execute(insert(model).values(
+                id=first.id,
+                userId=first.userId,
+                apiaryId=first.apiaryId,
+                field=CREATION_FIELD if is_creation else CHANGESET_FIELD,
+                changes=_encode_change_set(changes),
+                changeDate=first.changeDate,
+            ))
+            converted += len(group)
+
+        # Las filas cargadas ya no existen en la base
+        for row in rows:
+            self.db.expunge(row)
+        return converted, groups[-1][-1].id
+
+    def _insert(self, apiary: Any, field: str, changes: Dict[str, List[Any]]) -> int:
+        if not changes:
+            return 0
+
+        self.db.execute(insert(History).values(
+            userId=apiary.userId,
+            apiaryId=apiary.id,
+            field=field,
+            changes=changes,
+        ))
+        mark_series_stale(self.db, "apiary", apiary.id)
+        return len(changes)
@@ -1,10 +1,16 @@
 from types import SimpleNamespace
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime
 from decimal import Decimal
 
+from sqlalchemy import or_, select
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.models.hive_history import HiveHistory
+from app.services.history_series_service import mark_series_stale
+from app.utils.db_routing import read_only, read_only_scope
+from app.utils.pagination import keyset_condition
 
 
 class HiveHistoryService:
@@ -51,15 +57,80 @@ class HiveHistoryService:
             comment=comment or changes.get("tComment"),
         )
         self.db.add(entry)
+        mark_series_stale(self.db, "hive", new_hive.id)
         self.db.commit()
         self.db.refresh(entry)
         return entry
 
+    @read_only
     def get_hive_history(self, hive_id: int, user_id: int) -> List[HiveHistory]:
-        return self.db.query(HiveHistory).filter(
+        return self.db.execute(self._history_statement(hive_id, user_id)).scalars().all()
+
+    @read_only
+    def get_hive_history_page(
+        self,
+        hive_id: int,
+        user_id: int,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        fields: Optional[List[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Tuple[List[HiveHistory], Optional[Tuple[datetime, int]]]:
+        """
+        Una página ordenada por (date, id) descendente.
+
+        Returns:
+            (entradas, clave (date, id) de la última si hay más páginas)
+        """
+        stmt = self._history_statement(hive_id, user_id, fields, since, until, after).limit(limit + 1)
+        entries = self.db.execute(stmt).scalars().all()
+        if len(entries) <= limit:
+            return entries, None
+        entries = entries[:limit]
+        return entries, (entries[-1].date, entries[-1].id)
+
+    def iter_hive_history(
+        self,
+        hive_id: int,
+        user_id: int,
+        fields: Optional[List[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Iterator[HiveHistory]:
+        """Historial completo leído de a lotes (yield_per), para exportar en streaming."""
+        stmt = self._history_statement(hive_id, user_id, fields, since, until).execution_options(
+            yield_per=settings.history_stream_batch_size
+        )
+        # El scope cubre solo el execute: las filas se leen después, al enviar la respuesta
+        with read_only_scope():
+            result = self.db.execute(stmt).scalars()
+        yield from result
+
+    def _history_statement(
+        self,
+        hive_id: int,
+        user_id: int,
+        fields: Optional[List[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        after: Optional[Tuple[datetime, int]] = None,
+    ):
+        stmt = select(HiveHistory).where(
             HiveHistory.hiveId == hive_id,
             HiveHistory.userId == user_id,
-        ).order_by(HiveHistory.date.desc(), HiveHistory.id.desc()).all()
+        )
+        if fields:
+            stmt = stmt.where(or_(*[HiveHistory.changes[field].as_string().isnot(None) for field in fields]))
+        if since is not None:
+            stmt = stmt.where(HiveHistory.date >= since)
+        if until is not None:
+            stmt = stmt.where(HiveHistory.date < until)
+        if after is not None:
+            stmt = stmt.where(keyset_condition(
+                (HiveHistory.date, HiveHistory.id), after, dialect=self.db.get_bind().dialect.name
+            ))
+        return stmt.order_by(HiveHistory.date.desc(), HiveHistory.id.desc())
 
     def build_empty_hive(self, hive: Any) -> Any:
         payload = {field: None for field in self.tracked_fields}
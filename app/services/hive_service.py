@@ -1,12 +1,14 @@
+from types import SimpleNamespace
 from typing import List, Optional
 
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, lambda_stmt, select, update
 from sqlalchemy.orm import Session
 
 from app.models.apiary import Apiary
 from app.models.hive import Hive
 from app.schemas.hive import HiveCreate, HiveUpdate
 from app.services.hive_history_service import HiveHistoryService
+from app.services.user_stats_service import UserStatsService, apiary_contribution
 
 
 class HiveService:
@@ -20,11 +22,26 @@ class HiveService:
         ).first()
 
     def _sync_apiary_hive_count(self, apiary_id: int) -> None:
-        hive_count = self.db.query(func.count(Hive.id)).filter(Hive.apiaryId == apiary_id).scalar() or 0
-        apiary = self.db.query(Apiary).filter(Apiary.id == apiary_id).first()
-        if apiary:
-            apiary.hives = int(hive_count)
-            self.db.flush()
+        # Un solo UPDATE con subquery; los callers hacen commit enseguida
+        apiary = self.db.get(Apiary, apiary_id)
+        before = apiary_contribution(apiary)
+        hive_count = (
+            select(func.count(Hive.id))
+            .where(Hive.apiaryId == apiary_id)
+            .scalar_subquery()
+        )
+        hives = self.db.execute(
+            update(Apiary)
+            .where(Apiary.id == apiary_id)
+            .values(hives=hive_count)
+            .returning(Apiary.hives)
+            .execution_options(synchronize_session=False)
+        ).scalar_one()
+        # settings.harvesting no cambia: se omite en los dos aportes
+        after = apiary_contribution(SimpleNamespace(
+            hives=hives, box=apiary.box, boxMedium=apiary.boxMedium, boxSmall=apiary.boxSmall
+        ))
+        UserStatsService(self.db).apply(apiary.userId, before, after)
 
     def create_hive(self, user_id: int, hive_data: HiveCreate) -> Optional[Hive]:
         apiary = self._get_owned_apiary(hive_data.apiaryId, user_id)
@@ -50,9 +67,10 @@ class HiveService:
         return query.order_by(Hive.updatedAt.desc(), Hive.id.desc()).all()
 
     def get_hive_by_id(self, hive_id: int, user_id: int) -> Optional[Hive]:
-        return self.db.query(Hive).filter(
-            and_(Hive.id == hive_id, Hive.userId == user_id)
-        ).first()
+        stmt = lambda_stmt(
+            lambda: select(Hive).where(and_(Hive.id == hive_id, Hive.userId == user_id))
+        )
+        return self.db.execute(stmt).scalars().first()
 
     def update_hive(self, hive_id: int, user_id: int, updates: HiveUpdate) -> Optional[Hive]:
         hive = self.get_hive_by_id(hive_id, user_id)
@@ -90,3 +108,9 @@ class HiveService:
 
     def get_hive_history(self, hive_id: int, user_id: int):
         return self.history_service.get_hive_history(hive_id, user_id)
+
+    def get_hive_history_page(self, hive_id: int, user_id: int, limit: int, **filters):
+        return self.history_service.get_hive_history_page(hive_id, user_id, limit, **filters)
+
+    def iter_hive_history(self, hive_id: int, user_id: int, **filters):
+        return self.history_service.iter_hive_history(hive_id, user_id, **filters)
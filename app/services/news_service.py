@@ -1,12 +1,14 @@
 from sqlalchemy.orm import Session
 from app.models.news import News
 from app.schemas.news import NewsCreate, NewsUpdate
+from app.utils.db_routing import read_only
 from typing import List, Optional
 
 class NewsService:
     def __init__(self, db: Session):
         self.db = db
     
+    @read_only
     def find_all(self) -> List[News]:
         return self.db.query(News).order_by(News.date.desc()).all()
     
@@ -140,29 +140,39 @@ class NotificationService:
             Apiary.updatedAt < threshold_date
         ).all()
 
+        # Alertas no leídas de los dueños, en una sola query (no una por apiario)
+        user_ids = {apiary.userId for apiary in neglected_apiaries}
+        pending_alerts = {}
+        if user_ids:
+            rows = self.db.query(Notification.userId, Notification.message).filter(
+                Notification.userId.in_(user_ids),
+                Notification.type == "ALERT",
+                Notification.isRead == False
+            ).all()
+            for user_id, message in rows:
+                pending_alerts.setdefault(user_id, []).append(message or "")
+
         count = 0
         for apiary in neglected_apiaries:
             # Verificar si ya existe una alerta reciente para no spamear
             # (Simplificado: solo chequeamos si existe una alerta NO LEÍDA de este tipo)
-            existing = self.db.query(Notification).filter(
-                Notification.userId == apiary.userId,
-                Notification.type == "ALERT",
-                Notification.isRead == False,
-                Notification.message.contains(f"apiario '{apiary.name}'")
-            ).first()
+            marker = f"apiario '{apiary.name}'"
+            existing = any(marker in message for message in pending_alerts.get(apiary.userId, []))
 
             if not existing:
                 # Incluir datos del apiario en el push notification
                 push_data = {"apiaryId": apiary.id}
+                message = f"Hace más de 30 días que no registras actividad en el apiario '{apiary.name}'."
                 self.create_notification(
                     NotificationCreate(
                         userId=apiary.userId,
                         title="Apiario sin visitar",
-                        message=f"Hace más de 30 días que no registras actividad en el apiario '{apiary.name}'.",
+                        message=message,
                         type="ALERT"
                     ),
                     push_data=push_data
                 )
+                pending_alerts.setdefault(apiary.userId, []).append(message)
                 count += 1
         
         return count
@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from app.models.settings import Settings
 from app.schemas.settings import UpdateSettings
+from app.services.user_stats_service import UserStatsService
 from typing import Optional
 from fastapi import HTTPException, status
 
@@ -16,11 +17,17 @@ class SettingsService:
         if not settings:
             return None
         
+        was_harvesting = bool(settings.harvesting)
         update_data = settings_data.dict(exclude_unset=True)
         for key, value in update_data.items():
             if key not in ['apiaryId', 'apiaryUserId']:
                 setattr(settings, key, value)
         
+        UserStatsService(self.db).apply(
+            settings.apiaryUserId,
+            before={"harvestingApiaries": int(was_harvesting)},
+            after={"harvestingApiaries": int(bool(settings.harvesting))},
+        )
         self.db.commit()
         self.db.refresh(settings)
         return settings
@@ -31,6 +38,9 @@ class SettingsService:
             return False
         
         self.db.delete(settings)
+        UserStatsService(self.db).apply(
+            settings.apiaryUserId, before={"harvestingApiaries": int(bool(settings.harvesting))}
+        )
         self.db.commit()
         return True
     
@@ -39,6 +49,8 @@ class SettingsService:
             Settings.apiaryUserId == user_id
         ).update({"harvesting": harvesting})
         
+        if result:
+            UserStatsService(self.db).set_values(user_id, harvestingApiaries=result if harvesting else 0)
         self.db.commit()
         
         if result == 0:
@@ -1,6 +1,8 @@
 from sqlalchemy.orm import Session
 from app.models.subscription import Subscription
-from app.schemas.subscription import TIER_APIARY_LIMITS, TIER_AI_ACCESS, TIER_AI_MONTHLY_LIMIT
+from app.schemas.subscription import (
+    TIER_APIARY_LIMITS, TIER_AI_ACCESS, TIER_AI_MONTHLY_LIMIT, TIER_HISTORY_RETENTION_MONTHS
+)
 from datetime import datetime
 import logging
 
@@ -67,4 +69,5 @@ class SubscriptionService:
             "apiaryLimit": TIER_APIARY_LIMITS.get(tier),
             "aiAccess": TIER_AI_ACCESS.get(tier, False),
             "aiMonthlyLimit": TIER_AI_MONTHLY_LIMIT.get(tier),
+            "historyRetentionMonths": TIER_HISTORY_RETENTION_MONTHS.get(tier),
         }
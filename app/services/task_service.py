@@ -1,8 +1,13 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, func, or_, select
 from app.models.task import Task
 from app.schemas.task import TaskCreate, TaskUpdate
-from typing import List, Optional
+from app.utils.pagination import keyset_condition
+from typing import List, Optional, Tuple
+from datetime import datetime
+
+# Por vencimiento (sin fecha al final, igual en PostgreSQL y SQLite) y por id
+TASK_ORDER = (Task.due_date.asc().nulls_last(), Task.id.asc())
 
 class TaskService:
     def __init__(self, db: Session):
@@ -41,9 +46,55 @@ class TaskService:
         total = query.count()
         offset = (page - 1) * limit
         
-        tasks = query.order_by(Task.due_date.asc(), Task.created_at.desc()).offset(offset).limit(limit).all()
+        tasks = query.order_by(*TASK_ORDER).offset(offset).limit(limit).all()
         return tasks, total
     
+    def get_tasks_page(
+        self,
+        user_id: int,
+        apiary_id: Optional[int] = None,
+        completed: Optional[bool] = None,
+        limit: int = 50,
+        after: Optional[Tuple[Optional[datetime], int]] = None,
+        exact_total: bool = False
+    ) -> Tuple[List[Task], Optional[Tuple[Optional[datetime], int]], Optional[int]]:
+        """
+        Una página de tareas por (due_date, id), sin OFFSET. Las tareas sin
+        vencimiento van al final; su clave es (None, id).
+
+        Returns:
+            (tareas, clave de la última fila si hay más páginas, total solo con ``exact_total``)
+        """
+        filters = [Task.user_id == user_id]
+        if apiary_id is not None:
+            filters.append(Task.apiary_id == apiary_id)
+        if completed is not None:
+            filters.append(Task.completed == completed)
+
+        stmt = select(Task).where(*filters)
+        if after is not None:
+            due_date, task_id = after
+            if due_date is None:
+                stmt = stmt.where(Task.due_date.is_(None), Task.id > task_id)
+            else:
+                stmt = stmt.where(or_(
+                    keyset_condition(
+                        (Task.due_date, Task.id), after, descending=False, dialect=self.db.get_bind().dialect.name
+                    ),
+                    Task.due_date.is_(None),
+                ))
+        tasks = self.db.execute(stmt.order_by(*TASK_ORDER).limit(limit + 1)).scalars().all()
+
+        next_key = None
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            next_key = (tasks[-1].due_date, tasks[-1].id)
+
+        total = None
+        if exact_total:
+            total = self.db.execute(select(func.count(Task.id)).where(*filters)).scalar_one()
+        return tasks, next_key, total
+    
     def get_task_by_id(self, task_id: int, user_id: int) -> Optional[Task]:
         return self.db.query(Task).filter(
             and_(Task.id == task_id, Task.user_id == user_id)
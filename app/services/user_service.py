@@ -1,4 +1,6 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.orm import Session, make_transient_to_detached
+from app.config import settings
 from app.models.user import User
 from app.models.device import Device
 from app.schemas.user import CreateUser, UpdateProfileRequest, ChangePasswordRequest
@@ -6,16 +8,49 @@ from app.schemas.device import CreateDevice, UpdateDevice
 from typing import Optional
 from datetime import datetime
 from fastapi import HTTPException, status
+from app.utils.cache import LRUCache
+
+# Columnas de User por id, para no consultar la tabla en cada request autenticada
+user_cache = LRUCache(
+    "auth_user",
+    max_size=settings.auth_user_cache_size,
+    default_ttl=settings.auth_user_cache_ttl_seconds,
+)
+_USER_COLUMNS = [column.key for column in User.__table__.columns]
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    """Descarta la fila cacheada del usuario tras modificarlo."""
+    user_cache.delete(user_id)
+
 
 class UserService:
     def __init__(self, db: Session):
         self.db = db
     
     def get_user(self, user_id: int) -> Optional[User]:
-        return self.db.query(User).filter(User.id == user_id).first()
+        stmt = lambda_stmt(lambda: select(User).where(User.id == user_id))
+        return self.db.execute(stmt).scalars().first()
+    
+    def get_cached_user(self, user_id: int) -> Optional[User]:
+        """
+        Obtiene el usuario desde el caché de filas si está vigente.
+        La instancia se adjunta a la sesión con merge(load=False), sin SELECT.
+        """
+        values = user_cache.get(user_id)
+        if values is not None:
+            user = User(**values)
+            make_transient_to_detached(user)
+            return self.db.merge(user, load=False)
+        
+        user = self.get_user(user_id)
+        if user is not None:
+            user_cache.set(user_id, {key: getattr(user, key) for key in _USER_COLUMNS})
+        return user
     
     def get_user_by_email(self, email: str) -> Optional[User]:
-        return self.db.query(User).filter(User.email == email).first()
+        stmt = lambda_stmt(lambda: select(User).where(User.email == email))
+        return self.db.execute(stmt).scalars().first()
     
     def create_user(self, user_data: CreateUser) -> Optional[User]:
         existing_user = self.db.query(User).filter(User.email == user_data.email).first()
@@ -47,6 +82,7 @@ class UserService:
         except Exception:
             self.db.rollback()
             raise
+        invalidate_cached_user(user_id)
         return True
 
     def update_push_token(self, user_id: int, token: str) -> bool:
@@ -60,6 +96,7 @@ class UserService:
         user.expoPushToken = token
         self.db.commit()
         self.db.refresh(user)
+        invalidate_cached_user(user_id)
         return True
     
     def register_device_token(self, user_id: int, token: str, device_name: str = None, platform: str = None) -> bool:
@@ -171,9 +208,10 @@ class UserService:
             self.db.rollback()
             raise
         
+        invalidate_cached_user(user_id)
         return user
     
-    def change_password(self, user_id: int, password_data: ChangePasswordRequest, auth_service) -> bool:
+    async def change_password(self, user_id: int, password_data: ChangePasswordRequest, auth_service) -> bool:
         """
         Cambia la contraseña del usuario.
         Requiere la contraseña actual.
@@ -183,18 +221,19 @@ class UserService:
             return False
         
         # Verificar contraseña actual
-        if not auth_service.verify_password(password_data.currentPassword, user.password):
+        if not await auth_service.verify_password_async(password_data.currentPassword, user.password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Current password is incorrect"
             )
         
         # Actualizar contraseña
-        user.password = auth_service.hash_password(password_data.newPassword)
+        user.password = await auth_service.hash_password_async(password_data.newPassword)
         
         try:
             self.db.commit()
             self.db.refresh(user)
+            invalidate_cached_user(user_id)
             return True
         except Exception:
             self.db.rollback()
@@ -0,0 +1,205 @@
+"""
+Resumen por usuario de sus apiarios (tabla ``user_stats``).
+
+Los endpoints de estadísticas leen una fila por clave primaria en lugar de
+sumar todos los apiarios del usuario en cada request. La fila se mantiene con
+deltas en la misma transacción que la escritura que la cambia:
+
+    before = apiary_contribution(apiary)      # aporte antes de editar
+    ...                                       # editar
+    UserStatsService(db).apply(user_id, before, apiary_contribution(apiary))
+
+Si el usuario todavía no tiene fila se calcula completa. Un job nocturno
+(``reconcile``) recalcula todas y corrige las que se desviaron, p. ej. por
+cambios hechos fuera de la aplicación.
+"""
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import case, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.apiary import Apiary
+from app.models.settings import Settings
+from app.models.user import User
+from app.models.user_stats import UserStats
+from app.utils.business_metrics import user_stats_reconciled_total
+from app.utils.db import insert_on_conflict
+from app.utils.db_routing import read_only
+
+logger = logging.getLogger(__name__)
+
+STAT_COLUMNS = (
+    "apiaryCount", "hiveCount", "box", "boxMedium", "boxSmall",
+    "harvestingApiaries", "harvestedApiaries", "harvestedHives",
+)
+
+
+def apiary_contribution(apiary: Any, harvesting: Optional[bool] = False) -> Dict[str, int]:
+    """
+    Lo que suma un apiario a las columnas de user_stats. Si la escritura no
+    cambia settings.harvesting puede omitirse: se cancela en el delta.
+    """
+    hives = int(apiary.hives or 0)
+    box = int(apiary.box or 0)
+    box_medium = int(apiary.boxMedium or 0)
+    box_small = int(apiary.boxSmall or 0)
+    harvested = box > 0 or box_medium > 0 or box_small > 0
+    return {
+        "apiaryCount": 1,
+        "hiveCount": hives,
+        "box": box,
+        "boxMedium": box_medium,
+        "boxSmall": box_small,
+        "harvestingApiaries": int(bool(harvesting)),
+        "harvestedApiaries": int(harvested),
+        "harvestedHives": hives if harvested else 0,
+    }
+
+
+class UserStatsService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    @read_only
+    def get_stats(self, user_id: int) -> Dict[str, int]:
+        """Fila de user_stats del usuario; sin fila, se calcula (sin guardarla)."""
+        row = self.db.execute(
+            select(*[getattr(UserStats, column) for column in STAT_COLUMNS]).where(UserStats.userId == user_id)
+        ).first()
+        if row is not None:
+            return dict(row._mapping)
+        return self.compute([user_id])[user_id]
+
+    def apply(
+        self,
+        user_id: int,
+        before: Optional[Dict[str, int]] = None,
+        after: Optional[Dict[str, int]] = None,
+    ) -> None:
+        """
+        Suma ``after - before`` a la fila del usuario. No hace commit: queda en
+        la transacción de la escritura.
+        """
+        before = before or {}
+        after = after or {}
+        delta = {
+            column: after.get(column, 0) - before.get(column, 0)
+            for column in STAT_COLUMNS
+        }
+        delta = {column: value for column, value in delta.items() if value}
+        if not delta:
+            return
+
+        result = self.db.execute(
+            update(UserStats)
+            .where(UserStats.userId == user_id)
+            .values({getattr(UserStats, column): getattr(UserStats, column) + value for column, value in delta.items()})
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            self._recompute(user_id)
+
+    def set_values(self, user_id: int, **values: int) -> None:
+        """Fija columnas de la fila (escrituras masivas que conocen el total). No hace commit."""
+        result = self.db.execute(
+            update(UserStats)
+            .where(UserStats.userId == user_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            self._recompute(user_id)
+
+    def compute(self, user_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+        """Resumen calculado desde apiary y apiary_setting, en una consulta."""
+        user_ids = list(user_ids)
+        harvested = or_(Apiary.box > 0, Apiary.boxMedium > 0, Apiary.boxSmall > 0)
+        stmt = (
+            select(
+                Apiary.userId,
+                func.count(Apiary.id).label("apiaryCount"),
+                func.coalesce(func.sum(Apiary.hives), 0).label("hiveCount"),
+                func.coalesce(func.sum(Apiary.box), 0).label("box"),
+                func.coalesce(func.sum(Apiary.boxMedium), 0).label("boxMedium"),
+                func.coalesce(func.sum(Apiary.boxSmall), 0).label("boxSmall"),
+                func.coalesce(func.sum(case((Settings.harvesting == True, 1), else_=0)), 0).label("harvestingApiaries"),
+                func.coalesce(func.sum(case((harvested, 1), else_=0)), 0).label("harvestedApiaries"),
+                func.coalesce(func.sum(case((harvested, Apiary.hives), else_=0)), 0).label("harvestedHives"),
+            )
+            .select_from(Apiary)
+            .outerjoin(Settings, Settings.apiaryId == Apiary.id)
+            .where(Apiary.userId.in_(user_ids))
+            .group_by(Apiary.userId)
+        )
+        stats = {user_id: dict.fromkeys(STAT_COLUMNS, 0) for user_id in user_ids}
+        for row in self.db.execute(stmt):
+            stats[row.userId] = {column: int(getattr(row, column)) for column in STAT_COLUMNS}
+        return stats
+
+    def reconcile(self, batch_size: Optional[int] = None) -> Dict[str, int]:
+        """
+        Recalcula el resumen de todos los usuarios por lotes, con un commit por
+        lote, y reescribe las filas que faltan o no coinciden.
+
+        Las filas del lote se bloquean (FOR UPDATE) antes de calcular: una
+        escritura concurrente espera y aplica su delta sobre el valor corregido.
+        """
+        batch_size = batch_size or settings.user_stats_reconcile_batch_size
+        counts = {"checked": 0, "created": 0, "fixed": 0}
+        last_id = 0
+
+        while True:
+            user_ids = self.db.execute(
+                select(User.id).where(User.id > last_id).order_by(User.id).limit(batch_size)
+            ).scalars().all()
+            if not user_ids:
+                break
+
+            stored = {
+                row.userId: row
+                for row in self.db.execute(
+                    select(UserStats.userId, *[getattr(UserStats, column) for column in STAT_COLUMNS])
+                    .where(UserStats.userId.in_(user_ids))
+                    .with_for_update()
+                )
+            }
+            rows = []
+            for user_id, values in self.compute(user_ids).items():
+                current = stored.get(user_id)
+                if current is None:
+                    counts["created"] += 1
+                elif any(getattr(current, column) != values[column] for column in STAT_COLUMNS):
+                    counts["fixed"] += 1
+                    logger.info(f"user_stats de {user_id} corregido: {dict(current._mapping)} -> {values}")
+                else:
+                    continue
+                rows.append({"userId": user_id, **values})
+
+            if rows:
+                self._store(rows)
+            self.db.commit()
+            counts["checked"] += len(user_ids)
+            last_id = user_ids[-1]
+
+        user_stats_reconciled_total.labels(result="created").inc(counts["created"])
+        user_stats_reconciled_total.labels(result="fixed").inc(counts["fixed"])
+        return counts
+
+    def _recompute(self, user_id: int) -> None:
+        # Usuario sin fila todavía: se calcula con la escritura en curso incluida
+        self.db.flush()
+        self._store([{"userId": user_id, **self.compute([user_id])[user_id]}])
+
+    def _store(self, rows: List[Dict[str, int]]) -> None:
+        """INSERT ... ON CONFLICT (userId) DO UPDATE de las filas dadas."""
+        stmt = insert_on_conflict(self.db, UserStats).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserStats.userId],
+            set_={
+                **{column: stmt.excluded[column] for column in STAT_COLUMNS},
+                "updatedAt": func.current_timestamp(),
+            },
+        )
+        self.db.execute(stmt)
@@ -0,0 +1,87 @@
+"""
+Verificación de JWT compartida entre middlewares y dependencias.
+
+El token se verifica una sola vez por request: el primer consumidor
+(rate limiting o la dependencia de auth) guarda el payload en
+``request.state`` y el resto lo reutiliza. Entre requests, los tokens ya
+verificados se guardan en un LRU acotado hasta su ``exp``.
+"""
+import hashlib
+from typing import Optional
+
+from jose import jwt
+from starlette.requests import Request
+
+from app.config import settings
+from app.constants import JWT_SECRET, JWT_ALGORITHM
+from app.utils.cache import LRUCache
+
+verified_token_cache = LRUCache("auth_token", max_size=settings.auth_token_cache_size)
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Decodifica y verifica un access token.
+    Un token ya verificado se sirve desde el caché mientras no expire.
+
+    Raises:
+        JWTError: Si la firma o la expiración no son válidas
+    """
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = verified_token_cache.get(digest)
+    if payload is not None:
+        return dict(payload)
+
+    payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+
+    # Sin exp no hay cota segura para el caché
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        verified_token_cache.set(digest, dict(payload), expires_at=exp)
+
+    return payload
+
+
+def get_bearer_token(request: Request) -> Optional[str]:
+    """Obtiene el token del header Authorization (esquema Bearer)."""
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return None
+
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        return None
+    return token.strip()
+
+
+def get_subject_id(payload: dict) -> Optional[int]:
+    """Convierte el claim ``sub`` a int, o None si no es válido."""
+    try:
+        return int(payload.get("sub"))
+    except (ValueError, TypeError):
+        return None
+
+
+def verify_request_token(request: Request, token: str) -> dict:
+    """
+    Verifica ``token`` reutilizando el resultado si ya se verificó en esta request.
+    Guarda payload y user_id en ``request.state``.
+
+    Raises:
+        JWTError: Si el token no es válido
+    """
+    state = request.state
+    if getattr(state, "auth_token", None) == token:
+        payload = getattr(state, "token_payload", None)
+        if payload is not None:
+            return payload
+
+    payload = decode_access_token(token)
+    state.auth_token = token
+    state.token_payload = payload
+
+    user_id = get_subject_id(payload)
+    if user_id is not None:
+        state.user_id = user_id
+
+    return payload
@@ -1,5 +1,9 @@
 """
 Métricas de negocio específicas de la aplicación.
+
+Los gauges declaran multiprocess_mode para cuando corre con
+PROMETHEUS_MULTIPROC_DIR (ver app/utils/metrics_registry.py): los que
+calcula un job usan 'mostrecent' y los que suben/bajan por proceso 'livesum'.
 """
 import logging
 
@@ -29,18 +33,21 @@ except ImportError:
 # Métricas de usuarios
 users_total = Gauge(
     'users_total',
-    'Total number of users'
+    'Total number of users',
+    multiprocess_mode='mostrecent'
 )
 
 users_active = Gauge(
     'users_active',
-    'Number of active users (with recent activity)'
+    'Number of active users (with recent activity)',
+    multiprocess_mode='mostrecent'
 )
 
 # Métricas de apiarios
 apiaries_total = Gauge(
     'apiaries_total',
-    'Total number of apiaries'
+    'Total number of apiaries',
+    multiprocess_mode='mostrecent'
 )
 
 apiaries_by_user = Histogram(
@@ -51,7 +58,8 @@ apiaries_by_user = Histogram(
 
 hives_total = Gauge(
     'hives_total',
-    'Total number of hives across all apiaries'
+    'Total number of hives across all apiaries',
+    multiprocess_mode='mostrecent'
 )
 
 # Métricas de cosecha
@@ -63,7 +71,8 @@ harvested_boxes_total = Counter(
 
 harvested_apiaries_count = Gauge(
     'harvested_apiaries_count',
-    'Number of apiaries with harvested boxes'
+    'Number of apiaries with harvested boxes',
+    multiprocess_mode='mostrecent'
 )
 
 # Métricas de notificaciones
@@ -75,31 +84,52 @@ notifications_sent_total = Counter(
 
 notifications_pending = Gauge(
     'notifications_pending',
-    'Number of pending notifications'
+    'Number of pending notifications',
+    multiprocess_mode='mostrecent'
 )
 
 # Métricas de dispositivos
 devices_total = Gauge(
     'devices_total',
-    'Total number of registered devices'
+    'Total number of registered devices',
+    multiprocess_mode='mostrecent'
 )
 
 devices_by_platform = Gauge(
     'devices_by_platform',
     'Number of devices by platform',
-    ['platform']  # ios, android
+    ['platform'],  # ios, android
+    multiprocess_mode='mostrecent'
 )
 
 # Métricas de base de datos
 db_connections_active = Gauge(
     'db_connections_active',
-    'Number of active database connections'
+    'Number of active database connections',
+    multiprocess_mode='livesum'
+)
+
+db_pool_overflow = Gauge(
+    'db_pool_overflow',
+    'Connections open beyond the configured pool size',
+    multiprocess_mode='livesum'
+)
+
+db_pool_wait_seconds = Histogram(
+    'db_pool_wait_seconds',
+    'Time spent waiting for a connection from the pool',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+db_pool_timeouts_total = Counter(
+    'db_pool_timeouts_total',
+    'Connection checkouts that failed after waiting pool_timeout seconds'
 )
 
 db_query_duration_seconds = Histogram(
     'db_query_duration_seconds',
     'Database query duration in seconds',
-    ['operation'],  # select, insert, update, delete
+    ['operation', 'fingerprint'],  # operation: select, insert, update, delete, other
     buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
 )
 
@@ -109,11 +139,71 @@ db_errors_total = Counter(
     ['error_type']
 )
 
+# Métricas de cachés en memoria
+cache_lookups_total = Counter(
+    'cache_lookups_total',
+    'Total in-memory cache lookups',
+    ['cache', 'result']  # result: hit, miss
+)
+
+# Métricas del pool de contraseñas (bcrypt)
+password_hash_in_flight = Gauge(
+    'password_hash_in_flight',
+    'Password hash/verify tasks queued or running',
+    multiprocess_mode='livesum'
+)
+
+password_hash_wait_seconds = Histogram(
+    'password_hash_wait_seconds',
+    'Time password tasks wait in the pool queue',
+    ['operation'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+password_hash_duration_seconds = Histogram(
+    'password_hash_duration_seconds',
+    'Password hash/verify execution time',
+    ['operation'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+password_hash_rejected_total = Counter(
+    'password_hash_rejected_total',
+    'Password tasks rejected because the pool queue was full',
+    ['operation']
+)
+
+password_rehash_total = Counter(
+    'password_rehash_total',
+    'Password hashes upgraded on login to the current parameters',
+    ['status']  # status: success, failed
+)
+
+password_hashes_by_status = Gauge(
+    'password_hashes_by_status',
+    'Stored password hashes by whether they use the current parameters',
+    ['status'],  # status: current, outdated
+    multiprocess_mode='mostrecent'
+)
+
+# Métricas del resumen por usuario (user_stats)
+user_stats_reconciled_total = Counter(
+    'user_stats_reconciled_total',
+    'user_stats rows written by the nightly reconciliation',
+    ['result']  # result: created (faltaba la fila), fixed (tenía desvío)
+)
+
+drum_totals_reconciled_total = Counter(
+    'drum_totals_reconciled_total',
+    'drum_totals rows written by the nightly reconciliation',
+    ['result']  # result: created (faltaba la fila), fixed (tenía desvío)
+)
+
 # Métricas de tareas programadas (cron)
 cron_jobs_executed_total = Counter(
     'cron_jobs_executed_total',
     'Total cron jobs executed',
-    ['job_name', 'status']  # status: success, failed
+    ['job_name', 'status']  # status: success, failed, skipped
 )
 
 cron_job_duration_seconds = Histogram(
@@ -5,10 +5,14 @@ Para producción, considerar usar Redis para caché distribuido.
 import time
 import hashlib
 import json
-from typing import Any, Optional, Callable, Dict, Tuple
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Callable, Dict, Hashable, Tuple
 from functools import wraps
 import logging
 
+from app.utils.business_metrics import cache_lookups_total
+
 logger = logging.getLogger(__name__)
 
 class SimpleCache:
@@ -84,6 +88,83 @@ class SimpleCache:
             "hit_rate": round(hit_rate, 2)
         }
 
+class LRUCache:
+    """
+    Caché en memoria acotado (LRU) con expiración por entrada.
+    Pensado para datos calientes por request (tokens, usuarios) donde
+    SimpleCache crecería sin límite.
+    """
+    
+    def __init__(self, name: str, max_size: int = 1024, default_ttl: float = 300):
+        self.name = name
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self._cache: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Obtiene un valor si existe y no expiró; lo marca como usado recientemente."""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and time.time() < entry[1]:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                cache_lookups_total.labels(cache=self.name, result="hit").inc()
+                return entry[0]
+            
+            if entry is not None:
+                del self._cache[key]
+            self._misses += 1
+        
+        cache_lookups_total.labels(cache=self.name, result="miss").inc()
+        return None
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, expires_at: Optional[float] = None) -> None:
+        """
+        Guarda un valor, desalojando el menos usado si se supera max_size.
+        
+        Args:
+            key: Clave del caché
+            value: Valor a guardar
+            ttl: Time to live en segundos (default: default_ttl)
+            expires_at: Timestamp absoluto de expiración (tiene prioridad sobre ttl)
+        """
+        if expires_at is None:
+            expires_at = time.time() + (self.default_ttl if ttl is None else ttl)
+        
+        with self._lock:
+            self._cache[key] = (value, expires_at)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+    
+    def delete(self, key: Hashable) -> None:
+        """Elimina una clave del caché."""
+        with self._lock:
+            self._cache.pop(key, None)
+    
+    def clear(self) -> None:
+        """Limpia todo el caché."""
+        with self._lock:
+            self._cache.clear()
+            self._hits = 0
+            self._misses = 0
+    
+    def get_stats(self) -> dict:
+        """Obtiene estadísticas del caché."""
+        total_requests = self._hits + self._misses
+        hit_rate = (self._hits / total_requests * 100) if total_requests > 0 else 0
+        
+        return {
+            "size": len(self._cache),
+            "max_size": self.max_size,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(hit_rate, 2)
+        }
+
 # Instancia global del caché
 cache = SimpleCache()
 
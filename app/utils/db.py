@@ -1,6 +1,7 @@
 """
 Database utility functions for transaction management.
 """
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 from typing import Callable, TypeVar, Any
 from functools import wraps
@@ -49,3 +50,11 @@ def safe_commit(db: Session, operation_name: str = "operation") -> None:
         raise
 
 
+
+def insert_on_conflict(db: Session, model: Any):
+    """
+    ``insert(model)`` del dialecto de la sesión, con ``on_conflict_do_update``
+    y ``excluded`` (PostgreSQL en producción, SQLite en tests).
+    """
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    return dialect.insert(model)
@@ -0,0 +1,210 @@
+"""
+Instrumentación de SQLAlchemy: duración de queries, errores, uso del pool
+de conexiones y log de queries lentas.
+
+Los hooks se registran sobre el engine con ``instrument_engine`` y llenan
+las métricas de base de datos declaradas en business_metrics. Dentro de
+``track_queries()`` además se registra cada statement ejecutado, para
+contar queries por request y detectar patrones N+1.
+"""
+import hashlib
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache, partial
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from app.config import settings
+from app.middleware.request_id import get_request_id
+from app.utils.business_metrics import (
+    db_connections_active,
+    db_pool_overflow,
+    db_pool_wait_seconds,
+    db_pool_timeouts_total,
+    db_query_duration_seconds,
+    db_errors_total,
+)
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_PARAM_RE = re.compile(r"%\(\w+\)s|(?<!:):\w+|\$\d+|\?")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+_VALUES_LIST_RE = re.compile(r"\bVALUES\s*\([^)]*\)(?:\s*,\s*\([^)]*\))*", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_OPERATIONS = {"select", "insert", "update", "delete"}
+
+
+@lru_cache(maxsize=2048)
+def fingerprint_statement(statement: str) -> Tuple[str, str, str]:
+    """
+    Normaliza un statement SQL quitando literales y parámetros.
+    Queries con la misma forma comparten fingerprint.
+
+    Returns:
+        (operation, fingerprint, normalized_sql)
+    """
+    normalized = _STRING_LITERAL_RE.sub("?", statement)
+    normalized = _PARAM_RE.sub("?", normalized)
+    normalized = _NUMBER_RE.sub("?", normalized)
+    normalized = _IN_LIST_RE.sub("IN (...)", normalized)
+    normalized = _VALUES_LIST_RE.sub("VALUES (...)", normalized)
+    normalized = _WHITESPACE_RE.sub(" ", normalized).strip()
+
+    first_word = normalized.split(" ", 1)[0].lower() if normalized else ""
+    operation = first_word if first_word in _OPERATIONS else "other"
+    fingerprint = hashlib.sha1(normalized.encode()).hexdigest()[:12]
+    return operation, fingerprint, normalized
+
+
+class QueryTracker:
+    """Statements ejecutados dentro de un bloque ``track_queries()``."""
+
+    def __init__(self):
+        self.fingerprints: List[str] = []
+        self.statements: Dict[str, str] = {}
+
+    def record(self, fingerprint: str, normalized: str) -> None:
+        self.fingerprints.append(fingerprint)
+        self.statements.setdefault(fingerprint, normalized)
+
+    @property
+    def count(self) -> int:
+        return len(self.fingerprints)
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """
+        Statements con la misma forma ejecutados ``threshold`` veces o más
+        (típicamente una query por fila: N+1).
+
+        Returns:
+            Lista de (sql_normalizado, veces), de mayor a menor
+        """
+        return [
+            (self.statements[fingerprint], times)
+            for fingerprint, times in Counter(self.fingerprints).most_common()
+            if times >= threshold
+        ]
+
+
+_query_tracker_var: ContextVar[Optional[QueryTracker]] = ContextVar("query_tracker", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryTracker]:
+    """
+    Registra los statements ejecutados por engines instrumentados dentro del bloque.
+
+    Ejemplo:
+        with track_queries() as tracker:
+            service.get_all_by_user_id(user_id)
+        assert tracker.count <= 2
+    """
+    tracker = QueryTracker()
+    token = _query_tracker_var.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _query_tracker_var.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    duration = time.perf_counter() - start_times.pop()
+
+    operation, fingerprint, normalized = fingerprint_statement(statement)
+    db_query_duration_seconds.labels(operation=operation, fingerprint=fingerprint).observe(duration)
+
+    tracker = _query_tracker_var.get()
+    if tracker is not None:
+        tracker.record(fingerprint, normalized)
+
+    threshold_ms = settings.db_slow_query_threshold_ms
+    if threshold_ms and duration * 1000 >= threshold_ms:
+        request_id = get_request_id()
+        logger.warning(
+            f"Slow query ({duration * 1000:.1f} ms, request_id={request_id}): {normalized}",
+            extra={
+                "extra_fields": {
+                    "request_id": request_id,
+                    "duration_ms": round(duration * 1000, 1),
+                    "operation": operation,
+                    "fingerprint": fingerprint,
+                    "statement": normalized,
+                }
+            },
+        )
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None:
+        start_times = conn.info.get("query_start_time")
+        if start_times:
+            start_times.pop()
+
+    error = exception_context.original_exception
+    db_errors_total.labels(error_type=type(error).__name__).inc()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool que mide cuánto espera cada checkout (incluye abrir la
+    conexión cuando el pool todavía no está lleno) y cuenta los timeouts.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            db_pool_timeouts_total.inc()
+            raise
+        finally:
+            db_pool_wait_seconds.observe(time.perf_counter() - start)
+
+
+def _record_pool_overflow(pool) -> None:
+    overflow = getattr(pool, "overflow", None)
+    if overflow is not None:
+        db_pool_overflow.set(max(overflow(), 0))
+
+
+# Reciben el engine y no su pool: engine.dispose() reemplaza el pool (los
+# listeners pasan al nuevo) y el overflow se lee siempre del actual
+def _on_checkout(engine, dbapi_connection, connection_record, connection_proxy):
+    db_connections_active.inc()
+    _record_pool_overflow(engine.pool)
+
+
+def _on_checkin(engine, dbapi_connection, connection_record):
+    db_connections_active.dec()
+    _record_pool_overflow(engine.pool)
+
+
+def instrument_engine(engine: Engine) -> Engine:
+    """Registra los hooks de métricas en ``engine`` (idempotente)."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return engine
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    event.listen(engine.pool, "checkout", partial(_on_checkout, engine))
+    event.listen(engine.pool, "checkin", partial(_on_checkin, engine))
+    return engine
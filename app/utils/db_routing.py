@@ -0,0 +1,109 @@
+"""
+Ruteo de lecturas a una réplica.
+
+Solo los métodos de servicio marcados con ``@read_only`` leen de la réplica
+(``DATABASE_REPLICA_URL``); todo lo demás, incluidas las escrituras, va al
+primario. Para leer lo propio recién escrito (read-your-writes):
+
+- una sesión que ya escribió sigue en el primario hasta cerrarse;
+- después de un commit con escrituras, el usuario de la request queda
+  pegado al primario ``DB_READ_YOUR_WRITES_SECONDS`` segundos.
+
+La marca por usuario vive en memoria del proceso: con varios workers una
+request posterior puede caer en otro worker y leer de la réplica.
+"""
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.utils.cache import LRUCache
+
+_read_only_var: ContextVar[bool] = ContextVar("db_read_only", default=False)
+
+# user_id -> True mientras sus lecturas deban ir al primario
+recent_writers = LRUCache("replica_sticky_users", max_size=10_000)
+
+
+@contextmanager
+def read_only_scope() -> Iterator[None]:
+    """Las queries dentro del bloque pueden ir a la réplica."""
+    token = _read_only_var.set(True)
+    try:
+        yield
+    finally:
+        _read_only_var.reset(token)
+
+
+def read_only(method):
+    """Marca un método de servicio como solo lectura (puede leer de la réplica)."""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with read_only_scope():
+            return method(*args, **kwargs)
+    return wrapper
+
+
+def mark_user_wrote(user_id: int) -> None:
+    """Pega las lecturas de ``user_id`` al primario por un rato."""
+    ttl = settings.db_read_your_writes_seconds
+    if ttl > 0:
+        recent_writers.set(user_id, True, ttl=ttl)
+
+
+class RoutingSession(Session):
+    """
+    Session que elige engine por statement: la réplica para lecturas en
+    ``read_only_scope()``, el primario para todo lo demás.
+
+    ``info["request_state"]`` (lo pone get_db) permite saber el usuario de
+    la request para la marca read-your-writes.
+    """
+
+    def __init__(self, *args, replica_bind: Optional[Engine] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replica_bind = replica_bind
+        self.has_written = False
+
+    @property
+    def current_user_id(self) -> Optional[int]:
+        state = self.info.get("request_state")
+        return getattr(state, "user_id", None) if state is not None else None
+
+    def _can_use_replica(self) -> bool:
+        if self.replica_bind is None or not _read_only_var.get():
+            return False
+        if self._flushing or self.has_written:
+            return False
+
+        user_id = self.current_user_id
+        return user_id is None or recent_writers.get(user_id) is None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._can_use_replica():
+            return self.replica_bind
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _after_flush(session, flush_context):
+    session.has_written = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _on_orm_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.has_written = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _after_commit(session):
+    if session.has_written and session.replica_bind is not None:
+        user_id = session.current_user_id
+        if user_id is not None:
+            mark_user_wrote(user_id)
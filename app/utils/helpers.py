@@ -1,10 +1,13 @@
 """
 Helper functions to reduce code duplication.
 """
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from fastapi import HTTPException, status
+from app.config import settings
 from app.models.apiary import Apiary
 from app.schemas.apiary import ApiaryDetail
-from typing import Optional
+from typing import Optional, Tuple
 
 def verify_apiary_ownership(apiary: Optional[Apiary], user_id: int) -> None:
     """
@@ -102,3 +105,50 @@ def build_apiary_detail(apiary: Apiary) -> ApiaryDetail:
         createdAt=apiary.createdAt,
         updatedAt=apiary.updatedAt
     )
+
+def resolve_timezone(tz_name: Optional[str] = None) -> ZoneInfo:
+    """
+    Obtiene la zona horaria IANA (ej: "America/Argentina/Buenos_Aires").
+    Sin nombre usa DEFAULT_TIMEZONE.
+    
+    Raises:
+        HTTPException: Si la zona horaria no existe
+    """
+    name = tz_name or settings.default_timezone
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown timezone: {name}"
+        )
+
+def to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Fecha recibida del cliente como UTC naive; sin zona horaria se asume UTC."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def local_day_bounds_utc(tz: ZoneInfo, now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """
+    Intervalo semiabierto [inicio, fin) del día actual en ``tz``, en UTC naive
+    (como se guardan las fechas en la base). Comparar la columna contra este
+    rango permite usar índices, a diferencia de ``date(columna) = current_date``.
+    
+    Args:
+        tz: Zona horaria del usuario
+        now: Instante de referencia (default: ahora)
+        
+    Returns:
+        (inicio, fin) en UTC sin tzinfo
+    """
+    now = now or datetime.now(timezone.utc)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    local_day = now.astimezone(tz).date()
+    start = datetime.combine(local_day, time.min, tzinfo=tz)
+    end = datetime.combine(local_day + timedelta(days=1), time.min, tzinfo=tz)
+    return (
+        start.astimezone(timezone.utc).replace(tzinfo=None),
+        end.astimezone(timezone.utc).replace(tzinfo=None),
+    )
@@ -0,0 +1,83 @@
+"""
+Registro de métricas expuesto por /metrics, con soporte multi-proceso.
+
+Con varios workers de uvicorn cada proceso tiene su propio registro en
+memoria y el scrape solo ve al worker que lo atiende. Si la variable
+PROMETHEUS_MULTIPROC_DIR está definida antes de arrancar, prometheus_client
+escribe cada métrica en archivos mmap por PID dentro de ese directorio y
+/metrics agrega los de todos los workers.
+"""
+import glob
+import logging
+import os
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+try:
+    from prometheus_client import REGISTRY, CollectorRegistry
+    from prometheus_client import multiprocess
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+
+def get_multiprocess_dir() -> Optional[str]:
+    """Directorio compartido de métricas, o None en modo de un solo proceso."""
+    return os.getenv(MULTIPROC_DIR_ENV) or None
+
+
+def build_registry():
+    """
+    Registro a serializar en /metrics.
+    En modo multi-proceso se arma uno nuevo por scrape que lee los archivos
+    de todos los workers; si no, se usa el registro global del proceso.
+    """
+    path = get_multiprocess_dir()
+    if not path:
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=path)
+    return registry
+
+
+def _is_process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def cleanup_dead_workers(path: Optional[str] = None) -> List[int]:
+    """
+    Elimina los archivos de gauges "live" de workers que ya no existen.
+    Los counters/histogramas de workers muertos se conservan para que los
+    totales agregados no retrocedan; el directorio se vacía al reiniciar
+    el servicio completo (ver Dockerfile).
+
+    Returns:
+        PIDs marcados como muertos
+    """
+    path = path or get_multiprocess_dir()
+    if not PROMETHEUS_AVAILABLE or not path:
+        return []
+
+    pids = set()
+    for filename in glob.glob(os.path.join(path, "*.db")):
+        pid_part = os.path.basename(filename)[:-len(".db")].rsplit("_", 1)[-1]
+        if pid_part.isdigit():
+            pids.add(int(pid_part))
+
+    dead = sorted(pid for pid in pids if pid != os.getpid() and not _is_process_alive(pid))
+    for pid in dead:
+        multiprocess.mark_process_dead(pid, path)
+
+    if dead:
+        logger.info(f"Removed live gauge files of dead metric workers: {dead}")
+    return dead
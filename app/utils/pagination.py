@@ -0,0 +1,104 @@
+"""
+Paginación por cursor (keyset) y respuestas NDJSON en streaming.
+
+El cursor es opaco para el cliente: los valores de la clave de orden de la
+última fila devuelta, en JSON y base64url. La página siguiente filtra
+"después de esa fila" en lugar de usar OFFSET, así que el costo por página no
+depende de cuántas filas haya antes.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Iterable, Optional, Sequence
+
+from fastapi import HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import DateTime, String, and_, func, literal, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def encode_cursor(*values: Any) -> str:
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> tuple:
+    """
+    Valores de un cursor de encode_cursor, convertidos a ``types`` (None
+    queda None: claves de orden con columnas nullable).
+
+    Raises:
+        HTTPException 400 si el cursor no es válido
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("cursor length")
+        return tuple(
+            None if value is None else datetime.fromisoformat(value) if kind is datetime else kind(value)
+            for kind, value in zip(types, values)
+        )
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def keyset_condition(columns: Sequence[Any], values: Sequence[Any], descending: bool = True, dialect: str = ""):
+    """
+    Filas estrictamente después de ``values`` en el orden (columns...):
+    (a, b) < (x, y)  ==  a < x OR (a = x AND b < y)
+
+    En SQLite las fechas son texto y CURRENT_TIMESTAMP no guarda fracción de
+    segundo ('2024-01-01 10:00:00') mientras que los parámetros sí
+    ('2024-01-01 10:00:00.000000'): ahí se comparan normalizadas, más una cota
+    sobre la columna sin normalizar para que el índice empiece en el cursor.
+    """
+    bound = None
+    if dialect == "sqlite":
+        if isinstance(values[0], datetime):
+            # Incluye todas las filas buscadas: 'X' y 'X.000000' quedan del lado correcto
+            bound = (
+                columns[0] <= values[0] if descending
+                else columns[0] >= literal(values[0].strftime("%Y-%m-%d %H:%M:%S"), String())
+            )
+        columns = [
+            _sqlite_timestamp(column) if isinstance(value, datetime) else column
+            for column, value in zip(columns, values)
+        ]
+        values = [_sqlite_timestamp(value) if isinstance(value, datetime) else value for value in values]
+
+    conditions = []
+    for index, column in enumerate(columns):
+        previous = [columns[i] == values[i] for i in range(index)]
+        beyond = column < values[index] if descending else column > values[index]
+        conditions.append(and_(*previous, beyond))
+    return or_(*conditions) if bound is None else and_(bound, or_(*conditions))
+
+
+def _sqlite_timestamp(value):
+    if isinstance(value, datetime):
+        value = literal(value, DateTime())
+    return func.strftime("%Y-%m-%d %H:%M:%f", value)
+
+
+def set_next_cursor(response: Response, cursor: Optional[str]) -> None:
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
+
+def ndjson_response(items: Iterable[Any], schema: type[BaseModel], filename: Optional[str] = None) -> StreamingResponse:
+    """Una línea JSON por item, serializada con ``schema``, a medida que se leen."""
+    def lines():
+        for item in items:
+            yield schema.model_validate(item).model_dump_json() + "\n"
+
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'} if filename else None
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE, headers=headers)
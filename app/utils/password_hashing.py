@@ -0,0 +1,87 @@
+"""
+Pool dedicado para el trabajo de bcrypt.
+
+Hashear o verificar una contraseña bloquea durante todo el costo de
+BCRYPT_SALT_ROUNDS. bcrypt libera el GIL, así que un pool de threads
+acotado saca ese trabajo del event loop sin competir con el threadpool
+por defecto de Starlette. Si la cola se llena se rechaza con 503 en
+lugar de acumular logins indefinidamente.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.utils.business_metrics import (
+    password_hash_in_flight,
+    password_hash_wait_seconds,
+    password_hash_duration_seconds,
+    password_hash_rejected_total,
+)
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="password-hash",
+)
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+def _acquire_slot(operation: str) -> None:
+    global _in_flight
+    with _in_flight_lock:
+        if _in_flight >= settings.password_hash_max_pending:
+            password_hash_rejected_total.labels(operation=operation).inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+        _in_flight += 1
+        password_hash_in_flight.set(_in_flight)
+
+
+def _release_slot() -> None:
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight -= 1
+        password_hash_in_flight.set(_in_flight)
+
+
+async def run_password_task(operation: str, func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Ejecuta ``func(*args)`` en el pool de contraseñas.
+
+    Args:
+        operation: Nombre para métricas (hash, verify, ...)
+        func: Función bloqueante a ejecutar
+
+    Raises:
+        HTTPException: 503 si hay más de PASSWORD_HASH_MAX_PENDING tareas en curso
+    """
+    _acquire_slot(operation)
+    enqueued_at = time.perf_counter()
+
+    def task():
+        started_at = time.perf_counter()
+        password_hash_wait_seconds.labels(operation=operation).observe(started_at - enqueued_at)
+        try:
+            return func(*args)
+        finally:
+            password_hash_duration_seconds.labels(operation=operation).observe(
+                time.perf_counter() - started_at
+            )
+
+    try:
+        future = _executor.submit(task)
+    except BaseException:
+        _release_slot()
+        raise
+    # El cupo se libera cuando termina el trabajo en el pool, no cuando deja de
+    # esperarlo la request: si el cliente se desconecta, bcrypt sigue corriendo
+    future.add_done_callback(lambda _: _release_slot())
+    return await asyncio.wrap_future(future)
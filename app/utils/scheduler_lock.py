@@ -0,0 +1,123 @@
+"""
+Un solo proceso corre el scheduler.
+
+Con varios workers de uvicorn (``--workers``) o varias réplicas del contenedor,
+cada proceso ejecuta el lifespan de la app. Los jobs nocturnos descuentan
+alimento y días de tratamiento, así que correrlos en cada proceso los
+descontaría N veces.
+
+En PostgreSQL el proceso que toma un advisory lock de sesión es el líder y
+arranca el scheduler; los demás reintentan cada SCHEDULER_LOCK_RETRY_SECONDS
+y toman el relevo si el líder termina (el lock se libera al cerrarse su
+conexión). El líder verifica su conexión con la misma frecuencia: si se cortó,
+el servidor ya liberó el lock y otro proceso puede haberlo tomado, así que
+detiene el scheduler y vuelve a competir por el lock. Con otras bases (SQLite
+en desarrollo) no hay lock: se asume un solo proceso.
+"""
+import asyncio
+import logging
+from typing import Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+# Clave arbitraria del advisory lock (bigint), única para este uso
+SCHEDULER_LOCK_KEY = 724_911_306_001
+
+
+class SchedulerLock:
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._connection: Optional[Connection] = None
+
+    @property
+    def held(self) -> bool:
+        return self._connection is not None
+
+    def acquire(self) -> bool:
+        """Intenta tomar el lock sin esperar. True si este proceso es el líder."""
+        if self.engine.dialect.name != "postgresql":
+            return True
+        if self._connection is not None:
+            return True
+
+        connection = self.engine.connect()
+        try:
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": SCHEDULER_LOCK_KEY}
+            ).scalar()
+            # El lock es de sesión: sobrevive al commit y no deja la conexión "idle in transaction"
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        # La conexión queda fuera del pool mientras este proceso sea el líder
+        self._connection = connection
+        return True
+
+    def check(self) -> bool:
+        """Verifica que la conexión del lock siga viva. False si se perdió el lock."""
+        if self.engine.dialect.name != "postgresql":
+            return True
+        if self._connection is None:
+            return False
+        try:
+            self._connection.execute(text("SELECT 1"))
+            self._connection.commit()
+            return True
+        except Exception as error:
+            # Conexión cortada: el servidor liberó el lock junto con la sesión
+            logger.warning(f"Se perdió la conexión del lock del scheduler: {error}")
+            connection, self._connection = self._connection, None
+            connection.invalidate()
+            connection.close()
+            return False
+
+    def release(self) -> None:
+        if self._connection is None:
+            return
+        connection, self._connection = self._connection, None
+        try:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEDULER_LOCK_KEY})
+            connection.commit()
+        except Exception as error:
+            # Si la conexión ya no sirve, el servidor liberó el lock al cortarla
+            logger.warning(f"No se pudo liberar el lock del scheduler: {error}")
+            connection.invalidate()
+        finally:
+            connection.close()
+
+    async def run_when_leader(
+        self, start: Callable[[], None], stop: Callable[[], None], retry_seconds: float
+    ) -> None:
+        """
+        Llama a ``start`` cuando este proceso toma el lock y a ``stop`` si lo pierde.
+
+        Mientras no es líder reintenta cada ``retry_seconds``; siendo líder
+        verifica la conexión del lock con la misma frecuencia.
+        """
+        while True:
+            try:
+                acquired = await asyncio.to_thread(self.acquire)
+            except Exception as error:
+                logger.warning(f"No se pudo consultar el lock del scheduler: {error}")
+                acquired = False
+            if not acquired:
+                await asyncio.sleep(retry_seconds)
+                continue
+
+            logger.info("Este proceso corre el scheduler")
+            start()
+            if self.engine.dialect.name != "postgresql":
+                return
+            while True:
+                await asyncio.sleep(retry_seconds)
+                if not await asyncio.to_thread(self.check):
+                    break
+            logger.warning("Se perdió el lock del scheduler: se detiene hasta recuperarlo")
+            stop()
@@ -1,5 +1,9 @@
 """
-Script para verificar las estadísticas de un usuario
+Script para verificar las estadísticas de un usuario.
+
+Lee los resúmenes por usuario (drum_totals y user_stats) en lugar de cargar
+tambores y apiarios. Para el detalle: list_user_drums.py o GET /drums/export
+y GET /apiarys/export.
 """
 from app.database import SessionLocal
 from app.services.user_service import UserService
@@ -42,29 +46,19 @@ def check_user_stats(email: str):
         print(f"  Peso neto: {drum_stats['net_weight']} kg")
         print(f"{'='*70}\n")
         
-        # Obtener estadísticas de apiarios
+        # Obtener estadísticas de apiarios: fila de user_stats, sin cargar los apiarios
         apiary_service = ApiaryService(db)
-        apiary_count = apiary_service.count_apiaries_by_user_id(user.id)
-        hive_count = apiary_service.count_hives_by_user_id(user.id)
-        
-        # Obtener todos los apiarios para calcular alzas cosechadas
-        from app.models.apiary import Apiary
-        from sqlalchemy import func
-        apiaries = db.query(Apiary).filter(Apiary.userId == user.id).all()
+        apiary_stats = apiary_service.get_user_stats(user.id)
+        apiary_count = apiary_stats["apiaryCount"]
+        hive_count = apiary_stats["hiveCount"]
+        harvesting_count = apiary_stats["harvestingApiaries"]
         
-        # Calcular alzas cosechadas
-        total_box = sum(int(apiary.box or 0) for apiary in apiaries)
-        total_boxMedium = sum(int(apiary.boxMedium or 0) for apiary in apiaries)
-        total_boxSmall = sum(int(apiary.boxSmall or 0) for apiary in apiaries)
+        # Alzas cosechadas
+        total_box = apiary_stats["box"]
+        total_boxMedium = apiary_stats["boxMedium"]
+        total_boxSmall = apiary_stats["boxSmall"]
         total_alzas = total_box + total_boxMedium + total_boxSmall
         
-        # Contar apiarios en modo harvesting
-        from app.models.settings import Settings
-        harvesting_count = db.query(Settings).join(Apiary).filter(
-            Apiary.userId == user.id,
-            Settings.harvesting == True
-        ).count()
-        
         print(f"{'='*70}")
         print(f"ESTADISTICAS DE APIARIOS")
         print(f"{'='*70}")
@@ -1,52 +1,41 @@
 """
-Script para listar los tambores de un usuario
+Script para exportar los tambores de un usuario a CSV o XLSX.
+
+Usa la misma exportación en streaming que GET /drums/export: los tambores se
+leen de a lotes y el archivo se escribe a medida, sin cargarlos en memoria.
 """
+import argparse
+
 from app.database import SessionLocal
+from app.routers.drum import EXPORT_COLUMNS
 from app.services.user_service import UserService
 from app.services.drum_service import DrumService
+from app.utils.export import EXPORT_FORMATS, export_stream
 
-def list_user_drums(email: str):
-    """Lista los tambores de un usuario por email"""
+def list_user_drums(email: str, output: str = None, format: str = "csv"):
+    """Exporta los tambores de un usuario por email"""
     db = SessionLocal()
     try:
         # Buscar usuario
         user_service = UserService(db)
         user = user_service.get_user_by_email(email)
-        
+
         if not user:
             print(f"[ERROR] Usuario con email '{email}' no encontrado")
             return
-        
+
+        output = output or f"drums-{user.id}.{format}"
+        drum_service = DrumService(db)
+        with open(output, "wb") as file:
+            for chunk in export_stream(drum_service.iter_drums(user.id), EXPORT_COLUMNS, format):
+                file.write(chunk)
+
+        # Estadísticas: una fila de drum_totals, sin recorrer los tambores
+        stats = drum_service.get_stats(user.id)
         print(f"\n{'='*60}")
         print(f"TAMBORES DE {user.name.upper()} {user.surname.upper()}")
         print(f"Email: {user.email} (ID: {user.id})")
-        print(f"{'='*60}\n")
-        
-        # Obtener tambores
-        drum_service = DrumService(db)
-        drums, total = drum_service.get_drums(user.id)
-        
-        if total == 0:
-            print("No hay tambores registrados para este usuario.")
-            return
-        
-        print(f"Total de tambores: {total}\n")
-        
-        for drum in drums:
-            net_weight = float(drum.weight) - float(drum.tare)
-            sold_status = "VENDIDO" if drum.sold else "NO VENDIDO"
-            
-            print(f"ID: {drum.id}")
-            print(f"  Codigo: {drum.code}")
-            print(f"  Tara: {drum.tare} kg")
-            print(f"  Peso Total: {drum.weight} kg")
-            print(f"  Peso Neto: {net_weight:.2f} kg")
-            print(f"  Estado: {sold_status}")
-            print(f"  Creado: {drum.createdAt}")
-            print()
-        
-        # Obtener estadísticas
-        stats = drum_service.get_stats(user.id)
+        print(f"Exportados a: {output}")
         print(f"{'='*60}")
         print(f"ESTADISTICAS:")
         print(f"  Total: {stats['total']}")
@@ -56,7 +45,7 @@ def list_user_drums(email: str):
         print(f"  Peso Total: {stats['total_weight']} kg")
         print(f"  Peso Neto: {stats['net_weight']} kg")
         print(f"{'='*60}\n")
-        
+
     except Exception as e:
         print(f"[ERROR] Error: {e}")
         import traceback
@@ -65,33 +54,10 @@ def list_user_drums(email: str):
         db.close()
 
 if __name__ == "__main__":
-    list_user_drums("admin@admin.com")
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+    parser = argparse.ArgumentParser(description="Exportar los tambores de un usuario")
+    parser.add_argument("--email", default="admin@admin.com", help="Email del usuario (default: admin@admin.com)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv", help="Formato del archivo (default: csv)")
+    parser.add_argument("--output", help="Archivo de salida (default: drums-<id>.<formato>)")
+    args = parser.parse_args()
 
+    list_user_drums(args.email, args.output, args.format)
@@ -0,0 +1,15 @@
+-- Migración: Conjuntos de cambios tipados en el historial de apiarios
+-- Descripción: cada alta o edición de un apiario pasa a ser una fila con
+-- field = '__created__' | '__changes__' y los cambios en "changes":
+--     {"hives": [5, 15], "honey": ["0.00", "12.50"]}   -- campo -> [anterior, nuevo]
+-- Las filas existentes (una por campo, valores en texto) quedan con changes
+-- NULL hasta que scripts/migrate_history_changesets.py las convierte.
+--
+-- Requiere create_history_archive.sql (agrega la columna también al archivo).
+
+BEGIN;
+
+ALTER TABLE apiary_history ADD COLUMN IF NOT EXISTS changes JSONB;
+ALTER TABLE apiary_history_archive ADD COLUMN IF NOT EXISTS changes JSONB;
+
+COMMIT;
@@ -0,0 +1,19 @@
+-- Migración: Índices para paginar tambores y tareas por cursor
+-- Descripción: GET /drums ordena por ("createdAt", id) y GET /tasks por
+-- (due_date, id) y piden la página siguiente con "después de esta fila" en
+-- lugar de OFFSET. Estos índices dejan empezar la lectura en el cursor.
+--
+-- CREATE INDEX CONCURRENTLY no bloquea escrituras pero no puede correr dentro
+-- de una transacción: este archivo NO usa BEGIN/COMMIT.
+
+-- Tambores del usuario del más nuevo al más viejo
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_drums_user_created
+    ON drums ("userId", "createdAt", id);
+
+-- Tareas del usuario por vencimiento, sin filtro de estado (con filtro se
+-- usa idx_tasks_user_completed_due)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_user_due
+    ON tasks (user_id, due_date, id);
+
+ANALYZE drums;
+ANALYZE tasks;
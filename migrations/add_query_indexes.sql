@@ -0,0 +1,51 @@
+-- Migración: Índices compuestos para los patrones de consulta reales
+-- Descripción: apiary_history y notifications no tenían índices además de la PK;
+-- tasks, apiary y apiary_setting no cubrían los filtros que usan los servicios.
+--
+-- CREATE INDEX CONCURRENTLY no bloquea escrituras pero no puede correr dentro
+-- de una transacción: este archivo NO usa BEGIN/COMMIT. Ejecutar con psql
+-- (cada sentencia en su propia transacción implícita).
+
+-- Historial de apiarios: cambios del usuario por campo y fecha (cosecha del día)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_apiary_history_user_field_date
+    ON apiary_history ("userId", field, "changeDate");
+
+-- Historial de un apiario ordenado por fecha
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_apiary_history_apiary_date
+    ON apiary_history ("apiaryId", "changeDate");
+
+-- Notificaciones del usuario (todas o no leídas) ordenadas por fecha
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_notifications_user_read_created
+    ON notifications ("userId", "isRead", "createdAt");
+
+-- Tareas del usuario filtradas por estado y ordenadas por vencimiento
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_user_completed_due
+    ON tasks (user_id, completed, due_date);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_apiary_id
+    ON tasks (apiary_id);
+
+-- Apiarios del usuario
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_apiary_user_updated
+    ON apiary ("userId", "updatedAt");
+
+-- Settings por usuario (cambios masivos) y por apiario (join desde apiary)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_apiary_setting_user
+    ON apiary_setting ("apiaryUserId");
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_apiary_setting_apiary
+    ON apiary_setting ("apiaryId");
+
+-- Historial de una colmena paginado por (date, id)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_hive_history_hive_date
+    ON hive_history ("hiveId", date);
+
+-- Reemplazados por idx_tasks_user_completed_due (user_id es su prefijo;
+-- completed solo tiene dos valores y nunca se filtra sin user_id)
+DROP INDEX CONCURRENTLY IF EXISTS idx_tasks_user_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_tasks_completed;
+
+ANALYZE apiary_history;
+ANALYZE notifications;
+ANALYZE tasks;
+ANALYZE apiary;
+ANALYZE apiary_setting;
+ANALYZE hive_history;
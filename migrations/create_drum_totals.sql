@@ -0,0 +1,40 @@
+-- Migración: Totales de tambores por usuario (drum_totals)
+-- Descripción: /drums/stats hacía cuatro consultas sobre drums (total,
+-- vendidos, no vendidos y sumas). Ahora lee una fila de drum_totals por clave
+-- primaria. La aplicación la actualiza con deltas en la misma transacción que
+-- cada alta, edición, venta y baja de tambores (DRUM_TOTALS_ENABLED=true).
+--
+-- El backfill reescribe las filas existentes: correrlo de nuevo al volver a
+-- activar DRUM_TOTALS_ENABLED o después de cambiar drums por SQL directo.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS drum_totals (
+    "userId" INTEGER PRIMARY KEY REFERENCES "user"(id) ON DELETE CASCADE,
+    "drumCount" INTEGER NOT NULL DEFAULT 0,
+    "soldCount" INTEGER NOT NULL DEFAULT 0,
+    "totalTare" NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    "totalWeight" NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    "updatedAt" TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Backfill: misma cuenta que DrumService.compute_stats
+INSERT INTO drum_totals ("userId", "drumCount", "soldCount", "totalTare", "totalWeight")
+SELECT
+    d."userId",
+    count(*),
+    count(*) FILTER (WHERE d.sold),
+    coalesce(sum(d.tare), 0),
+    coalesce(sum(d.weight), 0)
+FROM drums d
+GROUP BY d."userId"
+ON CONFLICT ("userId") DO UPDATE SET
+    "drumCount" = EXCLUDED."drumCount",
+    "soldCount" = EXCLUDED."soldCount",
+    "totalTare" = EXCLUDED."totalTare",
+    "totalWeight" = EXCLUDED."totalWeight",
+    "updatedAt" = CURRENT_TIMESTAMP;
+
+ANALYZE drum_totals;
+
+COMMIT;
@@ -0,0 +1,41 @@
+-- Migración: Libro de cosecha por temporada (harvest_ledger, harvest_season_total)
+-- Descripción: "cuántas alzas coseché esta temporada" obligaba a recorrer el
+-- historial de apiarios. Ahora cada escritura que cambia box, boxMedium o
+-- boxSmall agrega una fila a harvest_ledger y suma lo cosechado a
+-- harvest_season_total (por apiario y, con "apiaryId" = 0, por usuario) en la
+-- misma transacción. Los endpoints /apiarys/harvest/season* leen una fila.
+--
+-- La temporada es el año en que empieza, el 1 de HARVEST_SEASON_START_MONTH
+-- (UTC). Para cargar temporadas anteriores: scripts/backfill_harvest_ledger.py.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS harvest_ledger (
+    id SERIAL PRIMARY KEY,
+    "userId" INTEGER NOT NULL,
+    "apiaryId" INTEGER NOT NULL,
+    season INTEGER NOT NULL,
+    box INTEGER NOT NULL DEFAULT 0,
+    "boxMedium" INTEGER NOT NULL DEFAULT 0,
+    "boxSmall" INTEGER NOT NULL DEFAULT 0,
+    "harvestedBox" INTEGER NOT NULL DEFAULT 0,
+    "harvestedBoxMedium" INTEGER NOT NULL DEFAULT 0,
+    "harvestedBoxSmall" INTEGER NOT NULL DEFAULT 0,
+    "createdAt" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_harvest_ledger_user_season ON harvest_ledger ("userId", season);
+CREATE INDEX IF NOT EXISTS idx_harvest_ledger_apiary_season ON harvest_ledger ("apiaryId", season);
+
+CREATE TABLE IF NOT EXISTS harvest_season_total (
+    "userId" INTEGER NOT NULL,
+    season INTEGER NOT NULL,
+    "apiaryId" INTEGER NOT NULL,
+    box INTEGER NOT NULL DEFAULT 0,
+    "boxMedium" INTEGER NOT NULL DEFAULT 0,
+    "boxSmall" INTEGER NOT NULL DEFAULT 0,
+    "updatedAt" TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY ("userId", season, "apiaryId")
+);
+
+COMMIT;
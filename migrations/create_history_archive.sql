@@ -0,0 +1,39 @@
+-- Migración: Tabla de archivo del historial de apiarios
+-- Descripción: apiary_history crece sin límite (una fila por campo modificado y
+-- 17 filas por cada apiario creado). El job history_archive mueve a esta tabla
+-- los cambios más viejos que HISTORY_HOT_DAYS y aplica la retención por plan.
+--
+-- La tabla está particionada por mes sobre "changeDate": las consultas con
+-- rango de fechas solo leen las particiones del rango y la retención borra
+-- sobre particiones chicas. El job crea cada partición mensual
+-- (apiary_history_archive_AAAA_MM) antes de mover filas a ella; la partición
+-- DEFAULT solo recibe filas si alguien inserta fuera del job.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS apiary_history_archive (
+    id INTEGER NOT NULL,
+    "userId" INTEGER NOT NULL,
+    "apiaryId" INTEGER NOT NULL,
+    field VARCHAR NOT NULL,
+    "previousValue" VARCHAR,
+    "newValue" VARCHAR,
+    "changeDate" TIMESTAMP NOT NULL,
+    -- La clave de partición tiene que formar parte de la PK
+    PRIMARY KEY (id, "changeDate")
+) PARTITION BY RANGE ("changeDate");
+
+CREATE TABLE IF NOT EXISTS apiary_history_archive_default
+    PARTITION OF apiary_history_archive DEFAULT;
+
+-- Se propagan a cada partición
+CREATE INDEX IF NOT EXISTS idx_apiary_history_archive_apiary_date
+    ON apiary_history_archive ("apiaryId", "changeDate");
+CREATE INDEX IF NOT EXISTS idx_apiary_history_archive_user_date
+    ON apiary_history_archive ("userId", "changeDate");
+
+-- Para el borrado por retención en la tabla caliente
+CREATE INDEX IF NOT EXISTS idx_apiary_history_change_date
+    ON apiary_history ("changeDate");
+
+COMMIT;
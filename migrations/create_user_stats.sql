@@ -0,0 +1,50 @@
+-- Migración: Resumen por usuario (user_stats)
+-- Descripción: los endpoints de estadísticas (/apiarys/all/count,
+-- /apiarys/stats/boxes, /apiarys/harvested/*, /apiarys/harvesting/count)
+-- sumaban todos los apiarios del usuario en cada request. Ahora leen una fila
+-- de user_stats por clave primaria. La aplicación la actualiza con deltas en
+-- la misma transacción que cada escritura de apiarios, colmenas y settings, y
+-- el job user_stats_reconcile la recalcula cada noche.
+--
+-- Se puede correr con la aplicación en marcha: el backfill usa ON CONFLICT y
+-- el job de la noche corrige lo que se haya escrito mientras tanto.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    "userId" INTEGER PRIMARY KEY REFERENCES "user"(id) ON DELETE CASCADE,
+    "apiaryCount" INTEGER NOT NULL DEFAULT 0,
+    "hiveCount" INTEGER NOT NULL DEFAULT 0,
+    box INTEGER NOT NULL DEFAULT 0,
+    "boxMedium" INTEGER NOT NULL DEFAULT 0,
+    "boxSmall" INTEGER NOT NULL DEFAULT 0,
+    "harvestingApiaries" INTEGER NOT NULL DEFAULT 0,
+    "harvestedApiaries" INTEGER NOT NULL DEFAULT 0,
+    "harvestedHives" INTEGER NOT NULL DEFAULT 0,
+    "updatedAt" TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Backfill: misma cuenta que UserStatsService.compute
+INSERT INTO user_stats (
+    "userId", "apiaryCount", "hiveCount", box, "boxMedium", "boxSmall",
+    "harvestingApiaries", "harvestedApiaries", "harvestedHives"
+)
+SELECT
+    u.id,
+    count(a.id),
+    coalesce(sum(a.hives), 0),
+    coalesce(sum(a.box), 0),
+    coalesce(sum(a."boxMedium"), 0),
+    coalesce(sum(a."boxSmall"), 0),
+    coalesce(sum(CASE WHEN s.harvesting THEN 1 ELSE 0 END), 0),
+    coalesce(sum(CASE WHEN a.box > 0 OR a."boxMedium" > 0 OR a."boxSmall" > 0 THEN 1 ELSE 0 END), 0),
+    coalesce(sum(CASE WHEN a.box > 0 OR a."boxMedium" > 0 OR a."boxSmall" > 0 THEN a.hives ELSE 0 END), 0)
+FROM "user" u
+LEFT JOIN apiary a ON a."userId" = u.id
+LEFT JOIN apiary_setting s ON s."apiaryId" = a.id
+GROUP BY u.id
+ON CONFLICT ("userId") DO NOTHING;
+
+ANALYZE user_stats;
+
+COMMIT;
@@ -0,0 +1,10 @@
+-- Rollback: Totales de tambores por usuario (drum_totals)
+-- Desplegar antes el código anterior, o DRUM_TOTALS_ENABLED=false: con la
+-- opción activa el código actual escribe en drum_totals en cada cambio de
+-- tambores.
+
+BEGIN;
+
+DROP TABLE IF EXISTS drum_totals;
+
+COMMIT;
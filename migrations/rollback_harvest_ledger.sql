@@ -0,0 +1,10 @@
+-- Rollback: Libro de cosecha por temporada
+-- Desplegar antes el código anterior: el actual escribe en harvest_ledger en
+-- cada alta y edición de apiarios que cambia las alzas.
+
+BEGIN;
+
+DROP TABLE IF EXISTS harvest_season_total;
+DROP TABLE IF EXISTS harvest_ledger;
+
+COMMIT;
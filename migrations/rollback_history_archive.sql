@@ -0,0 +1,15 @@
+-- Rollback: Tabla de archivo del historial de apiarios
+-- Devuelve las filas archivadas a apiary_history antes de borrar el archivo.
+-- Desactivar antes el job history_archive (ENABLE_SCHEDULER=false o deploy sin él).
+
+BEGIN;
+
+INSERT INTO apiary_history (id, "userId", "apiaryId", field, "previousValue", "newValue", "changeDate")
+SELECT id, "userId", "apiaryId", field, "previousValue", "newValue", "changeDate"
+FROM apiary_history_archive
+ON CONFLICT (id) DO NOTHING;
+
+DROP TABLE IF EXISTS apiary_history_archive CASCADE;
+DROP INDEX IF EXISTS idx_apiary_history_change_date;
+
+COMMIT;
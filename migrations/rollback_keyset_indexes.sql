@@ -0,0 +1,5 @@
+-- Rollback: Índices para paginar tambores y tareas por cursor
+-- Igual que la migración, sin BEGIN/COMMIT (CONCURRENTLY).
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_drums_user_created;
+DROP INDEX CONCURRENTLY IF EXISTS idx_tasks_user_due;
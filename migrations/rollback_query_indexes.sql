@@ -0,0 +1,15 @@
+-- Rollback: Índices compuestos para los patrones de consulta reales
+-- Igual que la migración, sin BEGIN/COMMIT (CONCURRENTLY).
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_apiary_history_user_field_date;
+DROP INDEX CONCURRENTLY IF EXISTS idx_apiary_history_apiary_date;
+DROP INDEX CONCURRENTLY IF EXISTS idx_notifications_user_read_created;
+DROP INDEX CONCURRENTLY IF EXISTS idx_tasks_user_completed_due;
+DROP INDEX CONCURRENTLY IF EXISTS idx_apiary_user_updated;
+DROP INDEX CONCURRENTLY IF EXISTS idx_apiary_setting_user;
+DROP INDEX CONCURRENTLY IF EXISTS idx_apiary_setting_apiary;
+DROP INDEX CONCURRENTLY IF EXISTS idx_hive_history_hive_date;
+
+-- Índices originales de create_tasks_table.sql
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_user_id ON tasks (user_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_completed ON tasks (completed);
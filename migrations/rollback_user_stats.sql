@@ -0,0 +1,9 @@
+-- Rollback: Resumen por usuario (user_stats)
+-- Desplegar antes el código anterior: el actual escribe en user_stats en cada
+-- alta/edición/baja de apiarios, colmenas y settings.
+
+BEGIN;
+
+DROP TABLE IF EXISTS user_stats;
+
+COMMIT;
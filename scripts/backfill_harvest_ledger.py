@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Carga el libro de cosecha (harvest_ledger / harvest_season_total) a partir
+del historial de apiarios, para las temporadas anteriores al despliegue.
+
+Recorre apiary_history_archive (con --include-archive) y luego
+apiary_history por id, en lotes con un commit por lote. Correr una sola vez,
+con las tablas vacías y antes de desplegar el código que escribe el libro: si
+se corta, vaciar las dos tablas y volver a lanzar.
+
+Uso:
+    python scripts/backfill_harvest_ledger.py [--batch-size 1000] [--include-archive]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.main  # noqa: F401  (registra todos los modelos)
+from app.database import SessionLocal
+from app.models.history import History, HistoryArchive
+from app.services.harvest_service import HarvestService
+
+
+def backfill(model, batch_size, pause):
+    db = SessionLocal()
+    service = HarvestService(db)
+    recorded_total = 0
+    last_id = 0
+    try:
+        while True:
+            recorded, last_id = service.backfill_from_history(after_id=last_id, batch_size=batch_size, model=model)
+            if last_id is None:
+                break
+            db.commit()
+            recorded_total += recorded
+            print(f"{model.__tablename__}: {recorded_total} cambios de alzas registrados (hasta id {last_id})")
+            if pause:
+                time.sleep(pause)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    return recorded_total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Historial de apiarios -> libro de cosecha por temporada")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Filas de historial leídas por lote")
+    parser.add_argument("--pause", type=float, default=0.0, help="Segundos de pausa entre lotes")
+    parser.add_argument("--include-archive", action="store_true", help="Leer también apiary_history_archive (primero)")
+    args = parser.parse_args()
+
+    # El archivo tiene las filas más viejas: va primero para respetar el orden de los cambios
+    models = [HistoryArchive, History] if args.include_archive else [History]
+    for model in models:
+        total = backfill(model, args.batch_size, args.pause)
+        print(f"{model.__tablename__}: listo, {total} cambios de alzas registrados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark del listado de tambores de un usuario con muchos tambores
+(default 100.000). Compara, a distintas profundidades:
+
+- offset: OFFSET + COUNT exacto en cada página (DrumService.get_drums)
+- keyset: cursor (createdAt, id) + total de drum_totals (DrumService.get_drums_page)
+
+El cursor de cada profundidad se toma de la última fila de la página
+anterior, como lo haría el cliente. Usa un archivo SQLite temporal (no
+PostgreSQL): sirve para comparar cómo crece cada forma con la profundidad,
+no para los tiempos absolutos de producción.
+
+Uso:
+    python scripts/benchmark_drum_pagination.py [--drums 100000] [--limit 50] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+os.environ["TESTING"] = "1"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import app.main  # noqa: F401  (registra todos los modelos)
+from app.database import Base
+from app.models import Drum, User
+from app.services.drum_service import DrumService
+
+
+def setup_session(path, drums):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    user = User(name="Bench", surname="User", email="bench@example.com", password="x")
+    session.add(user)
+    session.commit()
+
+    start = datetime(2020, 1, 1)
+    batch = 10_000
+    for offset in range(0, drums, batch):
+        session.execute(insert(Drum), [
+            {
+                "userId": user.id,
+                "code": f"T-{index}",
+                "tare": Decimal("15.50"),
+                "weight": Decimal("300.25"),
+                "sold": index % 4 == 0,
+                # Varios tambores por segundo: el id desempata
+                "createdAt": start + timedelta(seconds=index // 3),
+            }
+            for index in range(offset, min(offset + batch, drums))
+        ])
+    service = DrumService(session)
+    service._store_totals(user.id, service.compute_stats(user.id))
+    session.commit()
+    session.connection().exec_driver_sql("ANALYZE")
+    return session, user.id
+
+
+def timed(session, func, repeat):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+        session.expunge_all()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Listado de tambores: OFFSET + COUNT vs cursor")
+    parser.add_argument("--drums", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        session, user_id = setup_session(os.path.join(directory, "bench.db"), args.drums)
+        service = DrumService(session)
+        last_page = args.drums // args.limit
+
+        print(f"{args.drums} tambores, {args.limit} por página (ms por página, promedio de {args.repeat})")
+        print(f"{'página':>8}{'offset':>10}{'keyset':>10}")
+        for page in sorted({1, 10, 100, last_page // 2, last_page}):
+            if page < 1:
+                continue
+            previous, _ = service.get_drums(user_id, page=page - 1, limit=args.limit) if page > 1 else ([], 0)
+            after = (previous[-1].createdAt, previous[-1].id) if previous else None
+
+            offset_ms = timed(session, lambda: service.get_drums(user_id, page=page, limit=args.limit), args.repeat)
+            keyset_ms = timed(session, lambda: service.get_drums_page(user_id, limit=args.limit, after=after), args.repeat)
+            print(f"{page:>8}{offset_ms:>10.2f}{keyset_ms:>10.2f}")
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark de "login storm": lanza muchos POST /auth/login concurrentes y
+mide en paralelo la latencia de un endpoint que no toca bcrypt
+(/health/live). Con bcrypt en el pool dedicado el p99 del endpoint ajeno
+debe mantenerse plano; con --inline se reproduce el comportamiento
+anterior (bcrypt en el event loop) para comparar.
+
+Uso:
+    python scripts/benchmark_login_storm.py [--logins 50] [--inline]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+os.environ["TESTING"] = "1"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, get_db
+from app.main import app
+from app.models.user import User
+from app.services import auth_service as auth_service_module
+from app.services.auth_service import pwd_context
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def setup_database():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = SessionLocal()
+    db.add(User(name="Bench", surname="User", email="bench@example.com", password=pwd_context.hash("password123")))
+    db.commit()
+    db.close()
+
+    def override_get_db():
+        session = SessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+
+
+async def run(logins: int, probe_interval: float):
+    probe_latencies = []
+    storm_done = asyncio.Event()
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        async def probe():
+            while not storm_done.is_set():
+                start = time.perf_counter()
+                await client.get("/health/live")
+                probe_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(probe_interval)
+
+        async def login():
+            response = await client.post(
+                "/auth/login",
+                json={"email": "bench@example.com", "password": "password123"},
+            )
+            return response.status_code
+
+        probe_task = asyncio.create_task(probe())
+        await asyncio.sleep(0.2)  # línea base sin carga
+
+        start = time.perf_counter()
+        statuses = await asyncio.gather(*(login() for _ in range(logins)))
+        storm_seconds = time.perf_counter() - start
+
+        storm_done.set()
+        await probe_task
+
+    return statuses, storm_seconds, probe_latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=50, help="Logins concurrentes")
+    parser.add_argument("--probe-interval", type=float, default=0.005, help="Segundos entre probes")
+    parser.add_argument("--inline", action="store_true", help="Ejecutar bcrypt en el event loop (comportamiento anterior)")
+    args = parser.parse_args()
+
+    if args.inline:
+        async def inline_task(operation, func, *func_args):
+            return func(*func_args)
+        auth_service_module.run_password_task = inline_task
+
+    setup_database()
+    statuses, storm_seconds, latencies = asyncio.run(run(args.logins, args.probe_interval))
+
+    ok = sum(1 for code in statuses if code == 200)
+    mode = "inline (event loop)" if args.inline else "password pool"
+    print(f"Modo: {mode}")
+    print(f"Logins: {ok}/{len(statuses)} OK en {storm_seconds:.2f}s ({len(statuses) / storm_seconds:.1f}/s)")
+    print(f"/health/live: {len(latencies)} probes")
+    print(f"  p50: {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"  p99: {percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"  max: {max(latencies) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
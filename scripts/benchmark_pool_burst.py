@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Prueba de carga del pool de conexiones: lanza una ráfaga de checkouts
+concurrentes (cada uno retiene la conexión ``--hold-ms``) y reporta cuántas
+conexiones físicas se abrieron, el pico en uso y la espera por conexión.
+
+Con DB_POOL_MODE=queue las conexiones abiertas nunca superan
+pool_size + max_overflow aunque la ráfaga sea mucho mayor; con --pool-mode
+null cada checkout abre una conexión nueva (el "connection storm" que evita
+el pool, o que absorbe un pooler externo).
+
+Uso:
+    python scripts/benchmark_pool_burst.py [--url postgresql://...] [--burst 200]
+        [--hold-ms 20] [--pool-size 5] [--max-overflow 10] [--pool-mode queue|null]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("TESTING", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, text
+
+from app.config import settings
+from app.database import build_pool_options
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_burst(url, burst, hold_ms, pool_mode):
+    engine = create_engine(url, **build_pool_options(pool_mode))
+
+    lock = threading.Lock()
+    stats = {"opened": 0, "checked_out": 0, "peak": 0}
+
+    @event.listens_for(engine.pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        with lock:
+            stats["opened"] += 1
+
+    @event.listens_for(engine.pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        with lock:
+            stats["checked_out"] += 1
+            stats["peak"] = max(stats["peak"], stats["checked_out"])
+
+    @event.listens_for(engine.pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        with lock:
+            stats["checked_out"] -= 1
+
+    waits = []
+    timeouts = 0
+
+    def worker(_):
+        nonlocal timeouts
+        start = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                wait = time.perf_counter() - start
+                conn.execute(text("SELECT 1"))
+                time.sleep(hold_ms / 1000)
+        except Exception:
+            with lock:
+                timeouts += 1
+            return
+        with lock:
+            waits.append(wait)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=burst) as executor:
+        list(executor.map(worker, range(burst)))
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+
+    return stats, waits, timeouts, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ráfaga de checkouts contra el pool de conexiones")
+    parser.add_argument("--url", default=None, help="URL de la base (default: SQLite temporal)")
+    parser.add_argument("--burst", type=int, default=200, help="Checkouts concurrentes")
+    parser.add_argument("--hold-ms", type=float, default=20, help="Tiempo que cada checkout retiene la conexión")
+    parser.add_argument("--pool-size", type=int, default=settings.db_pool_size)
+    parser.add_argument("--max-overflow", type=int, default=settings.db_max_overflow)
+    parser.add_argument("--pool-timeout", type=float, default=settings.db_pool_timeout)
+    parser.add_argument("--pool-mode", choices=["queue", "null"], default="queue")
+    args = parser.parse_args()
+
+    settings.db_pool_size = args.pool_size
+    settings.db_max_overflow = args.max_overflow
+    settings.db_pool_timeout = args.pool_timeout
+
+    url, path = args.url, None
+    if url is None:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        url = f"sqlite:///{path}"
+
+    try:
+        stats, waits, timeouts, elapsed = run_burst(url, args.burst, args.hold_ms, args.pool_mode)
+    finally:
+        if path:
+            os.remove(path)
+
+    limit = args.pool_size + args.max_overflow if args.pool_mode == "queue" else args.burst
+    print(f"Pool mode:            {args.pool_mode}")
+    print(f"Burst:                {args.burst} checkouts x {args.hold_ms:.0f} ms")
+    print(f"Connections opened:   {stats['opened']} (limit {limit})")
+    print(f"Peak checked out:     {stats['peak']}")
+    if waits:
+        print(f"Checkout wait p50:    {percentile(waits, 50) * 1000:.1f} ms")
+        print(f"Checkout wait p99:    {percentile(waits, 99) * 1000:.1f} ms")
+    print(f"Timeouts / errors:    {timeouts}")
+    print(f"Elapsed:              {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Microbenchmark del overhead Python por query en los lookups calientes
+(get_apiary, get_drum_by_id, get_hive_by_id, get_user). Compara:
+
+- query:  session.query(...).filter(...).first()  (forma anterior)
+- select: select(...).where(...) construido en cada llamada
+- lambda: lambda_stmt(...) (forma actual en los servicios)
+
+Usa SQLite en memoria para que el tiempo medido sea casi todo Python
+(construcción del statement, cache key, compilación, ORM).
+
+Uso:
+    python scripts/benchmark_statement_cache.py [--iterations 5000]
+"""
+import argparse
+import os
+import sys
+import time
+from decimal import Decimal
+
+os.environ["TESTING"] = "1"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import and_, create_engine, select
+from sqlalchemy.orm import joinedload, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.main  # noqa: F401  (registra todos los modelos)
+from app.config import settings
+from app.database import Base
+from app.models import Apiary, Drum, Hive, Settings, User
+from app.services.apiary_service import ApiaryService
+from app.services.drum_service import DrumService
+from app.services.hive_service import HiveService
+from app.services.user_service import UserService
+
+
+def setup_session():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+        query_cache_size=settings.db_query_cache_size,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    user = User(name="Bench", surname="User", email="bench@example.com", password="x")
+    session.add(user)
+    session.flush()
+    apiary = Apiary(userId=user.id, name="A", hives=1, status="normal", image="a.jpg")
+    session.add(apiary)
+    session.flush()
+    session.add_all([
+        Settings(apiaryId=apiary.id, apiaryUserId=user.id),
+        Drum(userId=user.id, code="T-1", tare=Decimal("1"), weight=Decimal("2")),
+        Hive(userId=user.id, apiaryId=apiary.id, name="H-1"),
+    ])
+    session.commit()
+    return session, user.id, apiary.id
+
+
+def timed(session, func, iterations):
+    func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+        # Sin identity map caliente: se mide la query completa cada vez
+        session.expunge_all()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Overhead por query: Query vs select() vs lambda_stmt")
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    session, user_id, apiary_id = setup_session()
+    drum_id = hive_id = 1
+
+    cases = {
+        "get_apiary": {
+            "query": lambda: session.query(Apiary).options(joinedload(Apiary.settings)).filter(Apiary.id == apiary_id).first(),
+            "select": lambda: session.execute(
+                select(Apiary).options(joinedload(Apiary.settings)).where(Apiary.id == apiary_id)
+            ).scalars().first(),
+            "lambda": lambda: ApiaryService(session).get_apiary(apiary_id),
+        },
+        "get_drum_by_id": {
+            "query": lambda: session.query(Drum).filter(and_(Drum.id == drum_id, Drum.userId == user_id)).first(),
+            "select": lambda: session.execute(
+                select(Drum).where(and_(Drum.id == drum_id, Drum.userId == user_id))
+            ).scalars().first(),
+            "lambda": lambda: DrumService(session).get_drum_by_id(drum_id, user_id),
+        },
+        "get_hive_by_id": {
+            "query": lambda: session.query(Hive).filter(and_(Hive.id == hive_id, Hive.userId == user_id)).first(),
+            "select": lambda: session.execute(
+                select(Hive).where(and_(Hive.id == hive_id, Hive.userId == user_id))
+            ).scalars().first(),
+            "lambda": lambda: HiveService(session).get_hive_by_id(hive_id, user_id),
+        },
+        "get_user": {
+            "query": lambda: session.query(User).filter(User.id == user_id).first(),
+            "select": lambda: session.execute(select(User).where(User.id == user_id)).scalars().first(),
+            "lambda": lambda: UserService(session).get_user(user_id),
+        },
+    }
+
+    print(f"{'lookup':<16}{'query':>10}{'select':>10}{'lambda':>10}   (µs por query, {args.iterations} iteraciones)")
+    for name, variants in cases.items():
+        results = {variant: timed(session, func, args.iterations) for variant, func in variants.items()}
+        print(f"{name:<16}{results['query']:>10.1f}{results['select']:>10.1f}{results['lambda']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Convierte el historial de apiarios del formato por campo (una fila por campo
+con valores en texto) a conjuntos de cambios tipados (una fila por alta o
+edición, ver app/services/history_service.py).
+
+Recorre la tabla por id en lotes, con un commit por lote, así que se puede
+cortar y volver a lanzar: solo toma filas con ``changes`` NULL.
+
+Uso:
+    python scripts/migrate_history_changesets.py [--batch-size 1000] [--include-archive]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.main  # noqa: F401  (registra todos los modelos)
+from app.database import SessionLocal
+from app.models.history import History, HistoryArchive
+from app.services.history_service import HistoryService
+
+
+def migrate(model, batch_size, pause):
+    db = SessionLocal()
+    service = HistoryService(db)
+    converted_total = 0
+    last_id = 0
+    try:
+        while True:
+            converted, last_id = service.convert_legacy_batch(model, after_id=last_id, batch_size=batch_size)
+            if last_id is None:
+                break
+            db.commit()
+            converted_total += converted
+            print(f"{model.__tablename__}: {converted_total} filas convertidas (hasta id {last_id})")
+            if pause:
+                time.sleep(pause)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    return converted_total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Historial de apiarios: filas por campo -> conjuntos de cambios")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Filas leídas por lote")
+    parser.add_argument("--pause", type=float, default=0.0, help="Segundos de pausa entre lotes")
+    parser.add_argument("--include-archive", action="store_true", help="Convertir también apiary_history_archive")
+    args = parser.parse_args()
+
+    models = [History, HistoryArchive] if args.include_archive else [History]
+    for model in models:
+        total = migrate(model, args.batch_size, args.pause)
+        print(f"{model.__tablename__}: listo, {total} filas convertidas")
+
+
+if __name__ == "__main__":
+    main()
@@ -98,7 +98,7 @@ async def test_auth_endpoints(db: Session):
     
     return test_user_id, token
 
-def test_user_endpoints(db: Session, user_id: int, auth_service: AuthService):
+async def test_user_endpoints(db: Session, user_id: int, auth_service: AuthService):
     """Prueba los endpoints de usuario."""
     print("\n" + "="*60)
     print("PRUEBAS: Endpoints de Usuario")
@@ -125,7 +125,7 @@ def test_user_endpoints(db: Session, user_id: int, auth_service: AuthService):
             currentPassword="password123",
             newPassword="newpassword123"
         )
-        success = user_service.change_password(user_id, password_data, auth_service)
+        success = await user_service.change_password(user_id, password_data, auth_service)
         if success:
             print_success("Contraseña cambiada exitosamente")
         else:
@@ -318,7 +318,7 @@ async def main():
         
         # Pruebas de usuario
         auth_service = AuthService(db)
-        test_user_endpoints(db, user_id, auth_service)
+        await test_user_endpoints(db, user_id, auth_service)
         
         # Pruebas de dispositivos
         test_device_endpoints(db, user_id)
@@ -10,6 +10,10 @@ from app.database import Base, get_db
 from app.main import app
 from app.models import User, Apiary, Settings, History, News, Drum, Hive, HiveHistory
 from app.models.user import Role
+from app.utils.auth_tokens import verified_token_cache
+from app.services.user_service import user_cache
+from app.services.history_series_service import series_cache
+from app.utils.db_instrumentation import instrument_engine
 
 # Use in-memory SQLite for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
@@ -19,11 +23,17 @@ engine = create_engine(
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
+# Instrumentado como el engine real: habilita X-Query-Count en los tests
+instrument_engine(engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 @pytest.fixture(scope="function")
 def db():
     """Create a fresh database for each test."""
+    # Los ids se reutilizan entre tests: no arrastrar filas/tokens cacheados
+    verified_token_cache.clear()
+    user_cache.clear()
+    series_cache.clear()
     Base.metadata.create_all(bind=engine)
     db = TestingSessionLocal()
     try:
@@ -0,0 +1,29 @@
+from prometheus_client import REGISTRY
+
+from app.middleware.metrics import UNMATCHED_ENDPOINT
+
+
+def requests_count(method, endpoint, status_code):
+    value = REGISTRY.get_sample_value(
+        "http_requests_total",
+        {"method": method, "endpoint": endpoint, "status_code": str(status_code)},
+    )
+    return value or 0
+
+
+def test_endpoint_label_uses_route_template(client):
+    before = requests_count("GET", "/hives/{id}/history", 403)
+
+    client.get("/hives/42/history")
+    client.get("/hives/43/history")
+
+    assert requests_count("GET", "/hives/{id}/history", 403) == before + 2
+    assert requests_count("GET", "/hives/42/history", 403) == 0
+
+
+def test_endpoint_label_for_unmatched_path(client):
+    before = requests_count("GET", UNMATCHED_ENDPOINT, 404)
+
+    client.get("/does-not-exist/123")
+
+    assert requests_count("GET", UNMATCHED_ENDPOINT, 404) == before + 1
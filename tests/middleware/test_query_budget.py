@@ -0,0 +1,68 @@
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.config import settings
+from app.middleware.query_budget import QueryBudgetMiddleware
+from app.utils.db_instrumentation import instrument_engine
+
+
+def build_app(rows):
+    engine = instrument_engine(create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    ))
+    app = FastAPI()
+    app.add_middleware(QueryBudgetMiddleware)
+
+    @app.get("/items")
+    def list_items():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            # Una query por fila: el patrón que debe detectarse
+            for item_id in range(rows):
+                conn.execute(text(f"SELECT {item_id} AS detail"))
+        return {"items": rows}
+
+    return TestClient(app)
+
+
+def test_query_count_header():
+    response = build_app(rows=3).get("/items")
+
+    assert response.headers["X-Query-Count"] == "4"
+
+
+def test_repeated_statement_logs_n_plus_one(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "query_repeat_threshold", 3)
+
+    with caplog.at_level(logging.WARNING, logger="app.middleware.query_budget"):
+        build_app(rows=2).get("/items")
+        assert not any("Possible N+1" in record.getMessage() for record in caplog.records)
+
+        build_app(rows=5).get("/items")
+
+    warnings = [record.getMessage() for record in caplog.records if "Possible N+1" in record.getMessage()]
+    assert len(warnings) == 1
+    assert "GET /items" in warnings[0]
+    assert "executed 5 times" in warnings[0]
+
+
+def test_tracking_is_off_unless_environment_is_declared(monkeypatch):
+    from app.config import Settings
+
+    monkeypatch.delenv("QUERY_TRACKING_ENABLED", raising=False)
+    monkeypatch.delenv("TESTING", raising=False)
+    monkeypatch.delenv("APP_ENV", raising=False)
+    monkeypatch.delenv("ENVIRONMENT", raising=False)
+    assert Settings(_env_file=None).query_tracking_enabled is False
+
+    monkeypatch.setenv("APP_ENV", "development")
+    assert Settings(_env_file=None).query_tracking_enabled is True
+
+    monkeypatch.setenv("APP_ENV", "production")
+    assert Settings(_env_file=None).query_tracking_enabled is False
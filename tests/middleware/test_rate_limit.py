@@ -0,0 +1,64 @@
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.dependencies import get_current_user_payload
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.services.auth_service import AuthService
+from app.utils import auth_tokens
+
+
+def build_app():
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware)
+
+    @app.get("/items")
+    async def items(payload: dict = Depends(get_current_user_payload)):
+        return {"sub": payload["sub"]}
+
+    return app
+
+
+def token_for(user_id: int) -> str:
+    return AuthService(None).create_access_token({"sub": str(user_id), "role": "apicultor"})
+
+
+def test_rate_limit_is_per_user_behind_same_ip(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_default_requests", 2)
+    client = TestClient(build_app())
+    first = {"Authorization": f"Bearer {token_for(1)}"}
+    second = {"Authorization": f"Bearer {token_for(2)}"}
+
+    assert client.get("/items", headers=first).status_code == 200
+    assert client.get("/items", headers=first).status_code == 200
+    assert client.get("/items", headers=first).status_code == 429
+
+    # Mismo IP, otro usuario: tiene su propio contador
+    assert client.get("/items", headers=second).status_code == 200
+
+
+def test_invalid_token_falls_back_to_ip(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_default_requests", 1)
+    client = TestClient(build_app())
+    headers = {"Authorization": "Bearer not-a-jwt"}
+
+    assert client.get("/items", headers=headers).status_code == 401
+    assert client.get("/items", headers=headers).status_code == 429
+
+
+def test_token_is_verified_once_per_request(monkeypatch):
+    calls = []
+    original_decode = auth_tokens.decode_access_token
+
+    def counting_decode(token):
+        calls.append(token)
+        return original_decode(token)
+
+    monkeypatch.setattr(auth_tokens, "decode_access_token", counting_decode)
+    client = TestClient(build_app())
+
+    response = client.get("/items", headers={"Authorization": f"Bearer {token_for(7)}"})
+
+    assert response.status_code == 200
+    assert response.json() == {"sub": "7"}
+    assert len(calls) == 1
@@ -192,3 +192,167 @@ def test_set_harvesting_for_all_unauthorized(client):
     )
     
     assert response.status_code == 403
+
+def test_harvested_today_counts_invalid_timezone(client, auth_headers):
+    """Test harvested-today counts with an unknown timezone."""
+    response = client.get("/apiarys/harvested/today/counts?tz=Mars/Olympus", headers=auth_headers)
+
+    assert response.status_code == 400
+
+def test_harvested_today_boxes_with_timezone(client, auth_headers):
+    """Test harvested-today boxes in the user's timezone."""
+    response = client.get("/apiarys/harvested/today/boxes?tz=America/Argentina/Buenos_Aires", headers=auth_headers)
+
+    assert response.status_code == 200
+
+def test_get_apiary_change_sets(client, auth_headers, test_apiary):
+    """Test the typed change-set history next to the per-field history."""
+    response = client.put(f"/apiarys/{test_apiary.id}", headers=auth_headers, data={"hives": "8"})
+    assert response.status_code == 200
+
+    response = client.get(f"/apiarys/history/{test_apiary.id}/changes", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data[0]["kind"] == "update"
+    assert data[0]["changes"]["hives"] == [5, 8]
+
+    response = client.get(f"/apiarys/history/{test_apiary.id}", headers=auth_headers)
+    assert response.status_code == 200
+    assert {"field": "hives", "previousValue": "5", "newValue": "8"}.items() <= response.json()[0].items()
+
+def _seed_history(db, apiary, count):
+    from datetime import datetime, timedelta
+    from app.models.history import History
+    start = datetime(2024, 1, 1)
+    for index in range(count):
+        db.add(History(
+            userId=apiary.userId, apiaryId=apiary.id, field="__changes__",
+            changes={"hives" if index % 2 else "box": [index, index + 1]},
+            changeDate=start + timedelta(hours=index),
+        ))
+    db.commit()
+
+def test_apiary_history_cursor_pagination(client, auth_headers, test_apiary, db):
+    """Test walking the apiary history with the X-Next-Cursor header."""
+    _seed_history(db, test_apiary, 7)
+
+    seen = []
+    cursor = None
+    for _ in range(4):
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = client.get(f"/apiarys/history/{test_apiary.id}/changes", headers=auth_headers, params=params)
+        assert response.status_code == 200
+        seen.extend(item["changes"] for item in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert len(seen) == 7
+    assert seen[0] == {"box": [6, 7]}
+    assert seen[-1] == {"box": [0, 1]}
+
+def test_apiary_history_filters(client, auth_headers, test_apiary, db):
+    """Test field and date filters on the apiary history."""
+    _seed_history(db, test_apiary, 6)
+
+    response = client.get(
+        f"/apiarys/history/{test_apiary.id}",
+        headers=auth_headers,
+        params={"field": "hives", "since": "2024-01-01T02:00:00Z", "until": "2024-01-01T05:00:00+00:00"},
+    )
+
+    assert response.status_code == 200
+    assert [(item["field"], item["newValue"]) for item in response.json()] == [("hives", "4")]
+
+def test_apiary_history_invalid_cursor(client, auth_headers, test_apiary):
+    """Test an invalid history cursor."""
+    response = client.get(f"/apiarys/history/{test_apiary.id}", headers=auth_headers, params={"cursor": "nope"})
+
+    assert response.status_code == 400
+
+def test_apiary_history_ndjson_stream(client, auth_headers, test_apiary, db):
+    """Test the streamed NDJSON history export."""
+    import json
+    _seed_history(db, test_apiary, 250)
+
+    response = client.get(f"/apiarys/history/{test_apiary.id}/changes", headers=auth_headers, params={"format": "ndjson"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 250
+    assert "X-Next-Cursor" not in response.headers
+
+def test_apiary_history_csv_export(client, auth_headers, test_apiary, db):
+    """Test the streamed CSV history export."""
+    import csv
+    import io
+    _seed_history(db, test_apiary, 30)
+
+    response = client.get(f"/apiarys/history/{test_apiary.id}", headers=auth_headers, params={"format": "csv"})
+
+    assert response.status_code == 200
+    assert f'filename="apiary-{test_apiary.id}-history.csv"' in response.headers["content-disposition"]
+    rows = list(csv.reader(io.StringIO(response.content.decode("utf-8-sig"))))
+    assert rows[0] == ["changeDate", "field", "previousValue", "newValue", "userName"]
+    assert len(rows) == 31
+
+def test_export_apiaries(client, auth_headers, test_apiary):
+    """Test the apiary export (declared before /apiarys/{id})."""
+    import csv
+    import io
+
+    response = client.get("/apiarys/export", headers=auth_headers)
+
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.content.decode("utf-8-sig"))))
+    assert rows[0][:3] == ["id", "name", "status"]
+    assert [row[1] for row in rows[1:]] == [test_apiary.name]
+
+def test_apiary_history_series(client, auth_headers, test_apiary, db):
+    """Test the bucketed history series for charts."""
+    _seed_history(db, test_apiary, 7)
+
+    response = client.get(
+        f"/apiarys/history/{test_apiary.id}/series",
+        headers=auth_headers,
+        params={"field": ["box", "hives"], "bucket": "day", "agg": ["last", "sum"]},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "bucket": "day",
+        "buckets": ["2024-01-01"],
+        "series": {"box": {"last": [7], "sum": [16]}, "hives": {"last": [6], "sum": [12]}},
+    }
+
+    invalid = client.get(f"/apiarys/history/{test_apiary.id}/series", headers=auth_headers, params={"field": "name"})
+    assert invalid.status_code == 400
+    invalid = client.get(
+        f"/apiarys/history/{test_apiary.id}/series", headers=auth_headers, params={"field": "box", "bucket": "year"}
+    )
+    assert invalid.status_code == 422
+
+
+def test_season_harvest_endpoints(client, auth_headers, test_apiary, admin_headers):
+    """Test the per-season harvest totals."""
+    response = client.put(f"/apiarys/{test_apiary.id}", headers=auth_headers, data={"box": "3", "boxSmall": "1"})
+    assert response.status_code == 200
+
+    response = client.get("/apiarys/harvest/season", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["box"], data["boxSmall"], data["total"]) == (3, 1, 4)
+    assert data["end"] == f"{data['season'] + 1}{data['start'][4:]}"
+
+    response = client.get(f"/apiarys/{test_apiary.id}/harvest/season", headers=auth_headers)
+    assert response.json()["total"] == 4
+
+    response = client.get("/apiarys/harvest/season", headers=auth_headers, params={"season": 2000})
+    assert response.json()["total"] == 0
+
+    response = client.get("/apiarys/harvest/seasons", headers=auth_headers)
+    assert [item["total"] for item in response.json()] == [4]
+
+    response = client.get(f"/apiarys/{test_apiary.id}/harvest/season", headers=admin_headers)
+    assert response.status_code == 403
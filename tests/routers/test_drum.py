@@ -103,6 +103,46 @@ def test_get_drums_with_pagination(client, auth_headers, test_user, db):
     assert data["pagination"]["page"] == 1
     assert data["pagination"]["limit"] == 2
 
+def test_create_drums_bulk(client, auth_headers, test_drum):
+    """Test the bulk intake endpoint with per-item results."""
+    response = client.post("/drums/bulk", headers=auth_headers, json={"drums": [
+        {"code": "TAMBOR-100", "tare": "15.5", "weight": "300"},
+        {"code": test_drum.code, "tare": "15.5", "weight": "300"},
+        {"code": "TAMBOR-101", "tare": "15.5", "weight": "-3"},
+    ]})
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["rejected"]) == (1, 2)
+    assert [r["status"] for r in data["results"]] == ["created", "duplicate", "invalid"]
+    
+    created = client.get(f"/drums/{data['results'][0]['id']}", headers=auth_headers)
+    assert created.json()["code"] == "TAMBOR-100"
+    
+    invalid = client.post("/drums/bulk", headers=auth_headers, json={"drums": [{"code": "X", "tare": "a", "weight": "1"}]})
+    assert invalid.status_code == 422
+
+def test_get_drums_cursor_pagination(client, auth_headers, test_user, db):
+    """Test walking the drum list with the opaque cursor."""
+    from app.services.drum_service import DrumService
+    from app.schemas.drum import DrumCreate
+    
+    service = DrumService(db)
+    for i in range(3):
+        service.create_drum(test_user.id, DrumCreate(code=f"TAMBOR-{i:03d}", tare=Decimal("1"), weight=Decimal("2")))
+    
+    first = client.get("/drums?limit=2", headers=auth_headers)
+    cursor = first.json()["pagination"]["nextCursor"]
+    assert first.headers["X-Next-Cursor"] == cursor
+    assert first.json()["pagination"]["total"] == 3
+    
+    second = client.get("/drums", headers=auth_headers, params={"limit": 2, "cursor": cursor})
+    assert [d["code"] for d in first.json()["data"] + second.json()["data"]] == ["TAMBOR-002", "TAMBOR-001", "TAMBOR-000"]
+    assert second.json()["pagination"]["nextCursor"] is None
+    assert "X-Next-Cursor" not in second.headers
+    
+    assert client.get("/drums?cursor=nope", headers=auth_headers).status_code == 400
+
 def test_get_drums_filtered_by_sold(client, auth_headers, test_user, db):
     """Test getting drums filtered by sold status."""
     from app.services.drum_service import DrumService
@@ -339,3 +379,37 @@ def test_get_stats_empty(client, auth_headers, test_user):
     assert float(data["total_weight"]) == 0
     assert float(data["net_weight"]) == 0
 
+
+def test_export_drums_csv(client, auth_headers, test_user, db):
+    """Test the streamed CSV export of drums."""
+    import csv
+    import io
+    from app.models.drum import Drum
+
+    db.add_all([
+        Drum(userId=test_user.id, code=f"EXP-{i}", tare=Decimal("10.00"), weight=Decimal("50.00"), sold=i == 0)
+        for i in range(3)
+    ])
+    db.commit()
+
+    response = client.get("/drums/export", headers=auth_headers, params={"sold": False})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="drums.csv"' in response.headers["content-disposition"]
+    rows = list(csv.reader(io.StringIO(response.content.decode("utf-8-sig"))))
+    assert rows[0] == ["id", "code", "tare", "weight", "sold", "createdAt", "updatedAt"]
+    assert sorted(row[1] for row in rows[1:]) == ["EXP-1", "EXP-2"]
+
+def test_export_drums_xlsx(client, auth_headers, test_user):
+    """Test the XLSX export of drums and format validation."""
+    import io
+    import zipfile
+
+    response = client.get("/drums/export", headers=auth_headers, params={"format": "xlsx"})
+
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert "xl/worksheets/sheet1.xml" in archive.namelist()
+
+    assert client.get("/drums/export", headers=auth_headers, params={"format": "pdf"}).status_code == 422
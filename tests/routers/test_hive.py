@@ -119,3 +119,60 @@ def test_get_hive_history(client, auth_headers, test_apiary):
     assert data[0]["hiveId"] == hive_id
     assert data[0]["changes"]["status"] == "Excel."
     assert data[0]["changes"]["population"] == 8
+
+
+def test_get_hive_history_paginated_and_ndjson(client, auth_headers, test_apiary):
+    import json
+    create_response = client.post(
+        "/hives",
+        headers=auth_headers,
+        json={"apiaryId": test_apiary.id, "name": "H-006", "status": "Bueno", "population": 1},
+    )
+    hive_id = create_response.json()["id"]
+    for population in range(2, 6):
+        client.put(f"/hives/{hive_id}", headers=auth_headers, json={"population": population})
+
+    everything = client.get(f"/hives/{hive_id}/history", headers=auth_headers, params={"limit": 500}).json()
+    first = client.get(f"/hives/{hive_id}/history", headers=auth_headers, params={"limit": 2})
+    assert first.status_code == 200
+    assert len(first.json()) == 2
+    cursor = first.headers["X-Next-Cursor"]
+
+    rest = client.get(f"/hives/{hive_id}/history", headers=auth_headers, params={"limit": 10, "cursor": cursor})
+    assert rest.status_code == 200
+    assert "X-Next-Cursor" not in rest.headers
+    ids = [item["id"] for item in first.json() + rest.json()]
+    assert ids == [item["id"] for item in everything]
+    assert len(ids) > 2
+
+    filtered = client.get(f"/hives/{hive_id}/history", headers=auth_headers, params={"field": "name"})
+    assert filtered.json() and all("name" in item["changes"] for item in filtered.json())
+
+    stream = client.get(f"/hives/{hive_id}/history", headers=auth_headers, params={"format": "ndjson"})
+    assert stream.status_code == 200
+    assert [json.loads(line)["id"] for line in stream.text.splitlines()] == ids
+
+
+def test_get_hive_history_series(client, auth_headers, test_apiary):
+    create_response = client.post(
+        "/hives",
+        headers=auth_headers,
+        json={"apiaryId": test_apiary.id, "name": "H-007", "status": "Bueno", "population": 1},
+    )
+    hive_id = create_response.json()["id"]
+    client.put(f"/hives/{hive_id}", headers=auth_headers, json={"population": 4})
+
+    response = client.get(
+        f"/hives/{hive_id}/history/series",
+        headers=auth_headers,
+        params={"field": "population", "bucket": "month", "agg": ["last", "min"]},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["bucket"] == "month"
+    assert len(body["buckets"]) == 1
+    assert body["series"] == {"population": {"last": [4], "min": [1]}}
+
+    missing = client.get("/hives/999999/history/series", headers=auth_headers, params={"field": "population"})
+    assert missing.status_code == 404
@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from prometheus_client.parser import text_string_to_metric_families
+
+from app.utils.metrics_registry import MULTIPROC_DIR_ENV, cleanup_dead_workers
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Cada worker es un proceso aparte que importa la app en modo multi-proceso
+WORKER_SCRIPT = """
+import sys
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.business_metrics import cron_jobs_executed_total
+
+client = TestClient(app)
+for _ in range(int(sys.argv[1])):
+    client.get("/")
+cron_jobs_executed_total.labels(job_name="daily_apiary_update", status="success").inc()
+"""
+
+
+def scrape(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    samples = {}
+    for family in text_string_to_metric_families(response.text):
+        for sample in family.samples:
+            samples[(sample.name, tuple(sorted(sample.labels.items())))] = sample.value
+    return samples
+
+
+def test_metrics_aggregates_multiple_workers(client, tmp_path, monkeypatch):
+    env = {**os.environ, "TESTING": "1", MULTIPROC_DIR_ENV: str(tmp_path)}
+    requests_per_worker = [2, 3, 4]
+    workers = [
+        subprocess.Popen([sys.executable, "-c", WORKER_SCRIPT, str(count)], cwd=PROJECT_ROOT, env=env)
+        for count in requests_per_worker
+    ]
+    for worker in workers:
+        assert worker.wait(timeout=120) == 0
+
+    monkeypatch.setenv(MULTIPROC_DIR_ENV, str(tmp_path))
+    samples = scrape(client)
+
+    root_requests = ("http_requests_total", (("endpoint", "/"), ("method", "GET"), ("status_code", "200")))
+    cron_runs = ("cron_jobs_executed_total", (("job_name", "daily_apiary_update"), ("status", "success")))
+    assert samples[root_requests] == sum(requests_per_worker)
+    assert samples[cron_runs] == len(requests_per_worker)
+
+
+def test_cleanup_dead_workers_removes_live_gauges(tmp_path):
+    dead_pid = 2 ** 22 + 12345  # por encima de pid_max por defecto
+    live_gauge = tmp_path / f"gauge_livesum_{dead_pid}.db"
+    counter = tmp_path / f"counter_{dead_pid}.db"
+    live_gauge.write_bytes(b"")
+    counter.write_bytes(b"")
+
+    assert cleanup_dead_workers(str(tmp_path)) == [dead_pid]
+    assert not live_gauge.exists()
+    assert counter.exists()
@@ -0,0 +1,100 @@
+"""
+Presupuesto de queries por endpoint.
+QueryBudgetMiddleware (activo en testing) expone X-Query-Count; si un
+cambio introduce una query por fila estos tests fallan.
+"""
+from datetime import datetime, timedelta
+
+from app.models import Apiary, Settings
+from app.models.notification import Notification
+from app.services.hive_service import HiveService
+from app.services.notification_service import NotificationService
+from app.schemas.hive import HiveCreate
+from app.utils.db_instrumentation import track_queries
+
+
+def _create_apiaries(db, user, count, updated_at=None):
+    apiaries = []
+    for index in range(count):
+        apiary = Apiary(
+            userId=user.id,
+            name=f"Apiario {index}",
+            hives=0,
+            status="normal",
+            image="test.jpg",
+        )
+        if updated_at is not None:
+            apiary.updatedAt = updated_at
+        db.add(apiary)
+        db.flush()
+        db.add(Settings(apiaryId=apiary.id, apiaryUserId=user.id, tComment=True))
+        apiaries.append(apiary)
+    db.commit()
+    return apiaries
+
+
+def _query_count(response) -> int:
+    return int(response.headers["X-Query-Count"])
+
+
+def test_get_apiarys_query_budget(client, db, auth_headers, test_user):
+    _create_apiaries(db, test_user, 10)
+
+    response = client.get("/apiarys", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert len(response.json()) == 10
+    assert _query_count(response) <= 2
+
+
+def test_list_endpoints_query_budget(client, db, auth_headers, test_user, test_drum):
+    apiaries = _create_apiaries(db, test_user, 3)
+    budgets = {
+        "/drums": 3,
+        "/drums/stats": 2,
+        "/hives": 2,
+        "/tasks": 3,
+        "/notifications": 2,
+        "/apiarys/all/count": 2,
+        f"/apiarys/history/{apiaries[0].id}": 2,
+    }
+
+    for path, budget in budgets.items():
+        response = client.get(path, headers=auth_headers)
+        assert response.status_code == 200, path
+        assert _query_count(response) <= budget, path
+
+
+def test_sync_apiary_hive_count_is_single_update(db, test_user):
+    apiary = _create_apiaries(db, test_user, 1)[0]
+    apiary_id = apiary.id
+    service = HiveService(db)
+    service.create_hive(test_user.id, HiveCreate(apiaryId=apiary_id, name="H-1"))
+
+    with track_queries() as tracker:
+        service._sync_apiary_hive_count(apiary_id)
+
+    # Recarga del apiario (expirado por el commit) + UPDATE ... RETURNING;
+    # el conteo no cambió, así que user_stats no se toca
+    assert tracker.count == 2
+    db.commit()
+    db.refresh(apiary)
+    assert apiary.hives == 1
+
+
+def test_check_apiary_alerts_does_not_query_per_apiary(db, test_user):
+    apiaries = _create_apiaries(db, test_user, 8, updated_at=datetime.now() - timedelta(days=45))
+    for apiary in apiaries:
+        db.add(Notification(
+            userId=test_user.id,
+            title="Apiario sin visitar",
+            message=f"Hace más de 30 días que no registras actividad en el apiario '{apiary.name}'.",
+            type="ALERT",
+        ))
+    db.commit()
+
+    with track_queries() as tracker:
+        created = NotificationService(db).check_apiary_alerts()
+
+    assert created == 0
+    assert tracker.count <= 2
@@ -84,3 +84,34 @@ def test_count_hives_by_user_id(db, test_user, test_apiary):
     
     assert count >= test_apiary.hives
 
+
+
+def test_harvested_today_keeps_latest_change_per_field(db, test_user, test_apiary):
+    """Solo cuenta el último cambio de hoy por (apiario, campo), en la zona horaria pedida."""
+    from datetime import datetime
+    from app.models.history import History
+    from app.utils.helpers import resolve_timezone
+
+    tz = resolve_timezone("America/Argentina/Buenos_Aires")
+    # 2024-05-10 12:00 local (UTC-3); el día local va de 03:00 a 03:00 UTC
+    now = datetime(2024, 5, 10, 15, 0)
+    rows = [
+        ("box", "2", datetime(2024, 5, 10, 3, 30)),
+        ("box", "5", datetime(2024, 5, 10, 14, 0)),      # último de hoy
+        ("boxMedium", "3", datetime(2024, 5, 10, 2, 59)),  # ayer en hora local
+        ("boxSmall", "1", datetime(2024, 5, 11, 3, 0)),    # mañana en hora local
+    ]
+    for field, value, changed_at in rows:
+        db.add(History(
+            userId=test_user.id, apiaryId=test_apiary.id, field=field,
+            previousValue="0", newValue=value, changeDate=changed_at,
+        ))
+    db.commit()
+
+    data = ApiaryService(db)._get_harvested_today_changes(test_user.id, tz, now)
+
+    assert data["apiaryIds"] == {test_apiary.id}
+    assert data["box"] == 5
+    assert data["boxMedium"] == 0
+    assert data["boxSmall"] == 0
+    assert data["total"] == 5
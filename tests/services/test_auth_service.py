@@ -97,3 +97,46 @@ def test_sign_up_duplicate_email(db, test_user):
     with pytest.raises(Exception):
         asyncio.run(service.sign_up(signup_data))
 
+
+def test_verify_password_async_runs_in_pool(db):
+    """Test password verification through the dedicated pool."""
+    service = AuthService(db)
+    hashed = asyncio.run(service.hash_password_async("testpassword123"))
+
+    assert asyncio.run(service.verify_password_async("testpassword123", hashed)) is True
+    assert asyncio.run(service.verify_password_async("wrongpassword", hashed)) is False
+
+def test_password_pool_rejects_when_full(db, monkeypatch):
+    """Test that a saturated password pool answers 503 instead of queueing."""
+    from fastapi import HTTPException
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "password_hash_max_pending", 0)
+    service = AuthService(db)
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(service.hash_password_async("testpassword123"))
+
+    assert exc_info.value.status_code == 503
+
+def test_sign_in_rehashes_outdated_password(db):
+    """Test that logging in upgrades a hash created with other parameters."""
+    from passlib.context import CryptContext
+    from app.services.auth_service import pwd_context
+
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("password123")
+    user = User(name="Old", surname="Hash", email="old@example.com", password=old_hash)
+    db.add(user)
+    db.commit()
+    assert pwd_context.needs_update(old_hash)
+
+    service = AuthService(db)
+    assert service.refresh_password_hash_metrics() == {"current": 0, "outdated": 1}
+
+    asyncio.run(service.sign_in(LoginUser(email="old@example.com", password="password123")))
+    db.expire_all()
+
+    assert user.password != old_hash
+    assert not pwd_context.needs_update(user.password)
+    assert service.verify_password("password123", user.password)
+    assert service.refresh_password_hash_metrics() == {"current": 1, "outdated": 0}
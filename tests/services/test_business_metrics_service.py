@@ -0,0 +1,52 @@
+from prometheus_client import REGISTRY
+
+from app.config import settings
+from app.models import Apiary
+from app.models.device import Device
+from app.models.notification import Notification
+from app.services.business_metrics_service import BusinessMetricsService
+
+
+def _seed(db, user):
+    db.add_all([
+        Apiary(userId=user.id, name="A", hives=4, status="normal", image="a.jpg"),
+        Apiary(userId=user.id, name="B", hives=6, status="normal", image="b.jpg"),
+        Device(userId=user.id, deviceName="Pixel", platform="android"),
+        Device(userId=user.id, deviceName="Galaxy", platform="android"),
+        Device(userId=user.id, deviceName="iPhone", platform="ios"),
+        Notification(userId=user.id, title="t", message="m", isRead=False),
+        Notification(userId=user.id, title="t", message="m", isRead=True),
+    ])
+    db.commit()
+
+
+def test_collect_sets_business_gauges(db, test_user):
+    _seed(db, test_user)
+
+    values = BusinessMetricsService(db).collect()
+
+    assert values["users_total"] == 1
+    assert values["apiaries_total"] == 2
+    assert values["hives_total"] == 10
+    assert values["notifications_pending"] == 1
+    assert values["devices_by_platform"] == {"android": 2, "ios": 1}
+    assert values["devices_total"] == 3
+    assert REGISTRY.get_sample_value("hives_total") == 10
+    assert REGISTRY.get_sample_value("devices_by_platform", {"platform": "android"}) == 2
+
+
+def test_large_tables_use_planner_estimates(db, test_user, monkeypatch):
+    service = BusinessMetricsService(db)
+    monkeypatch.setattr(settings, "business_metrics_exact_count_threshold", 1000)
+    monkeypatch.setattr(service, "_estimated_rows", lambda model: 250_000)
+
+    # El total sale de reltuples, sin COUNT(*) sobre la tabla
+    assert service._count_users() == 250_000
+    assert service._count_apiaries() == 250_000
+
+
+def test_collect_skips_when_pool_is_busy(db, test_user, monkeypatch):
+    service = BusinessMetricsService(db)
+    monkeypatch.setattr(service, "is_database_busy", lambda: True)
+
+    assert service.collect() is None
@@ -2,7 +2,9 @@ import pytest
 from decimal import Decimal
 from app.services.drum_service import DrumService
 from app.schemas.drum import DrumCreate, DrumUpdate
-from app.models.drum import Drum
+from app.config import settings
+from app.models.drum import Drum, DrumTotals
+from app.utils.db_instrumentation import track_queries
 
 def test_create_drum(db, test_user):
     """Test creating a new drum."""
@@ -31,6 +33,15 @@ def test_get_drum_by_id(db, test_user, test_drum):
     assert drum.id == test_drum.id
     assert drum.code == test_drum.code
 
+def test_get_drum_by_id_binds_new_parameters_each_call(db, test_user, test_drum):
+    """El statement cacheado (lambda_stmt) no debe fijar los valores de la primera llamada."""
+    service = DrumService(db)
+    second = service.create_drum(test_user.id, DrumCreate(code="TAMBOR-002", tare=Decimal("1"), weight=Decimal("2")))
+    
+    assert service.get_drum_by_id(test_drum.id, test_user.id).code == "TAMBOR-001"
+    assert service.get_drum_by_id(second.id, test_user.id).code == "TAMBOR-002"
+    assert service.get_drum_by_id(second.id, test_user.id + 1) is None
+
 def test_get_drum_by_id_not_found(db, test_user):
     """Test getting a non-existent drum."""
     service = DrumService(db)
@@ -272,8 +283,7 @@ def test_get_stats(db, test_user):
     assert stats["not_sold"] == 1
     assert stats["total_tare"] == Decimal("33.8")  # 15.5 + 18.3
     assert stats["total_weight"] == Decimal("97.9")  # 45.2 + 52.7
-    # Allow for floating point precision
-    assert abs(float(stats["net_weight"]) - 64.1) < 0.01  # 97.9 - 33.8
+    assert stats["net_weight"] == Decimal("64.1")  # 97.9 - 33.8, sin pasar por float
 
 def test_get_stats_empty(db, test_user):
     """Test getting statistics when user has no drums."""
@@ -288,3 +298,148 @@ def test_get_stats_empty(db, test_user):
     assert stats["total_weight"] == Decimal("0")
     assert stats["net_weight"] == Decimal("0")
 
+def _totals(db, user_id):
+    db.expire_all()
+    row = db.get(DrumTotals, user_id)
+    return (row.drumCount, row.soldCount, row.totalTare, row.totalWeight) if row else None
+
+def test_drum_writes_maintain_totals_row(db, test_user):
+    """Alta, edición, venta y bajas mantienen drum_totals igual al cálculo completo."""
+    service = DrumService(db)
+    user_id = test_user.id
+
+    first = service.create_drum(user_id, DrumCreate(code="T-1", tare=Decimal("10.10"), weight=Decimal("50.25")))
+    assert _totals(db, user_id) == (1, 0, Decimal("10.10"), Decimal("50.25"))
+
+    second = service.create_drum(user_id, DrumCreate(code="T-2", tare=Decimal("0.20"), weight=Decimal("0.10")))
+    service.update_drum(first.id, user_id, DrumUpdate(weight=Decimal("60.00")))
+    service.mark_as_sold(second.id, user_id, True)
+    assert _totals(db, user_id) == (2, 1, Decimal("10.30"), Decimal("60.10"))
+
+    service.delete_drum(first.id, user_id)
+    assert _totals(db, user_id) == (1, 1, Decimal("0.20"), Decimal("0.10"))
+
+    service.delete_all_drums(user_id, sold=True)
+    assert _totals(db, user_id) == (0, 0, Decimal("0"), Decimal("0"))
+    assert service.get_stats(user_id) == service.compute_stats(user_id)
+
+def test_get_stats_is_one_query(db, test_user):
+    """Las estadísticas salen de una consulta: la fila de drum_totals o un solo agregado."""
+    user_id = test_user.id
+    service = DrumService(db)
+    service.create_drum(user_id, DrumCreate(code="T-1", tare=Decimal("1"), weight=Decimal("2")))
+
+    with track_queries() as tracker:
+        stats = service.get_stats(user_id)
+    assert tracker.count == 1
+    assert stats["total"] == 1
+
+    db.query(DrumTotals).delete()
+    db.commit()
+    with track_queries() as tracker:
+        assert service.compute_stats(user_id) == stats
+    assert tracker.count == 1
+
+def test_get_stats_without_totals_row(db, test_user, monkeypatch):
+    """Con drum_totals apagado no se escribe la fila y se calcula en cada lectura."""
+    monkeypatch.setattr(settings, "drum_totals_enabled", False)
+    service = DrumService(db)
+    service.create_drum(test_user.id, DrumCreate(code="T-1", tare=Decimal("1.5"), weight=Decimal("3")))
+
+    assert _totals(db, test_user.id) is None
+    assert service.get_stats(test_user.id)["net_weight"] == Decimal("1.5")
+
+def test_writes_with_totals_disabled_drop_stale_row(db, test_user, monkeypatch):
+    """Una escritura con drum_totals apagado borra la fila: al reactivarlo no se sirven totales viejos."""
+    service = DrumService(db)
+    service.create_drum(test_user.id, DrumCreate(code="T-1", tare=Decimal("1"), weight=Decimal("2")))
+    assert _totals(db, test_user.id) is not None
+
+    monkeypatch.setattr(settings, "drum_totals_enabled", False)
+    service.create_drum(test_user.id, DrumCreate(code="T-2", tare=Decimal("1"), weight=Decimal("2")))
+    assert _totals(db, test_user.id) is None
+
+    monkeypatch.setattr(settings, "drum_totals_enabled", True)
+    assert service.get_stats(test_user.id)["total"] == 2
+    assert service.get_drums_page(test_user.id)[2] == 2
+
+def test_reconcile_totals_creates_and_fixes_rows(db, test_user, test_admin):
+    service = DrumService(db)
+    service.create_drum(test_user.id, DrumCreate(code="T-1", tare=Decimal("1.25"), weight=Decimal("5")))
+    db.add(Drum(userId=test_admin.id, code="A-1", tare=Decimal("2"), weight=Decimal("3"), sold=True))
+    # Cambio por fuera de la aplicación: la fila de test_user queda desactualizada
+    db.query(Drum).filter(Drum.userId == test_user.id).update({"sold": True})
+    db.commit()
+
+    counts = service.reconcile_totals(batch_size=1)
+
+    assert counts == {"checked": 2, "created": 1, "fixed": 1}
+    assert _totals(db, test_user.id) == (1, 1, Decimal("1.25"), Decimal("5.00"))
+    assert _totals(db, test_admin.id) == (1, 1, Decimal("2.00"), Decimal("3.00"))
+    assert service.reconcile_totals() == {"checked": 2, "created": 0, "fixed": 0}
+
+def test_get_drums_page_walks_every_drum_once(db, test_user):
+    """Paginación por (createdAt, id): sin repetidos ni saltos aunque compartan createdAt."""
+    service = DrumService(db)
+    ids = [
+        service.create_drum(test_user.id, DrumCreate(code=f"T-{i}", tare=Decimal("1"), weight=Decimal("2"))).id
+        for i in range(5)
+    ]
+
+    seen, after = [], None
+    while True:
+        drums, after, total = service.get_drums_page(test_user.id, limit=2, after=after)
+        seen += [drum.id for drum in drums]
+        assert total == 5
+        if after is None:
+            break
+
+    assert seen == sorted(ids, reverse=True)
+
+def test_get_drums_page_totals(db, test_user):
+    """El total sale de drum_totals; exact_total cuenta los tambores."""
+    service = DrumService(db)
+    drum = service.create_drum(test_user.id, DrumCreate(code="T-1", tare=Decimal("1"), weight=Decimal("2")))
+    service.create_drum(test_user.id, DrumCreate(code="T-2", tare=Decimal("1"), weight=Decimal("2")))
+    service.mark_as_sold(drum.id, test_user.id, True)
+    # Cambio por fuera de la aplicación: drum_totals queda desactualizado
+    db.query(Drum).filter(Drum.id == drum.id).update({"sold": False})
+    db.commit()
+
+    assert service.get_drums_page(test_user.id, sold=True)[2] == 1
+    assert service.get_drums_page(test_user.id, sold=False)[2] == 1
+    assert service.get_drums_page(test_user.id, sold=True, exact_total=True)[2] == 0
+
+def test_create_drums_bulk(db, test_user, test_drum):
+    """Un lote: repetidos en el lote y en la base, inválidos y una sola inserción."""
+    service = DrumService(db)
+    user_id = test_user.id
+    batch = [
+        DrumCreate(code=" T-10 ", tare=Decimal("15"), weight=Decimal("300.50")),
+        DrumCreate(code="T-10", tare=Decimal("15"), weight=Decimal("300")),
+        DrumCreate(code=test_drum.code, tare=Decimal("15"), weight=Decimal("300")),
+        DrumCreate(code="T-11", tare=Decimal("-1"), weight=Decimal("300")),
+        DrumCreate(code="", tare=Decimal("1"), weight=Decimal("2")),
+        DrumCreate(code="T-12", tare=Decimal("14.25"), weight=Decimal("280")),
+    ]
+
+    with track_queries() as tracker:
+        result = service.create_drums_bulk(user_id, batch)
+
+    # Códigos existentes, un INSERT y drum_totals (UPDATE; sin fila, cálculo y guardado)
+    assert tracker.count == 5
+    assert (result["created"], result["rejected"]) == (2, 4)
+    assert [r["status"] for r in result["results"]] == ["created", "duplicate", "duplicate", "invalid", "invalid", "created"]
+    created = [r for r in result["results"] if r["status"] == "created"]
+    assert [service.get_drum_by_id(r["id"], user_id).code for r in created] == ["T-10", "T-12"]
+    assert _totals(db, user_id) == (3, 0, Decimal("44.75"), Decimal("625.70"))
+
+def test_create_drums_bulk_limit(db, test_user, monkeypatch):
+    """Lotes más grandes que DRUM_BULK_MAX_ITEMS se rechazan enteros."""
+    from fastapi import HTTPException
+    monkeypatch.setattr(settings, "drum_bulk_max_items", 2)
+    items = [DrumCreate(code=f"T-{i}", tare=Decimal("1"), weight=Decimal("2")) for i in range(3)]
+
+    with pytest.raises(HTTPException) as exc:
+        DrumService(db).create_drums_bulk(test_user.id, items)
+    assert exc.value.status_code == 400
@@ -0,0 +1,120 @@
+import asyncio
+from datetime import date, datetime
+
+from app.models.harvest import HarvestLedger, HarvestSeasonTotal
+from app.models.history import History, HistoryArchive
+from app.schemas.apiary import UpdateApiary
+from app.services.apiary_service import ApiaryService
+from app.services.harvest_service import USER_TOTAL, HarvestService, season_bounds, season_of
+from app.services.history_service import CHANGESET_FIELD
+from app.utils.db_instrumentation import track_queries
+
+
+def _totals(db, user_id, season, apiary_id=USER_TOTAL):
+    db.expire_all()
+    row = db.get(HarvestSeasonTotal, (user_id, season, apiary_id))
+    return (row.box, row.boxMedium, row.boxSmall) if row else None
+
+
+def test_season_of_and_bounds():
+    assert season_of(datetime(2024, 6, 30, 23, 59)) == 2023
+    assert season_of(datetime(2024, 7, 1)) == 2024
+    assert season_bounds(2024) == (date(2024, 7, 1), date(2025, 7, 1))
+
+
+def test_record_sums_apiary_and_user_totals(db, test_user, test_apiary, test_admin):
+    service = HarvestService(db)
+    at = datetime(2024, 8, 1)
+
+    assert service.record(test_user.id, test_apiary.id, {"box": 1}, {"box": 1}, at=at) is False
+    service.record(test_user.id, test_apiary.id, {}, {"box": 4, "boxSmall": 1}, at=at)
+    service.record(test_user.id, 999, {"box": 2}, {"box": 5}, at=at)
+    # Otra temporada y otro usuario no se mezclan
+    service.record(test_user.id, test_apiary.id, {}, {"box": 9}, at=datetime(2024, 6, 1))
+    service.record(test_admin.id, 7, {}, {"boxMedium": 2}, at=at)
+    db.commit()
+
+    assert _totals(db, test_user.id, 2024, test_apiary.id) == (4, 0, 1)
+    assert _totals(db, test_user.id, 2024, 999) == (3, 0, 0)
+    assert _totals(db, test_user.id, 2024) == (7, 0, 1)
+    assert _totals(db, test_user.id, 2023) == (9, 0, 0)
+    assert db.query(HarvestLedger).filter(HarvestLedger.userId == test_user.id).count() == 3
+
+
+def test_season_total_never_goes_negative(db, test_user, test_apiary):
+    service = HarvestService(db)
+    at = datetime(2024, 9, 1)
+
+    service.record(test_user.id, test_apiary.id, {}, {"box": 3}, at=at)
+    # Se vuelve a cero: resta solo lo cosechado en la temporada
+    service.record(test_user.id, test_apiary.id, {"box": 3}, {"box": 1}, at=at)
+    # Contador de la temporada anterior vuelto a cero: no resta nada
+    service.record(test_user.id, test_apiary.id, {"boxSmall": 6}, {"boxSmall": 0}, at=at)
+    db.commit()
+
+    assert _totals(db, test_user.id, 2024) == (1, 0, 0)
+    last = db.query(HarvestLedger).order_by(HarvestLedger.id.desc()).first()
+    assert (last.boxSmall, last.harvestedBoxSmall) == (-6, 0)
+
+
+def test_apiary_updates_write_the_ledger(db, test_user, test_apiary):
+    service = ApiaryService(db)
+    season = season_of(datetime.utcnow())
+
+    asyncio.run(service.update_apiary(test_apiary.id, UpdateApiary(box=2, boxMedium=1)))
+    asyncio.run(service.update_apiary(test_apiary.id, UpdateApiary(hives=8)))
+    asyncio.run(service.update_apiary(test_apiary.id, UpdateApiary(box=5)))
+
+    assert db.query(HarvestLedger).count() == 2
+    season_data = service.get_season_harvest(test_user.id)
+    assert season_data["season"] == season
+    assert (season_data["box"], season_data["boxMedium"], season_data["total"]) == (5, 1, 6)
+    assert service.get_season_harvest(test_user.id, apiary_id=test_apiary.id)["total"] == 6
+
+    # El borrado no quita lo cosechado
+    service.delete_apiary(test_apiary.id)
+    assert service.get_season_harvest(test_user.id)["total"] == 6
+
+
+def test_season_reads_one_row(db, test_user):
+    user_id = test_user.id
+    service = HarvestService(db)
+    service.record(user_id, 1, {}, {"box": 2}, at=datetime(2023, 10, 1))
+    service.record(user_id, 1, {}, {"box": 3}, at=datetime(2024, 10, 1))
+    db.commit()
+
+    with track_queries() as tracker:
+        data = service.get_season(user_id, 2023)
+    assert tracker.count == 1
+    assert data == {
+        "season": 2023, "start": date(2023, 7, 1), "end": date(2024, 7, 1),
+        "box": 2, "boxMedium": 0, "boxSmall": 0, "total": 2,
+    }
+    assert service.get_season(user_id, 2010)["total"] == 0
+    assert [item["season"] for item in service.list_seasons(user_id)] == [2024, 2023]
+
+
+def test_backfill_from_history(db, test_user, test_apiary):
+    def add(model, row_id, changes, when, field=CHANGESET_FIELD, previous=None, new=None):
+        db.add(model(
+            id=row_id, userId=test_user.id, apiaryId=test_apiary.id, field=field,
+            changes=changes, previousValue=previous, newValue=new, changeDate=when,
+        ))
+
+    add(HistoryArchive, 1, {"box": [None, 2]}, datetime(2023, 8, 1))
+    add(History, 2, None, datetime(2024, 8, 1), field="box", previous="2", new="6")
+    add(History, 3, {"hives": [5, 6]}, datetime(2024, 8, 2))
+    add(History, 4, {"box": [6, 0], "boxSmall": [0, 1]}, datetime(2024, 9, 1))
+    db.commit()
+
+    service = HarvestService(db)
+    assert service.backfill_from_history(model=HistoryArchive) == (1, 1)
+    assert service.backfill_from_history(batch_size=2) == (1, 3)
+    assert service.backfill_from_history(after_id=3) == (1, 4)
+    assert service.backfill_from_history(after_id=4) == (0, None)
+    db.commit()
+
+    assert _totals(db, test_user.id, 2023) == (2, 0, 0)
+    assert _totals(db, test_user.id, 2024) == (0, 0, 1)
+    ledger = db.query(HarvestLedger).order_by(HarvestLedger.id).all()
+    assert [row.createdAt for row in ledger] == [datetime(2023, 8, 1), datetime(2024, 8, 1), datetime(2024, 9, 1)]
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.models.history import History, HistoryArchive
+from app.models.subscription import Subscription
+from app.services.apiary_service import ApiaryService
+from app.services.history_archive_service import HistoryArchiveService, add_months
+
+NOW = datetime(2025, 6, 15, 12, 0)
+
+
+def _add_history(db, user_id, apiary_id, change_date, field="honey"):
+    entry = History(
+        userId=user_id, apiaryId=apiary_id, field=field,
+        previousValue="0", newValue="1", changeDate=change_date,
+    )
+    db.add(entry)
+    db.commit()
+    return entry.id
+
+
+def test_add_months():
+    assert add_months(datetime(2025, 1, 20), -1) == datetime(2024, 12, 1)
+    assert add_months(datetime(2025, 6, 1), -36) == datetime(2022, 6, 1)
+    assert add_months(datetime(2024, 12, 31), 1) == datetime(2025, 1, 1)
+
+
+def test_archive_moves_old_rows_in_batches(db, test_user, test_apiary, monkeypatch):
+    monkeypatch.setattr(settings, "history_archive_batch_size", 2)
+    old = NOW - timedelta(days=settings.history_hot_days + 1)
+    old_ids = [_add_history(db, test_user.id, test_apiary.id, old - timedelta(minutes=i)) for i in range(5)]
+    recent_id = _add_history(db, test_user.id, test_apiary.id, NOW - timedelta(days=1))
+
+    moved = HistoryArchiveService(db).archive_old_history(NOW)
+
+    assert moved == 5
+    assert [row.id for row in db.query(History).all()] == [recent_id]
+    archived = db.query(HistoryArchive).order_by(HistoryArchive.id).all()
+    assert [row.id for row in archived] == old_ids
+    assert archived[0].field == "honey"
+    assert archived[0].userId == test_user.id
+
+
+def test_purge_applies_tier_retention(db, test_user, test_apiary, monkeypatch):
+    monkeypatch.setattr(settings, "history_retention_purge_enabled", True)
+    from app.models.user import User
+    other = User(name="Other", surname="User", email="other@example.com", password="x")
+    db.add(other)
+    db.commit()
+    db.add(Subscription(userId=other.id, tier="apicultor", status="active"))
+    db.commit()
+
+    two_years_ago = NOW - timedelta(days=730)
+    # test_user no tiene suscripción: aprendiz, 12 meses
+    aprendiz_old = _add_history(db, test_user.id, test_apiary.id, two_years_ago)
+    aprendiz_recent = _add_history(db, test_user.id, test_apiary.id, NOW - timedelta(days=30))
+    # apicultor: 36 meses
+    apicultor_old = _add_history(db, other.id, test_apiary.id, two_years_ago)
+
+    counts = HistoryArchiveService(db).run(NOW)
+
+    assert counts["purged"] == 1
+    remaining = {row.id for row in db.query(History).all()} | {row.id for row in db.query(HistoryArchive).all()}
+    assert remaining == {aprendiz_recent, apicultor_old}
+    assert aprendiz_old not in remaining
+
+
+def test_purge_is_dry_run_by_default(db, test_user, test_apiary):
+    entry_id = _add_history(db, test_user.id, test_apiary.id, NOW - timedelta(days=200))
+    _add_history(db, test_user.id, test_apiary.id, NOW - timedelta(days=730))
+
+    counts = HistoryArchiveService(db).run(NOW)
+
+    assert (counts["purged"], counts["purgeable"]) == (0, 1)
+    assert db.query(History).count() + db.query(HistoryArchive).count() == 2
+    assert db.get(History, entry_id) is not None
+
+
+def test_purge_treats_expired_subscription_as_aprendiz_after_grace(db, test_user, test_apiary):
+    subscription = Subscription(
+        userId=test_user.id, tier="maestro", status="active",
+        expiresAt=NOW - timedelta(days=settings.history_retention_grace_days - 1),
+    )
+    db.add(subscription)
+    db.commit()
+    _add_history(db, test_user.id, test_apiary.id, NOW - timedelta(days=730))
+    service = HistoryArchiveService(db)
+
+    # Renovación demorada: dentro del período de gracia conserva la retención del plan
+    assert service.purge_expired_history(NOW) == 0
+
+    subscription.expiresAt = NOW - timedelta(days=settings.history_retention_grace_days + 1)
+    db.commit()
+    assert service.purge_expired_history(NOW) == 1
+
+
+def test_get_all_history_reads_archive_only_on_request(db, test_user, test_apiary):
+    old = NOW - timedelta(days=settings.history_hot_days + 1)
+    _add_history(db, test_user.id, test_apiary.id, old)
+    _add_history(db, test_user.id, test_apiary.id, datetime.utcnow())
+    HistoryArchiveService(db).archive_old_history(datetime.utcnow())
+
+    service = ApiaryService(db)
+    assert len(service.get_all_history(test_apiary.id)) == 1
+    assert len(service.get_all_history(test_apiary.id, include_archived=True)) == 2
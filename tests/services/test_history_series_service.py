@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.history import History, HistoryArchive
+from app.models.hive import Hive
+from app.models.hive_history import HiveHistory
+from app.schemas.apiary import UpdateApiary
+from app.services.apiary_service import ApiaryService
+from app.services.history_series_service import HistorySeriesService
+from app.services.history_service import CHANGESET_FIELD
+from app.utils.db_instrumentation import track_queries
+
+
+def _change_set(db, apiary, changes, change_date, model=History, row_id=None):
+    db.add(model(
+        id=row_id, userId=apiary.userId, apiaryId=apiary.id, field=CHANGESET_FIELD,
+        changes=changes, changeDate=change_date,
+    ))
+
+
+@pytest.fixture
+def seeded(db, test_apiary):
+    # Numeric como texto con la escala de la columna, igual que HistoryService
+    _change_set(db, test_apiary, {"honey": ["0.00", "10.00"], "box": [0, 2]}, datetime(2024, 5, 6, 9, 0))
+    _change_set(db, test_apiary, {"honey": ["10.00", "12.50"]}, datetime(2024, 5, 6, 18, 0))
+    # Fila vieja por campo
+    db.add(History(
+        userId=test_apiary.userId, apiaryId=test_apiary.id, field="honey",
+        previousValue="12.50", newValue="4.25", changeDate=datetime(2024, 5, 8, 10, 0),
+    ))
+    _change_set(db, test_apiary, {"box": [2, 5]}, datetime(2024, 5, 20, 10, 0))
+    db.commit()
+    return test_apiary
+
+
+def test_apiary_series_by_day(db, seeded):
+    data = HistorySeriesService(db).apiary_series(
+        seeded.id, ["honey", "box"], aggregates=["last", "sum", "min", "max"]
+    )
+
+    assert data["buckets"] == ["2024-05-06", "2024-05-08", "2024-05-20"]
+    assert data["series"]["honey"] == {
+        "last": [12.5, 4.25, None],
+        "sum": [22.5, 4.25, None],
+        "min": [10.0, 4.25, None],
+        "max": [12.5, 4.25, None],
+    }
+    assert data["series"]["box"]["last"] == [2, None, 5]
+
+
+def test_apiary_series_by_week_and_month(db, seeded):
+    service = HistorySeriesService(db)
+
+    weekly = service.apiary_series(seeded.id, ["honey"], bucket="week")
+    assert weekly["buckets"] == ["2024-05-06"]
+    assert weekly["series"]["honey"]["last"] == [4.25]
+
+    monthly = service.apiary_series(seeded.id, ["box"], bucket="month", aggregates=["max"])
+    assert monthly == {"bucket": "month", "buckets": ["2024-05-01"], "series": {"box": {"max": [5]}}}
+
+
+def test_apiary_series_timezone_and_range(db, seeded):
+    service = HistorySeriesService(db)
+
+    # 18:00 UTC del 6/5 es el 7/5 en UTC+9
+    data = service.apiary_series(seeded.id, ["honey"], tz=ZoneInfo("Asia/Tokyo"))
+    assert data["buckets"] == ["2024-05-06", "2024-05-07", "2024-05-08"]
+
+    data = service.apiary_series(
+        seeded.id, ["honey"], since=datetime(2024, 5, 6, 12, 0), until=datetime(2024, 5, 8)
+    )
+    assert data["buckets"] == ["2024-05-06"]
+    assert data["series"]["honey"]["last"] == [12.5]
+
+
+def test_apiary_series_include_archived(db, seeded):
+    _change_set(db, seeded, {"honey": [0.0, 3.0]}, datetime(2023, 1, 2), model=HistoryArchive, row_id=1000)
+    db.commit()
+    service = HistorySeriesService(db)
+
+    assert service.apiary_series(seeded.id, ["honey"], bucket="month")["buckets"] == ["2024-05-01"]
+    data = service.apiary_series(seeded.id, ["honey"], bucket="month", include_archived=True)
+    assert data["buckets"] == ["2023-01-01", "2024-05-01"]
+
+
+def test_apiary_series_rejects_unknown_fields(db, seeded):
+    with pytest.raises(HTTPException) as exc:
+        HistorySeriesService(db).apiary_series(seeded.id, ["name"])
+    assert exc.value.status_code == 400
+
+
+def test_series_cache_invalidated_on_new_history(db, seeded):
+    service = HistorySeriesService(db)
+    before = service.apiary_series(seeded.id, ["hives"])
+
+    with track_queries() as tracker:
+        assert service.apiary_series(seeded.id, ["hives"]) == before
+    assert tracker.count == 0
+
+    asyncio.run(ApiaryService(db).update_apiary(seeded.id, UpdateApiary(hives=15)))
+
+    after = service.apiary_series(seeded.id, ["hives"])
+    assert after["series"]["hives"]["last"][-1] == 15
+
+
+def test_apiary_series_numeric_fields_written_by_update(db, test_apiary):
+    """Los Numeric que escribe update_apiary se comparan y suman como números, no como texto."""
+    service = ApiaryService(db)
+    asyncio.run(service.update_apiary(test_apiary.id, UpdateApiary(honey=12.5, sugar=3)))
+    asyncio.run(service.update_apiary(test_apiary.id, UpdateApiary(honey=9)))
+
+    data = HistorySeriesService(db).apiary_series(
+        test_apiary.id, ["honey", "sugar"], aggregates=["last", "min", "max", "sum"]
+    )
+
+    assert len(data["buckets"]) == 1
+    # Como texto, '12.50' < '9.00'
+    assert data["series"]["honey"] == {"last": [9.0], "min": [9.0], "max": [12.5], "sum": [21.5]}
+    assert data["series"]["sugar"]["last"] == [3.0]
+
+
+def test_hive_series(db, test_user, test_apiary):
+    hive = Hive(apiaryId=test_apiary.id, userId=test_user.id, name="H1")
+    db.add(hive)
+    db.commit()
+    for day, changes in ((1, {"population": 100, "honey": 2.5}), (1, {"population": 80}), (3, {"honey": 4.0})):
+        db.add(HiveHistory(
+            hiveId=hive.id, apiaryId=test_apiary.id, userId=test_user.id, createdBy=test_user.id,
+            changes=changes, date=datetime(2024, 6, day, 12, 0),
+        ))
+    db.commit()
+
+    data = HistorySeriesService(db).hive_series(hive.id, test_user.id, ["population", "honey"], aggregates=["last", "max"])
+
+    assert data["buckets"] == ["2024-06-01", "2024-06-03"]
+    assert data["series"]["population"] == {"last": [80, None], "max": [100, None]}
+    assert data["series"]["honey"] == {"last": [2.5, 4.0], "max": [2.5, 4.0]}
@@ -0,0 +1,147 @@
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+from app.models.history import History
+from app.schemas.apiary import UpdateApiary
+from app.services.apiary_service import ApiaryService
+from app.services.history_service import CHANGESET_FIELD, CREATION_FIELD, HistoryService
+from app.utils.db_instrumentation import track_queries
+
+
+def _legacy_row(db, apiary, field, previous, new, change_date):
+    db.add(History(
+        userId=apiary.userId, apiaryId=apiary.id, field=field,
+        previousValue=previous, newValue=new, changeDate=change_date,
+    ))
+
+
+def test_log_changes_single_insert_in_caller_transaction(db, test_apiary):
+    """Una edición es un INSERT de una fila y sin commit propio."""
+    service = HistoryService(db)
+    old_values = service.snapshot(test_apiary)
+    test_apiary.name = "Renamed"
+    test_apiary.hives = 9
+    test_apiary.box = 3
+
+    with track_queries() as tracker:
+        written = service.log_changes(old_values, test_apiary)
+
+    assert written == 3
+    assert tracker.count == 1
+
+    row = db.query(History).one()
+    assert row.field == CHANGESET_FIELD
+    assert row.changes == {"name": ["Test Apiary", "Renamed"], "hives": [5, 9], "box": [0, 3]}
+
+    db.rollback()
+    assert db.query(History).count() == 0
+
+
+def test_log_creation_is_one_typed_row(db, test_apiary):
+    assert HistoryService(db).log_creation(test_apiary) > 0
+    db.commit()
+
+    row = db.query(History).one()
+    assert row.field == CREATION_FIELD
+    assert row.previousValue is None and row.newValue is None
+    assert row.changes["name"] == [None, "Test Apiary"]
+    assert row.changes["hives"] == [None, 5]
+    # Numeric: texto con la escala de la columna, sin pasar por float
+    assert row.changes["honey"] == [None, "0.00"]
+    assert HistoryService.change_set_of(row)["honey"] == [None, Decimal("0.00")]
+
+
+def test_change_set_keeps_decimals_exact(db, test_apiary):
+    service = HistoryService(db)
+    old_values = service.snapshot(test_apiary)
+    test_apiary.honey = Decimal("0.1") + Decimal("0.2")
+    test_apiary.sugar = Decimal("12345678.91")
+
+    service.log_changes(old_values, test_apiary)
+
+    row = db.query(History).one()
+    assert row.changes["honey"] == ["0.00", "0.30"]
+    assert row.changes["sugar"][1] == "12345678.91"
+    # Filas escritas antes como float se leen con la escala de la columna
+    row.changes = {"honey": [0.0, 12.5]}
+    assert HistoryService.change_set_of(row) == {"honey": [Decimal("0.00"), Decimal("12.50")]}
+
+
+def test_get_all_history_expands_change_sets(db, test_apiary):
+    """El endpoint de compatibilidad devuelve un cambio por campo, en texto."""
+    HistoryService(db).log_creation(test_apiary)
+    db.commit()
+
+    history = ApiaryService(db).get_all_history(test_apiary.id)
+
+    by_field = {entry.field: entry for entry in history}
+    assert CREATION_FIELD not in by_field
+    assert by_field["name"].newValue == "Test Apiary"
+    assert by_field["name"].previousValue == ""
+    assert by_field["hives"].newValue == "5"
+    assert by_field["honey"].newValue == "0.00"
+    assert by_field["name"].userName == "Test User"
+
+
+def test_update_apiary_logs_only_changed_fields(db, test_apiary):
+    service = ApiaryService(db)
+
+    asyncio.run(service.update_apiary(test_apiary.id, UpdateApiary(hives=15, status="normal")))
+
+    change_sets = service.get_change_sets(test_apiary.id)
+    assert [(entry["kind"], entry["changes"]) for entry in change_sets] == [("update", {"hives": [5, 15]})]
+    history = service.get_all_history(test_apiary.id)
+    assert [(row.field, row.previousValue, row.newValue) for row in history] == [("hives", "5", "15")]
+
+
+def test_convert_legacy_batch_groups_rows_per_edit(db, test_apiary):
+    created = datetime(2024, 3, 1, 10, 0)
+    edited = datetime(2024, 3, 2, 10, 0)
+    _legacy_row(db, test_apiary, "name", "", "Test Apiary", created)
+    _legacy_row(db, test_apiary, "managementType", "", "apiary", created)
+    _legacy_row(db, test_apiary, "honey", "0.00", "12.50", edited)
+    _legacy_row(db, test_apiary, "box", "1", "4", edited)
+    _legacy_row(db, test_apiary, "status", "normal", "alert", datetime(2024, 3, 3))
+    db.commit()
+
+    service = HistoryService(db)
+    # Lote de 3: la edición del 2/3 queda partida y se deja para el siguiente
+    converted, last_id = service.convert_legacy_batch(batch_size=3)
+    db.commit()
+    assert converted == 2
+
+    while last_id is not None:
+        _, last_id = service.convert_legacy_batch(after_id=last_id, batch_size=3)
+        db.commit()
+
+    rows = db.query(History).order_by(History.id).all()
+    assert [(row.field, row.changes) for row in rows] == [
+        (CREATION_FIELD, {"name": [None, "Test Apiary"], "managementType": [None, "apiary"]}),
+        (CHANGESET_FIELD, {"honey": ["0.00", "12.50"], "box": [1, 4]}),
+        (CHANGESET_FIELD, {"status": ["normal", "alert"]}),
+    ]
+
+
+def test_harvested_today_reads_both_formats(db, test_user, test_apiary):
+    from app.models.apiary import Apiary
+    other = Apiary(userId=test_user.id, name="Other", hives=2, status="normal", image="o.jpg")
+    db.add(other)
+    db.commit()
+
+    now = datetime(2024, 5, 10, 15, 0)
+    _legacy_row(db, test_apiary, "box", "0", "2", datetime(2024, 5, 10, 9, 0))
+    db.add(History(
+        userId=test_user.id, apiaryId=test_apiary.id, field=CHANGESET_FIELD,
+        changes={"box": [2, 5], "hives": [5, 6]}, changeDate=datetime(2024, 5, 10, 11, 0),
+    ))
+    db.add(History(
+        userId=test_user.id, apiaryId=other.id, field=CHANGESET_FIELD,
+        changes={"boxSmall": [0, 3]}, changeDate=datetime(2024, 5, 10, 12, 0),
+    ))
+    db.commit()
+
+    data = ApiaryService(db)._get_harvested_today_changes(test_user.id, now=now)
+
+    assert data["apiaryIds"] == {test_apiary.id, other.id}
+    assert (data["box"], data["boxMedium"], data["boxSmall"]) == (5, 0, 3)
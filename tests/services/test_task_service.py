@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from app.schemas.task import TaskCreate
+from app.services.task_service import TaskService
+
+
+def _walk(service, user_id, limit, **filters):
+    seen, after = [], None
+    while True:
+        tasks, after, _ = service.get_tasks_page(user_id, limit=limit, after=after, **filters)
+        seen += [task.title for task in tasks]
+        if after is None:
+            return seen
+
+
+def test_get_tasks_page_orders_by_due_date_with_undated_last(db, test_user):
+    service = TaskService(db)
+    for title, due_date in (
+        ("b", datetime(2024, 5, 2)), ("none-1", None), ("a", datetime(2024, 5, 1)),
+        ("b2", datetime(2024, 5, 2)), ("none-2", None),
+    ):
+        service.create_task(test_user.id, TaskCreate(title=title, due_date=due_date, completed=title == "b2"))
+
+    expected = ["a", "b", "b2", "none-1", "none-2"]
+    for limit in (1, 2, 5):
+        assert _walk(service, test_user.id, limit) == expected
+    assert _walk(service, test_user.id, 2, completed=False) == ["a", "b", "none-1", "none-2"]
+
+
+def test_get_tasks_page_total_is_opt_in(db, test_user):
+    service = TaskService(db)
+    for index in range(3):
+        service.create_task(test_user.id, TaskCreate(title=f"T{index}"))
+
+    tasks, next_key, total = service.get_tasks_page(test_user.id, limit=2)
+    assert (len(tasks), total) == (2, None)
+    assert next_key == (None, tasks[-1].id)
+    assert service.get_tasks_page(test_user.id, limit=2, exact_total=True)[2] == 3
@@ -80,3 +80,35 @@ def test_delete_user_not_found(db):
     
     assert result is False
 
+
+def test_get_cached_user_skips_select(db, test_user):
+    """Test that a cached user row is served without querying the user table."""
+    from sqlalchemy import event
+
+    service = UserService(db)
+    assert service.get_cached_user(test_user.id).id == test_user.id
+
+    statements = []
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        user = service.get_cached_user(test_user.id)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert user.email == test_user.email
+    assert statements == []
+
+def test_update_profile_invalidates_cached_user(db, test_user):
+    """Test that profile changes are visible through the user cache."""
+    from app.schemas.user import UpdateProfileRequest
+
+    service = UserService(db)
+    service.get_cached_user(test_user.id)
+    service.update_profile(test_user.id, UpdateProfileRequest(name="Renamed"))
+    db.expunge_all()
+
+    assert service.get_cached_user(test_user.id).name == "Renamed"
@@ -0,0 +1,101 @@
+import asyncio
+
+from app.models.apiary import Apiary
+from app.models.settings import Settings
+from app.models.user_stats import UserStats
+from app.schemas.apiary import UpdateApiary
+from app.schemas.hive import HiveCreate
+from app.schemas.settings import UpdateSettings
+from app.services.apiary_service import ApiaryService
+from app.services.hive_service import HiveService
+from app.services.settings_service import SettingsService
+from app.services.user_stats_service import STAT_COLUMNS, UserStatsService
+from app.utils.db_instrumentation import track_queries
+
+
+def _stored(db, user_id):
+    db.expire_all()
+    row = db.get(UserStats, user_id)
+    return {column: getattr(row, column) for column in STAT_COLUMNS} if row else None
+
+
+def _second_apiary(db, user):
+    apiary = Apiary(userId=user.id, name="Second", hives=3, box=2, boxSmall=1, status="normal", image="b.jpg")
+    db.add(apiary)
+    db.flush()
+    db.add(Settings(apiaryId=apiary.id, apiaryUserId=user.id, harvesting=True))
+    db.commit()
+    return apiary
+
+
+def test_get_stats_without_row_computes_without_storing(db, test_user, test_apiary):
+    _second_apiary(db, test_user)
+
+    stats = UserStatsService(db).get_stats(test_user.id)
+
+    assert stats == {
+        "apiaryCount": 2, "hiveCount": 8, "box": 2, "boxMedium": 0, "boxSmall": 1,
+        "harvestingApiaries": 1, "harvestedApiaries": 1, "harvestedHives": 3,
+    }
+    assert _stored(db, test_user.id) is None
+
+
+def test_get_stats_reads_one_row(db, test_user, test_apiary):
+    user_id = test_user.id
+    UserStatsService(db).reconcile()
+
+    with track_queries() as tracker:
+        stats = ApiaryService(db).get_box_stats(user_id)
+
+    assert tracker.count == 1
+    assert stats == {"box": 0, "boxMedium": 0, "boxSmall": 0, "total": 0}
+
+
+def test_writes_apply_deltas(db, test_user, test_apiary):
+    UserStatsService(db).reconcile()
+    apiary_service = ApiaryService(db)
+
+    asyncio.run(apiary_service.update_apiary(test_apiary.id, UpdateApiary(box=4, hives=7)))
+    stats = _stored(db, test_user.id)
+    assert (stats["hiveCount"], stats["box"], stats["harvestedApiaries"], stats["harvestedHives"]) == (7, 4, 1, 7)
+
+    HiveService(db).create_hive(test_user.id, HiveCreate(apiaryId=test_apiary.id, name="H-1"))
+    # El recuento de colmenas reemplaza el valor cargado a mano
+    assert _stored(db, test_user.id)["hiveCount"] == 1
+
+    settings = db.query(Settings).filter(Settings.apiaryId == test_apiary.id).one()
+    SettingsService(db).update_settings(
+        settings.id, UpdateSettings(apiaryId=test_apiary.id, apiaryUserId=test_user.id, harvesting=True)
+    )
+    assert _stored(db, test_user.id)["harvestingApiaries"] == 1
+
+    second = _second_apiary(db, test_user)
+    UserStatsService(db).reconcile()
+    SettingsService(db).set_harvesting_for_all_apiaries(test_user.id, False)
+    assert _stored(db, test_user.id)["harvestingApiaries"] == 0
+
+    apiary_service.delete_apiary(second.id)
+    assert _stored(db, test_user.id) == UserStatsService(db).compute([test_user.id])[test_user.id]
+
+
+def test_first_write_without_row_stores_full_stats(db, test_user, test_apiary):
+    asyncio.run(ApiaryService(db).update_apiary(test_apiary.id, UpdateApiary(boxMedium=3)))
+
+    stats = _stored(db, test_user.id)
+    assert stats["apiaryCount"] == 1
+    assert stats["boxMedium"] == 3
+    assert stats["harvestedHives"] == 5
+
+
+def test_reconcile_creates_and_fixes_rows(db, test_user, test_apiary, test_admin):
+    db.add(UserStats(userId=test_user.id, apiaryCount=9, hiveCount=1))
+    db.commit()
+
+    counts = UserStatsService(db).reconcile(batch_size=1)
+
+    assert counts == {"checked": 2, "created": 1, "fixed": 1}
+    assert _stored(db, test_user.id)["apiaryCount"] == 1
+    assert _stored(db, test_user.id)["hiveCount"] == 5
+    assert _stored(db, test_admin.id)["apiaryCount"] == 0
+
+    assert UserStatsService(db).reconcile() == {"checked": 2, "created": 0, "fixed": 0}
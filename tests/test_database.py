@@ -0,0 +1,33 @@
+from sqlalchemy.pool import NullPool
+
+from app.config import settings
+from app.database import build_pool_options
+from app.utils.db_instrumentation import InstrumentedQueuePool
+
+
+def test_queue_pool_options_follow_settings(monkeypatch):
+    monkeypatch.setattr(settings, "db_pool_size", 8)
+    monkeypatch.setattr(settings, "db_max_overflow", 2)
+    monkeypatch.setattr(settings, "db_pool_timeout", 3.0)
+    monkeypatch.setattr(settings, "db_pool_use_lifo", True)
+
+    options = build_pool_options("queue")
+
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_size"] == 8
+    assert options["max_overflow"] == 2
+    assert options["pool_timeout"] == 3.0
+    assert options["pool_use_lifo"] is True
+
+
+def test_null_pool_mode_has_no_local_pool():
+    assert build_pool_options("null") == {"poolclass": NullPool}
+
+
+def test_serverless_defaults_to_null_pool(monkeypatch):
+    from app.config import Settings
+
+    monkeypatch.setenv("VERCEL", "1")
+    monkeypatch.delenv("DB_POOL_MODE", raising=False)
+
+    assert Settings().db_pool_mode == "null"
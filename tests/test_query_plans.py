@@ -0,0 +1,143 @@
+"""
+Verifica con EXPLAIN QUERY PLAN que las consultas de los servicios usan
+sus índices (ver migrations/README_QUERY_INDEXES.md).
+
+Cada caso ejecuta el método real del servicio sobre un dataset sembrado,
+captura los statements que emitió y pide el plan de cada uno.
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from decimal import Decimal
+
+from app.models import Apiary, Drum, History, Hive, HiveHistory, Settings, User
+from app.models.notification import Notification
+from app.models.task import Task
+from app.services.apiary_service import ApiaryService
+from app.services.drum_service import DrumService
+from app.services.history_series_service import HistorySeriesService
+from app.services.hive_history_service import HiveHistoryService
+from app.services.notification_service import NotificationService
+from app.services.settings_service import SettingsService
+from app.services.task_service import TaskService
+from tests.conftest import engine
+
+
+@contextmanager
+def captured_statements():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def query_plan(db, statement, parameters) -> str:
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return " | ".join(row[-1] for row in rows)
+
+
+@pytest.fixture
+def seeded(db):
+    """Varios usuarios con apiarios, historial, notificaciones y tareas."""
+    now = datetime.now()
+    users = []
+    for user_index in range(5):
+        user = User(name=f"U{user_index}", surname="Seed", email=f"seed{user_index}@example.com", password="x")
+        db.add(user)
+        db.flush()
+        users.append(user)
+
+        for apiary_index in range(10):
+            apiary = Apiary(userId=user.id, name=f"A{apiary_index}", hives=3, status="normal", image="a.jpg")
+            db.add(apiary)
+            db.flush()
+            db.add(Settings(apiaryId=apiary.id, apiaryUserId=user.id, tComment=True))
+
+            for day in range(10):
+                for field in ("box", "honey", "status"):
+                    db.add(History(
+                        userId=user.id,
+                        apiaryId=apiary.id,
+                        field=field,
+                        previousValue="0",
+                        newValue=str(day),
+                        changeDate=now - timedelta(days=day),
+                    ))
+
+            hive = Hive(userId=user.id, apiaryId=apiary.id, name=f"H{apiary_index}")
+            db.add(hive)
+            db.flush()
+            for day in range(10):
+                db.add(HiveHistory(
+                    hiveId=hive.id, apiaryId=apiary.id, userId=user.id, createdBy=user.id,
+                    changes={"population": day}, date=now - timedelta(days=day),
+                ))
+
+        for index in range(20):
+            db.add(Notification(userId=user.id, title="t", message=f"m{index}", isRead=index % 2 == 0))
+            db.add(Task(user_id=user.id, title=f"T{index}", completed=index % 3 == 0, due_date=now + timedelta(days=index)))
+            db.add(Drum(userId=user.id, code=f"D{index}", tare=Decimal("1"), weight=Decimal("2")))
+
+    db.commit()
+    first_apiary = db.query(Apiary).filter(Apiary.userId == users[0].id).first()
+    return users[0].id, first_apiary.id
+
+
+QUERY_INDEXES = [
+    ("harvested_today", "apiary_history", "idx_apiary_history_user_field_date",
+     lambda db, user_id, apiary_id: ApiaryService(db)._get_harvested_today_changes(user_id)),
+    ("apiary_history", "apiary_history", "idx_apiary_history_apiary_date",
+     lambda db, user_id, apiary_id: ApiaryService(db).get_all_history(apiary_id)),
+    ("apiary_history_page", "apiary_history", "idx_apiary_history_apiary_date",
+     lambda db, user_id, apiary_id: ApiaryService(db).get_history_page(
+         apiary_id, 5, after=(datetime.now() - timedelta(days=3), 10**6))),
+    ("hive_history_page", "hive_history", "idx_hive_history_hive_date",
+     lambda db, user_id, apiary_id: HiveHistoryService(db).get_hive_history_page(
+         db.query(Hive.id).filter(Hive.apiaryId == apiary_id).scalar(), user_id, 5)),
+    ("apiary_history_series", "apiary_history", "idx_apiary_history_apiary_date",
+     lambda db, user_id, apiary_id: HistorySeriesService(db).apiary_series(apiary_id, ["box", "honey"])),
+    ("unread_notifications", "notifications", "idx_notifications_user_read_created",
+     lambda db, user_id, apiary_id: NotificationService(db).get_user_notifications(user_id, unread_only=True)),
+    ("pending_tasks", "tasks", "idx_tasks_user_completed_due",
+     lambda db, user_id, apiary_id: TaskService(db).get_tasks(user_id, completed=False)),
+    ("tasks_page", "tasks", "idx_tasks_user_due",
+     lambda db, user_id, apiary_id: TaskService(db).get_tasks_page(user_id, limit=5, after=(datetime.now(), 10**6))),
+    ("drums_page", "drums", "idx_drums_user_created",
+     lambda db, user_id, apiary_id: DrumService(db).get_drums_page(user_id, limit=5, after=(datetime.now(), 10**6))),
+    ("user_apiaries", "apiary", "idx_apiary_user_updated",
+     lambda db, user_id, apiary_id: ApiaryService(db).get_all_by_user_id(user_id)),
+    ("apiary_settings_join", "apiary_setting", "idx_apiary_setting_apiary",
+     lambda db, user_id, apiary_id: ApiaryService(db).get_all_by_user_id(user_id)),
+    ("harvesting_for_all", "apiary_setting", "idx_apiary_setting_user",
+     lambda db, user_id, apiary_id: SettingsService(db).set_harvesting_for_all_apiaries(user_id, True)),
+]
+
+
+@pytest.mark.parametrize(
+    "table, index_name, call",
+    [case[1:] for case in QUERY_INDEXES],
+    ids=[case[0] for case in QUERY_INDEXES],
+)
+def test_service_query_uses_index(db, seeded, table, index_name, call):
+    user_id, apiary_id = seeded
+
+    with captured_statements() as statements:
+        call(db, user_id, apiary_id)
+
+    plans = [
+        query_plan(db, statement, parameters)
+        for statement, parameters in statements
+        if table in statement and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE"))
+    ]
+    assert plans, f"No statement touched {table}"
+    assert any(index_name in plan for plan in plans), plans
@@ -0,0 +1,39 @@
+import time
+
+from app.services.auth_service import AuthService
+from app.utils import auth_tokens
+from app.utils.cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    lru = LRUCache("test", max_size=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")
+    lru.set("c", 3)
+
+    assert lru.get("b") is None
+    assert lru.get("a") == 1
+    assert lru.get("c") == 3
+
+
+def test_lru_cache_respects_expiry():
+    lru = LRUCache("test", max_size=2)
+    lru.set("a", 1, expires_at=time.time() - 1)
+
+    assert lru.get("a") is None
+    assert lru.get_stats()["size"] == 0
+
+
+def test_verified_token_is_cached(monkeypatch):
+    token = AuthService(None).create_access_token({"sub": "1"})
+    auth_tokens.verified_token_cache.clear()
+    assert auth_tokens.decode_access_token(token)["sub"] == "1"
+
+    def fail(*args, **kwargs):
+        raise AssertionError("token should come from the cache")
+
+    monkeypatch.setattr(auth_tokens.jwt, "decode", fail)
+
+    assert auth_tokens.decode_access_token(token)["sub"] == "1"
+    assert auth_tokens.verified_token_cache.get_stats()["hits"] == 1
@@ -0,0 +1,130 @@
+import logging
+
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+from app.config import settings
+from app.middleware.request_id import request_id_var
+from app.utils.db_instrumentation import fingerprint_statement, instrument_engine, track_queries
+
+
+def test_fingerprint_ignores_literals_and_parameters():
+    first = fingerprint_statement("SELECT * FROM drums WHERE id = 1 AND code = 'A'")
+    second = fingerprint_statement("SELECT * FROM drums WHERE id = 42 AND code = 'B-7'")
+    bound = fingerprint_statement('SELECT * FROM drums WHERE id = %(id_1)s AND code = %(code_1)s')
+
+    assert first[0] == "select"
+    assert first[1] == second[1] == bound[1]
+
+
+def test_fingerprint_collapses_multi_row_values():
+    one_row = fingerprint_statement("INSERT INTO t (a, b) VALUES (?, ?)")
+    many_rows = fingerprint_statement("INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?)")
+
+    assert one_row[0] == "insert"
+    assert one_row[1] == many_rows[1]
+
+
+def test_instrumented_engine_records_duration_and_slow_queries(monkeypatch, caplog):
+    engine = instrument_engine(create_engine("sqlite://"))
+    _, fingerprint, _ = fingerprint_statement("SELECT 1")
+    labels = {"operation": "select", "fingerprint": fingerprint}
+    before = REGISTRY.get_sample_value("db_query_duration_seconds_count", labels) or 0
+
+    monkeypatch.setattr(settings, "db_slow_query_threshold_ms", 0.000001)
+    token = request_id_var.set("req-123")
+    try:
+        with caplog.at_level(logging.WARNING, logger="app.utils.db_instrumentation"):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+    finally:
+        request_id_var.reset(token)
+
+    assert REGISTRY.get_sample_value("db_query_duration_seconds_count", labels) == before + 1
+    assert any("request_id=req-123" in record.getMessage() for record in caplog.records)
+
+
+def test_track_queries_counts_statements_and_flags_repeats():
+    engine = instrument_engine(create_engine("sqlite://"))
+
+    with engine.connect() as conn:
+        with track_queries() as tracker:
+            for apiary_id in range(6):
+                conn.execute(text(f"SELECT {apiary_id}"))
+            conn.execute(text("SELECT 'other', 1"))
+        conn.execute(text("SELECT 99"))
+
+    assert tracker.count == 7
+    assert tracker.repeated(5) == [("SELECT ?", 6)]
+    assert tracker.repeated(7) == []
+
+
+def test_instrumented_pool_bounds_connections_under_burst(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    import time
+
+    from sqlalchemy import event
+
+    from app.utils.db_instrumentation import InstrumentedQueuePool
+
+    engine = instrument_engine(create_engine(
+        f"sqlite:///{tmp_path / 'burst.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=2,
+        max_overflow=1,
+        pool_timeout=10,
+    ))
+    opened = []
+    event.listen(engine.pool, "connect", lambda *args: opened.append(1))
+    waits_before = REGISTRY.get_sample_value("db_pool_wait_seconds_count") or 0
+
+    def checkout(_):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            time.sleep(0.01)
+
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        list(executor.map(checkout, range(40)))
+
+    assert len(opened) <= 3
+    assert REGISTRY.get_sample_value("db_pool_wait_seconds_count") == waits_before + 40
+    engine.dispose()
+
+
+def test_instrumented_pool_counts_timeouts(tmp_path):
+    import pytest
+    from sqlalchemy import exc
+
+    from app.utils.db_instrumentation import InstrumentedQueuePool
+
+    engine = instrument_engine(create_engine(
+        f"sqlite:///{tmp_path / 'timeout.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    ))
+    before = REGISTRY.get_sample_value("db_pool_timeouts_total") or 0
+
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    assert REGISTRY.get_sample_value("db_pool_timeouts_total") == before + 1
+    engine.dispose()
+
+
+def test_pool_metrics_follow_the_pool_after_dispose(tmp_path):
+    from app.utils.db_instrumentation import InstrumentedQueuePool
+
+    engine = instrument_engine(create_engine(
+        f"sqlite:///{tmp_path / 'dispose.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=2,
+    ))
+    engine.dispose()
+
+    with engine.connect(), engine.connect():
+        assert REGISTRY.get_sample_value("db_pool_overflow") == 1
+    engine.dispose()
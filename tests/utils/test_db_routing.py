@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import Base
+from app.models import News
+from app.services.news_service import NewsService
+from app.utils.db_routing import RoutingSession, recent_writers
+
+
+@pytest.fixture
+def routed_sessions(tmp_path):
+    """Primario y réplica en dos archivos SQLite con contenido distinto."""
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    for engine, title in ((primary, "primary"), (replica, "replica")):
+        Base.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine)() as session:
+            session.add(News(title=title, content=title))
+            session.commit()
+
+    recent_writers.clear()
+    factory = sessionmaker(
+        class_=RoutingSession,
+        autoflush=False,
+        bind=primary,
+        replica_bind=replica,
+    )
+    yield factory
+    recent_writers.clear()
+    primary.dispose()
+    replica.dispose()
+
+
+def _session(factory, user_id=None):
+    session = factory()
+    session.info["request_state"] = SimpleNamespace(user_id=user_id)
+    return session
+
+
+def _titles(news):
+    return [item.title for item in news]
+
+
+def test_read_only_methods_use_replica(routed_sessions):
+    with _session(routed_sessions) as session:
+        service = NewsService(session)
+
+        assert _titles(service.find_all()) == ["replica"]
+        # Sin @read_only: primario
+        assert service.find_by_id(1).title == "primary"
+
+
+def test_session_that_wrote_stays_on_primary(routed_sessions):
+    with _session(routed_sessions) as session:
+        session.add(News(title="fresh", content="fresh"))
+        session.flush()
+
+        assert sorted(_titles(NewsService(session).find_all())) == ["fresh", "primary"]
+
+
+def test_user_sticks_to_primary_after_write(routed_sessions, monkeypatch):
+    monkeypatch.setattr(settings, "db_read_your_writes_seconds", 5)
+
+    with _session(routed_sessions, user_id=7) as session:
+        session.add(News(title="fresh", content="fresh"))
+        session.commit()
+
+    with _session(routed_sessions, user_id=7) as session:
+        assert "fresh" in _titles(NewsService(session).find_all())
+
+    with _session(routed_sessions, user_id=8) as session:
+        assert _titles(NewsService(session).find_all()) == ["replica"]
+
+    recent_writers.delete(7)
+    with _session(routed_sessions, user_id=7) as session:
+        assert _titles(NewsService(session).find_all()) == ["replica"]
+
+
+def test_without_replica_everything_goes_to_primary(tmp_path):
+    primary = create_engine(f"sqlite:///{tmp_path / 'only.db'}")
+    Base.metadata.create_all(bind=primary)
+    factory = sessionmaker(class_=RoutingSession, bind=primary)
+
+    with factory() as session:
+        session.add(News(title="primary", content="primary"))
+        session.commit()
+        assert _titles(NewsService(session).find_all()) == ["primary"]
+    primary.dispose()
@@ -0,0 +1,64 @@
+import csv
+import io
+import zipfile
+from datetime import datetime
+from decimal import Decimal
+
+from app.utils.export import csv_stream, fields, xlsx_stream
+
+
+def test_csv_stream_writes_bom_header_and_rows():
+    rows = [[1, "Tambor ñ", Decimal("12.50"), True, None, datetime(2024, 5, 1, 8, 30)]]
+
+    body = b"".join(csv_stream(["id", "code", "tare", "sold", "note", "createdAt"], rows)).decode()
+
+    assert body.startswith("\ufeff")
+    assert list(csv.reader(io.StringIO(body[1:]))) == [
+        ["id", "code", "tare", "sold", "note", "createdAt"],
+        ["1", "Tambor ñ", "12.50", "true", "", "2024-05-01T08:30:00"],
+    ]
+
+
+def test_csv_stream_escapes_formula_cells():
+    rows = [["=HYPERLINK(\"http://x\")", "+1", "-2+3", "@SUM(A1)", "normal", -5, Decimal("-1.50")]]
+
+    body = b"".join(csv_stream(["a", "b", "c", "d", "e", "f", "g"], rows)).decode()
+
+    assert list(csv.reader(io.StringIO(body[1:])))[1] == [
+        "'=HYPERLINK(\"http://x\")", "'+1", "'-2+3", "'@SUM(A1)", "normal", "-5", "-1.50",
+    ]
+
+
+def test_csv_stream_yields_in_chunks():
+    rows = ([index, "x" * 100] for index in range(2000))
+
+    chunks = list(csv_stream(["id", "text"], rows))
+
+    assert len(chunks) > 1
+    assert b"".join(chunks).decode().count("\n") == 2001
+
+
+def test_xlsx_stream_is_a_readable_workbook():
+    rows = ([index, f"<apiario {index}>", index % 2 == 0, {"box": [0, index]}] for index in range(3000))
+
+    data = b"".join(xlsx_stream(["id", "name", "sold", "changes"], rows))
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        assert "xl/workbook.xml" in archive.namelist()
+        sheet = archive.read("xl/worksheets/sheet1.xml").decode()
+    assert sheet.count("<row ") == 3001
+    assert '<c r="A2"><v>0</v></c>' in sheet
+    assert "&lt;apiario 2999&gt;" in sheet
+    assert '<c r="C3" t="b"><v>0</v></c>' in sheet
+    assert '{"box": [0, 5]}' in sheet
+
+
+def test_fields_read_attributes_and_dict_keys():
+    class Item:
+        name = "Norte"
+
+    (_, getter), = fields("name")
+
+    assert getter(Item()) == "Norte"
+    assert getter({"name": "Sur"}) == "Sur"
@@ -0,0 +1,25 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(datetime(2024, 5, 10, 12, 30, 0, 125000), 42)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, (datetime, int)) == (datetime(2024, 5, 10, 12, 30, 0, 125000), 42)
+
+
+def test_cursor_with_null_key():
+    assert decode_cursor(encode_cursor(None, 7), (datetime, int)) == (None, 7)
+
+
+@pytest.mark.parametrize("cursor", ["nope", encode_cursor(1), encode_cursor("not-a-date", 1), "!!!"])
+def test_invalid_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, (datetime, int))
+
+    assert error.value.status_code == 400
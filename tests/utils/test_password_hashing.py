@@ -0,0 +1,40 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.config import settings
+from app.utils import password_hashing
+
+
+def test_slot_stays_taken_until_cancelled_work_finishes(monkeypatch):
+    monkeypatch.setattr(settings, "password_hash_max_pending", 1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_hash():
+        started.set()
+        release.wait(5)
+        return "hash"
+
+    async def scenario():
+        task = asyncio.create_task(password_hashing.run_password_task("hash", slow_hash))
+        await asyncio.to_thread(started.wait, 5)
+        # El cliente se desconecta: la request se cancela pero bcrypt sigue en el pool
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        with pytest.raises(HTTPException) as error:
+            await password_hashing.run_password_task("hash", lambda: "other")
+        assert error.value.status_code == 503
+
+        release.set()
+        for _ in range(100):
+            if password_hashing._in_flight == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert await password_hashing.run_password_task("hash", lambda: "other") == "other"
+
+    asyncio.run(scenario())
+    assert password_hashing._in_flight == 0
@@ -0,0 +1,109 @@
+import asyncio
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine
+
+from app.utils.scheduler_lock import SchedulerLock
+
+
+class _FakeConnection:
+    def __init__(self, server):
+        self.server = server
+        self.closed = False
+
+    def execute(self, statement, params=None):
+        if self.server.get("broken") is self:
+            raise ConnectionError("server closed the connection unexpectedly")
+        if str(statement) == "SELECT 1":
+            return SimpleNamespace(scalar=lambda: 1)
+        if "pg_try_advisory_lock" in str(statement):
+            if self.server["holder"] is None:
+                self.server["holder"] = self
+            return SimpleNamespace(scalar=lambda: self.server["holder"] is self)
+        if self.server["holder"] is self:
+            self.server["holder"] = None
+        return SimpleNamespace(scalar=lambda: True)
+
+    def commit(self):
+        pass
+
+    def invalidate(self):
+        # Como al cortarse la sesión: el servidor libera el lock
+        if self.server["holder"] is self:
+            self.server["holder"] = None
+
+    def close(self):
+        self.closed = True
+
+
+def _postgres_engine(server):
+    return SimpleNamespace(dialect=SimpleNamespace(name="postgresql"), connect=lambda: _FakeConnection(server))
+
+
+def test_only_one_process_leads_until_release():
+    server = {"holder": None}
+    leader, follower = SchedulerLock(_postgres_engine(server)), SchedulerLock(_postgres_engine(server))
+
+    assert leader.acquire() is True
+    assert follower.acquire() is False
+    assert not follower.held
+
+    leader.release()
+    assert follower.acquire() is True
+
+
+def test_follower_starts_scheduler_after_leader_leaves():
+    server = {"holder": None}
+    leader, follower = SchedulerLock(_postgres_engine(server)), SchedulerLock(_postgres_engine(server))
+    leader.acquire()
+    started = []
+
+    async def scenario():
+        task = asyncio.create_task(follower.run_when_leader(lambda: started.append(True), lambda: None, retry_seconds=0.01))
+        await asyncio.sleep(0.05)
+        assert started == []
+        leader.release()
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert started == [True]
+    assert follower.held
+
+
+def test_leader_stops_scheduler_when_lock_connection_drops():
+    server = {"holder": None}
+    leader, other = SchedulerLock(_postgres_engine(server)), SchedulerLock(_postgres_engine(server))
+    events = []
+
+    async def scenario():
+        task = asyncio.create_task(
+            leader.run_when_leader(lambda: events.append("start"), lambda: events.append("stop"), retry_seconds=0.01)
+        )
+        await asyncio.sleep(0.05)
+        assert events == ["start"]
+        assert leader.held
+
+        # Se corta la conexión del líder y otro proceso toma el lock liberado
+        server["broken"] = leader._connection
+        server["holder"] = None
+        assert other.acquire() is True
+        await asyncio.sleep(0.05)
+        assert events == ["start", "stop"]
+        assert not leader.held
+
+        # Cuando el otro lo suelta, el primero vuelve a ser líder
+        other.release()
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert events == ["start", "stop", "start"]
+    assert leader.held
+
+
+def test_other_dialects_run_without_lock():
+    lock = SchedulerLock(create_engine("sqlite://"))
+
+    assert lock.acquire() is True
+    assert not lock.held